@@ -1,9 +1,19 @@
 import os
+import time
+
+_BOOT_STARTED = time.perf_counter()
+
+import click
 from flask import Flask, request as flask_request, session, url_for
-from flask_migrate import Migrate
 from models import db, User
 from config import config
 from utils.time_utils import beijing_now
+from utils.schema import auto_create_schema, bootstrap_schema, check_schema_version, init_migrate
+from utils.database import configure_engines
+from utils import assets, metrics, rate_limit, sql_profiler
+from services import ai_backends
+# 导入即注册 Event / Moment 的变更日志监听器
+from services import change_log_service
 
 # 导入蓝图
 from blueprints.main import main_bp
@@ -11,28 +21,53 @@ from blueprints.moments import moments_bp
 from blueprints.ai import ai_bp
 from blueprints.profile import profile_bp
 from blueprints.auth import auth_bp
+from blueprints.export import export_bp
+from blueprints.data_import import import_bp
 
 
 
 def create_app(config_name: str = None) -> Flask:
     """应用工厂函数"""
+    timings = {'imports': time.perf_counter() - _BOOT_STARTED}
+    started = phase = time.perf_counter()
+
+    def mark(name):
+        nonlocal phase
+        now = time.perf_counter()
+        timings[name] = now - phase
+        phase = now
+
     app = Flask(__name__)
 
     # 配置
     config_name = config_name or os.environ.get('FLASK_ENV', 'default')
     app.config.from_object(config[config_name])
+    mark('config')
 
     # 数据库初始化
     db.init_app(app)
-    migrate = Migrate(app, db)
-
-    # 初始化数据库
-    with app.app_context():
-        db.create_all()
-        _create_indexes()
+    configure_engines(app)
+    # `flask db ...` 等命令行才需要 Flask-Migrate（会导入 alembic），web worker 跳过
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        init_migrate(app)
+
+    # 数据库结构只由迁移或 `flask db-bootstrap` 管理，启动时只校验版本（开发环境的空库自动初始化）
+    if app.config.get('SCHEMA_AUTO_CREATE'):
+        with app.app_context():
+            auto_create_schema()
+    check_schema_version(app)
+    mark('database')
+
+    # 解析 AI 后端（只在启动时做一次）
+    ai_backends.init_app(app)
+    mark('ai_backend')
 
     # 注册中间件
     _register_middleware(app)
+    assets.init_app(app)
+    sql_profiler.init_app(app)
+    metrics.init_app(app)
+    rate_limit.init_app(app)
     
     # 注册上下文处理器
     _register_context_processors(app)
@@ -40,41 +75,40 @@ def create_app(config_name: str = None) -> Flask:
     # 注册蓝图
     _register_blueprints(app)
 
-    return app
+    # 注册命令行
+    _register_commands(app)
+    mark('blueprints')
 
+    timings['create_app'] = time.perf_counter() - started
+    app.extensions['startup_timings'] = timings
+    app.logger.info('启动耗时(ms): %s', ' '.join(f'{k}={v * 1000:.1f}' for k, v in timings.items()))
 
-def _create_indexes():
-    """创建数据库索引"""
-    try:
-        db.session.execute(
-            db.text('CREATE INDEX IF NOT EXISTS idx_event_type_timestamp ON event (type, timestamp DESC)')
-        )
-        db.session.execute(
-            db.text('CREATE INDEX IF NOT EXISTS idx_event_user_id ON event (user_id)')
-        )
-        db.session.execute(
-            db.text('CREATE INDEX IF NOT EXISTS idx_moment_user_id ON moment (user_id)')
-        )
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
+    return app
 
 
 def _register_middleware(app):
     """注册中间件"""
-    # 压缩响应
+    # 部署在反向代理之后时还原客户端 IP 和协议
+    hops = app.config.get('PROXY_FIX_HOPS', 0)
+    if hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # 动态响应即时压缩；静态资源由 `flask assets-build` 预压缩（见 utils/assets.py）
     try:
         from flask_compress import Compress
         Compress(app)
     except Exception:
         pass
 
-    # 全局响应头：为静态资源设置缓存，为页面禁用缓存
+    # 全局响应头：带哈希的构建产物和时光媒体（文件名唯一）长期缓存，其余静态资源短期缓存，页面禁用缓存
     @app.after_request
     def add_cache_headers(response):
         path = flask_request.path
-        if path.startswith('/static/'):
-            response.headers['Cache-Control'] = 'public, max-age=2592000, immutable'
+        if path.startswith(('/static/dist/', '/static/moments/')):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        elif path.startswith('/static/'):
+            response.headers['Cache-Control'] = 'public, max-age=86400'
         else:
             response.headers['Cache-Control'] = 'no-store'
         return response
@@ -93,17 +127,109 @@ def _register_context_processors(app):
                 user = None
         return {'current_user': user}
 
-    @app.context_processor
-    def inject_avatar_url():
-        from utils.static_utils import get_avatar_url
-        return {'avatar_url': get_avatar_url(app)}
-
     @app.context_processor
     def inject_profile():
         from utils.static_utils import get_profile_context
         return get_profile_context(app)
 
 
+def _register_commands(app):
+    """注册命令行"""
+    @app.cli.command('db-bootstrap')
+    def db_bootstrap():
+        """初始化空库或把已有库升级到最新迁移版本"""
+        result = bootstrap_schema()
+        click.echo({'created': '已建表并标记为最新版本',
+                    'stamped': '已把未记录版本的旧库标记为基线并升级到最新版本',
+                    'upgraded': '已升级到最新迁移版本'}[result])
+
+    @app.cli.command('assets-build')
+    def assets_build():
+        """生成带内容哈希的静态资源、预压缩版本和清单"""
+        result = assets.build(app)
+        click.echo(f"{result['files']} 个文件（{result['precompressed']} 个预压缩），{result['aliases']} 个别名，"
+                   f"清理 {result['removed']} 个旧文件；源文件 {result['source_bytes'] / 1024:.0f} KB，"
+                   f"对外提供 {result['served_bytes'] / 1024:.0f} KB")
+
+    @app.cli.command('changes-prune')
+    @click.option('--days', type=int, default=None, help='墓碑保留天数，默认 CHANGE_TOMBSTONE_DAYS')
+    def changes_prune(days):
+        """清理过期的删除墓碑"""
+        days = days if days is not None else app.config['CHANGE_TOMBSTONE_DAYS']
+        removed = change_log_service.ChangeLogService.prune(days)
+        click.echo(f'已清理 {removed} 条 {days} 天前的删除记录')
+
+    @app.cli.command('changes-rebuild')
+    def changes_rebuild():
+        """按现有数据重建变更日志（绕过 ORM 批量写入之后使用），客户端下次同步会重新收到全部数据"""
+        written = change_log_service.ChangeLogService.rebuild()
+        click.echo(f'已写入 {written} 条变更记录')
+
+    @app.cli.command('export-history')
+    @click.argument('email')
+    @click.option('--output', '-o', required=True, type=click.Path(dir_okay=False, writable=True),
+                  help='输出文件；以 .zip 结尾时打包全部事件和时光')
+    @click.option('--entity', type=click.Choice(['events', 'moments']), default='events', help='非 ZIP 导出的数据类型')
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv')
+    @click.option('--media', is_flag=True, help='ZIP 中附带时光图片和视频')
+    def export_history(email, output, entity, fmt, media):
+        """流式导出某个用户所在家庭的完整历史（与网页下载相同的格式）"""
+        from services.export_service import ExportService
+        from services.family_service import FamilyService
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            raise click.ClickException(f'用户不存在: {email}')
+        family_id = FamilyService.current_id(user.id)
+        if output.endswith('.zip'):
+            chunks = ExportService.iter_zip(family_id, fmt, app.static_folder if media else None)
+            with open(output, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                for text in ExportService.iter_text(family_id, entity, fmt):
+                    f.write(text)
+        click.echo(f'已导出到 {output}（{os.path.getsize(output) / 1024:.0f} KB）')
+
+    @app.cli.command('import-events')
+    @click.argument('email')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'json', 'jsonl']), default=None, help='默认按扩展名判断')
+    @click.option('--tz', 'source_tz', default='Asia/Shanghai', show_default=True, help='文件中不带时区的时间所属时区')
+    @click.option('--batch-size', type=int, default=5000, show_default=True)
+    @click.option('--dry-run', is_flag=True, help='只校验和统计，不写入')
+    def import_events(email, path, fmt, source_tz, batch_size, dry_run):
+        """从其他育儿应用导出的 CSV / JSON / JSONL 批量导入喂奶和换尿布记录"""
+        from services.baby_service import BabyService
+        from services.import_service import EventImportService, RowError
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            raise click.ClickException(f'用户不存在: {email}')
+        fmt = fmt or EventImportService.detect_format(path)
+        if fmt is None:
+            raise click.ClickException('无法从扩展名判断格式，请指定 --format')
+
+        def progress(report):
+            click.echo(f"已读取 {report['read']} 行：新增 {report['inserted']}，重复 {report['duplicates']}，"
+                       f"无效 {report['invalid']}（{report['rows_per_sec']} 行/秒）")
+
+        try:
+            with open(path, 'rb') as f:
+                report = EventImportService.run(user.id, EventImportService.open_text(f), fmt, source_tz,
+                                                batch_size, dry_run, progress, BabyService.current_id(user.id))
+        except RowError as e:
+            raise click.ClickException(str(e))
+        for line, error in report['errors']:
+            click.echo(f'  第 {line} 行：{error}')
+        click.echo(f"完成，用时 {report['seconds']} 秒{'（未写入）' if dry_run else ''}")
+
+    @app.cli.command('startup-report')
+    def startup_report():
+        """打印本进程冷启动各阶段耗时"""
+        for name, seconds in app.extensions['startup_timings'].items():
+            click.echo(f'{name:<12}{seconds * 1000:>10.1f} ms')
+
+
 def _register_blueprints(app):
     """注册蓝图"""
     app.register_blueprint(main_bp)
@@ -111,6 +237,8 @@ def _register_blueprints(app):
     app.register_blueprint(ai_bp)
     app.register_blueprint(profile_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(import_bp)
 
 
 app = create_app()
@@ -0,0 +1,175 @@
+"""
+AI 接口压测：并发请求 /api/ai/chat、/api/ai/chat/stream、/api/ai/analyze、/api/ai/health，
+报告 p50/p95/p99、首包时间（TTFT）、缓存命中率和客户端排队等待。
+
+默认在进程内启动应用（临时 SQLite）并可同时启动替身 LLM 服务，不依赖 GPU 或网络：
+    python benchmarks/ai_bench.py --backend ollama --fake-llm --concurrency 8 --requests 200
+
+压测已在运行的服务：
+    python benchmarks/ai_bench.py --url http://127.0.0.1:9000
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import HTTPClient, print_table, start_app_server, summarize  # noqa: E402
+import fake_llm_server  # noqa: E402
+
+QUESTIONS = [
+    '宝宝夜里哭闹怎么办？',
+    '宝宝不睡觉怎么哄睡？',
+    '宝宝奶量多少合适？',
+    '宝宝发烧了怎么办？',
+    '宝宝体重增长慢正常吗？',
+    '如何给宝宝建立安全感？',
+]
+
+ENDPOINTS = {
+    'chat': ('POST', '/api/ai/chat'),
+    'stream': ('POST', '/api/ai/chat/stream'),
+    'analyze': ('POST', '/api/ai/analyze'),
+    'health': ('POST', '/api/ai/health'),
+}
+
+
+class EndpointResult:
+    """单个接口的压测结果"""
+
+    def __init__(self):
+        self.latencies = []
+        self.ttfts = []
+        self.queue_waits = []
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_known = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, queue_wait, ttft=None, cached=None, error=False):
+        with self._lock:
+            self.latencies.append(latency)
+            self.queue_waits.append(queue_wait)
+            if ttft is not None:
+                self.ttfts.append(ttft)
+            if cached is not None:
+                self.cache_known += 1
+                self.cache_hits += int(bool(cached))
+            if error:
+                self.errors += 1
+
+    def report(self, wall_time: float) -> dict:
+        stats = summarize(self.latencies)
+        stats['rps'] = round(len(self.latencies) / wall_time, 2) if wall_time else 0.0
+        stats['errors'] = self.errors
+        stats['ttft_p50_ms'] = summarize(self.ttfts)['p50_ms'] if self.ttfts else ''
+        stats['ttft_p95_ms'] = summarize(self.ttfts)['p95_ms'] if self.ttfts else ''
+        stats['cache_hit'] = round(self.cache_hits / self.cache_known, 3) if self.cache_known else ''
+        waits = summarize(self.queue_waits)
+        stats['queue_p50_ms'] = waits['p50_ms']
+        stats['queue_p95_ms'] = waits['p95_ms']
+        return stats
+
+
+def _call(client: HTTPClient, name: str, index: int, submitted: float, result: EndpointResult) -> None:
+    started = time.perf_counter()
+    queue_wait = started - submitted
+    method, path = ENDPOINTS[name]
+    body = {'question': QUESTIONS[index % len(QUESTIONS)]} if name in ('chat', 'stream') else {}
+    try:
+        status, resp = client.request(method, path, json_body=body)
+        with resp:
+            if name == 'stream':
+                ttft = None
+                for line in resp:
+                    if ttft is None and line.startswith(b'data:'):
+                        ttft = time.perf_counter() - started
+                result.record(time.perf_counter() - started, queue_wait, ttft=ttft, error=status != 200)
+                return
+            payload = json.loads(resp.read() or b'{}')
+        latency = time.perf_counter() - started
+        cached = None
+        if name == 'analyze':
+            cached = payload.get('cached')
+        elif name == 'chat':
+            cached = (payload.get('answer') or '').startswith('[缓存回答]')
+        result.record(latency, queue_wait, cached=cached, error=status != 200 or not payload.get('success'))
+    except Exception:
+        result.record(time.perf_counter() - started, queue_wait, error=True)
+
+
+def run_endpoint(client: HTTPClient, name: str, requests: int, concurrency: int) -> dict:
+    result = EndpointResult()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(requests):
+            pool.submit(_call, client, name, i, time.perf_counter(), result)
+    return result.report(time.perf_counter() - t0)
+
+
+def seed_moments(client: HTTPClient, count: int) -> None:
+    for i in range(count):
+        client.fetch('POST', '/moments/create', form={'content': f'压测时光 {i}：宝宝今天很开心，吃奶很好'})
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='AI 接口压测')
+    parser.add_argument('--url', help='压测已运行的服务；不填则在进程内启动应用')
+    parser.add_argument('--backend', default='mock', help='进程内应用使用的 AI_MODEL_TYPE')
+    parser.add_argument('--fake-llm', action='store_true', help='同时启动替身 LLM 服务并让应用指向它')
+    parser.add_argument('--tokens-per-sec', type=float, default=200)
+    parser.add_argument('--latency', default='fixed:0.05')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='每个接口的请求数')
+    parser.add_argument('--endpoints', default='chat,stream,analyze,health')
+    parser.add_argument('--seed-moments', type=int, default=5)
+    parser.add_argument('--email', default='bench@example.com')
+    parser.add_argument('--password', default='bench-password')
+    parser.add_argument('--json', dest='json_out', help='把结果写入 JSON 文件')
+    return parser
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    base_url = args.url
+    fake = None
+    if not base_url:
+        env = {'AI_MODEL_TYPE': args.backend, 'AI_DIGEST_DEBOUNCE_SECONDS': '0.5'}
+        if args.fake_llm:
+            fake, fake_url = fake_llm_server.start_in_thread(fake_llm_server.FakeLLMConfig(
+                tokens_per_sec=args.tokens_per_sec, latency=args.latency,
+                failure_rate=args.failure_rate, hang_rate=args.hang_rate, hang_seconds=5))
+            env.update({'OLLAMA_BASE_URL': fake_url, 'OPENAI_BASE_URL': fake_url + '/v1', 'OPENAI_API_KEY': 'fake'})
+        _, base_url = start_app_server(env)
+
+    client = HTTPClient(base_url)
+    client.login(args.email, args.password)
+    seed_moments(client, args.seed_moments)
+
+    results = {}
+    for name in [e.strip() for e in args.endpoints.split(',') if e.strip()]:
+        if name not in ENDPOINTS:
+            print(f'跳过未知接口：{name}', file=sys.stderr)
+            continue
+        results[name] = run_endpoint(client, name, args.requests, args.concurrency)
+
+    print(f'target={base_url} backend={args.backend if not args.url else "remote"} '
+          f'concurrency={args.concurrency} requests/endpoint={args.requests}')
+    print_table(results.items(), ['rps', 'p50_ms', 'p95_ms', 'p99_ms', 'ttft_p50_ms', 'ttft_p95_ms',
+                                  'cache_hit', 'queue_p95_ms', 'errors'])
+    if fake is not None:
+        print(f'fake LLM: requests={fake.RequestHandlerClass.config.requests} '
+              f'failures={fake.RequestHandlerClass.config.failures}')
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
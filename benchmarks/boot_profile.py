@@ -0,0 +1,161 @@
+"""
+worker 启动剖析：用 `python -X importtime` 测量导入 app 的耗时和内存，
+检查重量级依赖没有在启动时被导入，并与基线比较。
+
+    python benchmarks/boot_profile.py                    # 与基线比较，超出预算时退出码为 1
+    python benchmarks/boot_profile.py --update-baseline  # 更新基线
+    python benchmarks/boot_profile.py --top 15           # 列出最慢的导入
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boot_baseline.json')
+
+# 这些模块只应在首次使用时导入
+FORBIDDEN_AT_BOOT = ['PIL', 'cv2', 'openai', 'requests', 'alembic', 'numpy']
+
+CHILD_CODE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import app
+elapsed = time.perf_counter() - t0
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+boot_modules = sorted(m for m in sys.modules if '.' not in m)
+extra = {}
+for name in sys.argv[1:]:
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        __import__(name)
+        extra[name] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    except ImportError:
+        extra[name] = None
+print(json.dumps({
+    'wall_ms': elapsed * 1000,
+    'rss_kb': rss_kb,
+    'modules': boot_modules,
+    'startup': {k: v * 1000 for k, v in app.app.extensions.get('startup_timings', {}).items()},
+    'preload_rss_kb': extra,
+}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """解析 -X importtime 输出，返回 {模块: (自身us, 累计us, 深度)}"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line.split(':', 1)[1].split('|')
+        self_us, cum_us, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(raw_name) - len(raw_name.lstrip(' ')) - 1) // 2
+        result[raw_name.strip()] = (self_us, cum_us, depth)
+    return result
+
+
+def children_of(imports, parent: str):
+    """顶层模块 parent（深度 0）直接导入的模块 {模块: 累计us}
+
+    -X importtime 按完成顺序输出，子模块在父模块之前：parent 那一行之前、
+    上一个顶层模块之后、深度为 1 的行就是它的直接子模块。
+    """
+    children = {}
+    for name, (_, cum_us, depth) in imports.items():
+        if name == parent:
+            return children
+        if depth == 0:
+            children = {}
+        elif depth == 1:
+            children[name] = cum_us
+    return {}
+
+
+def run_once(preload_modules):
+    env = dict(os.environ)
+    env.setdefault('FLASK_ENV', 'production')
+    env.setdefault('SCHEMA_CHECK', 'off')
+    env.setdefault('SECRET_KEY', 'boot-profile')
+    if 'DATABASE_URL' not in env:
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'boot_profile.db')
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_CODE, *preload_modules],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f'导入 app 失败：\n{proc.stderr[-2000:]}')
+    data = json.loads(proc.stdout.strip().splitlines()[-1])
+    data['imports'] = parse_importtime(proc.stderr)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='worker 启动耗时与内存剖析')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help='列出 app 直接导入的模块中累计耗时最高的 N 个')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='相对基线允许的增幅')
+    parser.add_argument('--budget-ms', type=float, help='导入耗时硬性预算（毫秒），覆盖基线')
+    parser.add_argument('--preload', default='requests,openai,PIL.Image,cv2',
+                        help='额外测量这些依赖被预加载时的内存增量')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    preload_modules = [m for m in args.preload.split(',') if m]
+    runs = [run_once(preload_modules) for _ in range(max(1, args.runs))]
+    wall_ms = statistics.median(r['wall_ms'] for r in runs)
+    rss_mb = statistics.median(r['rss_kb'] for r in runs) / 1024
+    last = runs[-1]
+
+    print(f'import app: {wall_ms:.1f} ms (median of {len(runs)})  peak RSS: {rss_mb:.1f} MB')
+    print('create_app phases: ' + ' '.join(f'{k}={v:.1f}ms' for k, v in last['startup'].items()))
+
+    # 解析后 app 本身的深度为 0，它直接导入的模块深度为 1
+    top_level = [(name, cum) for name, cum in children_of(last['imports'], 'app').items()
+                 if name not in preload_modules]
+    top_level.sort(key=lambda x: -x[1])
+    print('\nslowest imports made by app:')
+    for name, cum in top_level[:args.top]:
+        print(f'  {name:<40}{cum / 1000:>10.1f} ms')
+
+    print('\npreload RSS cost per module (MB):')
+    for name, kb in last['preload_rss_kb'].items():
+        print(f'  {name:<40}{"not installed" if kb is None else f"{kb / 1024:>10.1f}"}')
+
+    failures = []
+    leaked = [m for m in FORBIDDEN_AT_BOOT if m in last['modules']]
+    if leaked:
+        failures.append(f'启动时导入了重量级依赖：{", ".join(leaked)}')
+
+    result = {'import_ms': round(wall_ms, 1), 'rss_mb': round(rss_mb, 1)}
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f'\n基线已更新：{BASELINE_PATH}')
+    else:
+        budget_ms = args.budget_ms
+        rss_budget = None
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            if budget_ms is None:
+                budget_ms = baseline['import_ms'] * (1 + args.tolerance)
+            rss_budget = baseline['rss_mb'] * (1 + args.tolerance)
+            print(f'\nbaseline: import {baseline["import_ms"]} ms, RSS {baseline["rss_mb"]} MB')
+        if budget_ms is not None and wall_ms > budget_ms:
+            failures.append(f'导入耗时 {wall_ms:.1f} ms 超出预算 {budget_ms:.1f} ms')
+        if rss_budget is not None and rss_mb > rss_budget:
+            failures.append(f'内存 {rss_mb:.1f} MB 超出预算 {rss_budget:.1f} MB')
+
+    for msg in failures:
+        print('FAIL: ' + msg)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
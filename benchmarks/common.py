@@ -0,0 +1,150 @@
+"""
+压测公共工具：统计分位数、带 Cookie 的 HTTP 客户端、进程内启动应用
+"""
+import http.cookiejar
+import json
+import math
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """汇总延迟（秒）为毫秒统计"""
+    if not latencies:
+        return {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'mean_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+
+def print_table(rows: Iterable[Tuple[str, dict]], columns: List[str]) -> None:
+    """打印对齐的结果表"""
+    rows = list(rows)
+    name_w = max([len('name')] + [len(r[0]) for r in rows])
+    header = 'name'.ljust(name_w) + ''.join(c.rjust(14) for c in columns)
+    print(header)
+    print('-' * len(header))
+    for name, stats in rows:
+        cells = ''
+        for c in columns:
+            v = stats.get(c, '')
+            cells += (f'{v:.2f}' if isinstance(v, float) else str(v)).rjust(14)
+        print(name.ljust(name_w) + cells)
+
+
+class HTTPClient:
+    """带 Cookie 会话的简单 HTTP 客户端（线程安全）"""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def request(self, method: str, path: str, json_body=None, form=None, files=None, headers=None):
+        """发起请求，返回 (状态码, 响应对象)；调用方负责读取正文
+
+        files: {字段名: (文件名, 内容, MIME 类型)}，与 form 一起按 multipart 编码
+        """
+        data = None
+        headers = dict(headers or {})
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif files:
+            data, headers['Content-Type'] = encode_multipart(form or {}, files)
+        elif form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            resp = self.opener.open(req, timeout=self.timeout)
+            return resp.status, resp
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc
+
+    def fetch(self, method: str, path: str, **kwargs) -> Tuple[int, bytes]:
+        status, resp = self.request(method, path, **kwargs)
+        with resp:
+            return status, resp.read()
+
+    def login(self, email: str, password: str) -> None:
+        """注册（已存在则忽略）并登录"""
+        self.fetch('POST', '/register', form={'email': email, 'password': password, 'password2': password})
+        self.fetch('POST', '/login', form={'email': email, 'password': password})
+
+
+def encode_multipart(form: dict, files: dict) -> Tuple[bytes, str]:
+    """把表单字段和文件编码为 multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in form.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, mimetype) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: {mimetype}\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def make_temp_database_url(prefix: str = 'bench') -> str:
+    """生成临时 SQLite 数据库 URL"""
+    fd, path = tempfile.mkstemp(prefix=f'{prefix}_', suffix='.db')
+    os.close(fd)
+    os.remove(path)
+    return f'sqlite:///{path}'
+
+
+def start_app_server(env: Optional[Dict[str, str]] = None, host: str = '127.0.0.1') -> Tuple[object, str]:
+    """在当前进程的后台线程中启动应用，返回 (server, base_url)
+
+    环境变量必须在导入 app 之前设置，因此只能调用一次。
+    """
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ.setdefault('SECRET_KEY', 'bench-secret')
+    os.environ.setdefault('SCHEMA_CHECK', 'off')
+    # 压测客户端都从本机登录大量用户，默认关闭登录限流
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+    for k, v in (env or {}).items():
+        os.environ[k] = v
+    if 'DATABASE_URL' not in os.environ:
+        os.environ['DATABASE_URL'] = make_temp_database_url()
+
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+    from utils.schema import bootstrap_schema
+
+    with app.app_context():
+        bootstrap_schema()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(host, 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_port}'
+
@@ -0,0 +1,153 @@
+"""
+数据库并发写入压测：多个进程（模拟 gunicorn worker）× 多线程同时读写事件表，
+报告吞吐、p50/p95/p99 和 `database is locked` 等错误数。
+
+    python benchmarks/db_concurrency.py                        # 临时 SQLite，使用 config.py 中的调优参数
+    python benchmarks/db_concurrency.py --legacy               # 对照组：回滚日志、FULL 同步、无 mmap
+    python benchmarks/db_concurrency.py --database-url postgresql://...   # 压测 PostgreSQL
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_temp_database_url, print_table, summarize  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LEGACY_SQLITE_ENV = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_BUSY_TIMEOUT_MS': '5000',
+    'SQLITE_MMAP_SIZE': '0',
+}
+
+
+def _prepare_env(database_url: str, extra: dict) -> None:
+    os.environ.update({'FLASK_ENV': 'production', 'SECRET_KEY': 'bench-secret',
+                       'SCHEMA_CHECK': 'off', 'DATABASE_URL': database_url})
+    os.environ.update(extra)
+    sys.path.insert(0, ROOT)
+
+
+def setup_database(database_url: str, extra: dict, users: int) -> None:
+    _prepare_env(database_url, extra)
+    from app import app
+    from models import db, User
+    from utils.schema import bootstrap_schema
+
+    with app.app_context():
+        bootstrap_schema()
+        for i in range(users):
+            email = f'dbbench{i}@example.com'
+            if not User.query.filter_by(email=email).first():
+                user = User(email=email)
+                user.set_password('bench-password')
+                db.session.add(user)
+        db.session.commit()
+
+
+def worker_process(database_url, extra, threads, ops, read_ratio, user_ids, queue):
+    _prepare_env(database_url, extra)
+    import threading
+    from app import app
+    from models import db
+    from services.event_service import EventService
+
+    latencies, errors = [], {}
+    lock = threading.Lock()
+
+    def run(thread_index):
+        local_lat, local_err = [], {}
+        for i in range(ops):
+            user_id = user_ids[(thread_index + i) % len(user_ids)]
+            started = time.perf_counter()
+            try:
+                with app.app_context():
+                    EventService.get_last_event(user_id, 'feed')
+                    if (i % 100) >= read_ratio * 100:
+                        EventService.create_event(user_id, 'feed', amount_ml=120, note='bench')
+                local_lat.append(time.perf_counter() - started)
+            except Exception as exc:
+                key = str(getattr(exc, 'orig', exc)).splitlines()[0][:60]
+                local_err[key] = local_err.get(key, 0) + 1
+                with app.app_context():
+                    db.session.rollback()
+        with lock:
+            latencies.extend(local_lat)
+            for k, v in local_err.items():
+                errors[k] = errors.get(k, 0) + v
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    queue.put((latencies, errors))
+
+
+def run_benchmark(database_url, extra, workers, threads, ops, read_ratio, users):
+    ctx = multiprocessing.get_context('spawn')
+    # 建表在独立进程中完成，避免初始化本身与压测争锁
+    setup = ctx.Process(target=setup_database, args=(database_url, extra, users))
+    setup.start()
+    setup.join()
+
+    user_ids = list(range(1, users + 1))
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=worker_process,
+                         args=(database_url, extra, threads, ops, read_ratio, user_ids, queue))
+             for _ in range(workers)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    latencies, errors = [], {}
+    for _ in procs:
+        lat, err = queue.get()
+        latencies.extend(lat)
+        for k, v in err.items():
+            errors[k] = errors.get(k, 0) + v
+    wall = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+
+    stats = summarize(latencies)
+    stats['ops_per_sec'] = round(len(latencies) / wall, 2) if wall else 0.0
+    stats['errors'] = sum(errors.values())
+    return stats, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库并发读写压测')
+    parser.add_argument('--database-url', help='默认使用临时 SQLite 文件')
+    parser.add_argument('--legacy', action='store_true', help='SQLite 使用调优前的默认参数作对照')
+    parser.add_argument('--compare', action='store_true', help='SQLite 下依次运行对照组和调优组')
+    parser.add_argument('--workers', type=int, default=2, help='进程数（模拟 gunicorn worker）')
+    parser.add_argument('--threads', type=int, default=4, help='每个进程的线程数')
+    parser.add_argument('--ops', type=int, default=200, help='每个线程的操作数')
+    parser.add_argument('--read-ratio', type=float, default=0.5, help='只读操作占比')
+    parser.add_argument('--users', type=int, default=4)
+    args = parser.parse_args()
+
+    variants = [('legacy', LEGACY_SQLITE_ENV), ('tuned', {})] if args.compare else \
+        [('legacy' if args.legacy else 'tuned', LEGACY_SQLITE_ENV if args.legacy else {})]
+    rows, all_errors = [], {}
+    for name, extra in variants:
+        database_url = args.database_url or make_temp_database_url('dbbench')
+        stats, errors = run_benchmark(database_url, extra, args.workers, args.threads,
+                                      args.ops, args.read_ratio, args.users)
+        rows.append((name, stats))
+        all_errors[name] = errors
+
+    print(f'workers={args.workers} threads={args.threads} ops/thread={args.ops} read_ratio={args.read_ratio}')
+    print_table(rows, ['ops_per_sec', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'errors'])
+    for name, errors in all_errors.items():
+        for message, count in errors.items():
+            print(f'  [{name}] {count} x {message}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+索引回归检查：对热点查询执行 EXPLAIN，确认命中预期的复合索引且不需要额外排序。
+
+    python benchmarks/explain_check.py                                  # 临时 SQLite（按模型建表）
+    python benchmarks/explain_check.py --database-url sqlite:///copy.db  # 检查已迁移的数据库
+    python benchmarks/explain_check.py --database-url postgresql://...
+
+任一查询未命中索引或出现排序步骤时退出码为 1。
+"""
+import argparse
+import os
+import sys
+from contextlib import contextmanager
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_temp_database_url  # noqa: E402
+
+
+def build_checks(Event, Moment, now):
+    """(名称, 查询语句, 可接受的索引)；查询形状与视图和服务中的写法一致"""
+    from sqlalchemy import func, select, tuple_
+    from models import ChangeLog
+
+    def events(*filters):
+        return select(Event).where(Event.family_id == 1, Event.baby_id == 1, *filters)
+
+    def moments(*filters):
+        return select(Moment).where(Moment.family_id == 1, Moment.baby_id == 1, *filters)
+
+    return [
+        ('last_feed', events(Event.type == 'feed').order_by(Event.timestamp.desc()).limit(1),
+         ['idx_event_family_baby_type_ts']),
+        ('feed_series', events(Event.type == 'feed').order_by(Event.timestamp.desc()).limit(30),
+         ['idx_event_family_baby_type_ts']),
+        ('diaper_series', events(Event.type == 'diaper', Event.timestamp >= now - timedelta(days=14))
+         .order_by(Event.timestamp.asc()), ['idx_event_family_baby_type_ts']),
+        ('history_page', events().order_by(Event.timestamp.desc(), Event.id.desc()).limit(101),
+         ['idx_event_family_baby_ts']),
+        ('history_cursor', events(Event.type == 'feed', tuple_(Event.timestamp, Event.id) < (now, 500),
+                                  Event.timestamp >= now - timedelta(days=30))
+         .order_by(Event.timestamp.desc(), Event.id.desc()).limit(101), ['idx_event_family_baby_type_ts']),
+        ('feeding_summary', select(func.count(Event.id), func.sum(Event.amount_ml))
+         .where(Event.family_id == 1, Event.baby_id == 1, Event.timestamp >= now - timedelta(days=7)),
+         ['idx_event_family_baby_ts', 'idx_event_family_baby_type_ts']),
+        ('moments_feed', moments().order_by(Moment.timestamp.desc()).limit(10).offset(10),
+         ['idx_moment_family_baby_ts']),
+        ('moments_cursor', moments(tuple_(Moment.timestamp, Moment.id) < (now, 500))
+         .order_by(Moment.timestamp.desc(), Moment.id.desc()).limit(11), ['idx_moment_family_baby_ts']),
+        ('moments_favorites', moments(Moment.is_favorite == True)  # noqa: E712
+         .order_by(Moment.timestamp.desc(), Moment.id.desc()).limit(11), ['idx_moment_family_baby_favorite_ts']),
+        ('moment_neighbour', moments(Moment.timestamp > now - timedelta(days=3))
+         .order_by(Moment.timestamp.asc()).limit(1), ['idx_moment_family_baby_ts']),
+        # SQLite 为唯一约束自动建的索引按声明顺序编号
+        ('changes_since', select(ChangeLog).where(ChangeLog.family_id == 1, ChangeLog.revision > 100,
+                                                  ChangeLog.revision <= 200, ChangeLog.entity.in_(['event', 'moment']))
+         .order_by(ChangeLog.revision.asc()).limit(501),
+         ['uq_change_log_family_revision', 'sqlite_autoindex_change_log_2']),
+    ]
+
+
+@contextmanager
+def explain_mode(engine):
+    """让该引擎上执行的语句都改为返回执行计划"""
+    from sqlalchemy import event
+
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        return prefix + statement, parameters
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute, retval=True)
+    try:
+        yield
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def plan_lines(conn, stmt):
+    rows = conn.execute(stmt).cursor.fetchall()
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def has_sort(lines, dialect_name):
+    if dialect_name == 'sqlite':
+        return any('USE TEMP B-TREE' in line for line in lines)
+    return any(line.strip().lstrip('-> ').startswith(('Sort', 'Incremental Sort')) for line in lines)
+
+
+def seed(db, User, Event, Moment, now, users=3, events_per_user=600, moments_per_user=120):
+    from sqlalchemy import text
+
+    if User.query.count():
+        return
+    for u in range(users):
+        user = User(email=f'explain{u}@example.com')
+        user.set_password('explain')
+        db.session.add(user)
+        db.session.flush()
+        for i in range(events_per_user):
+            db.session.add(Event(user_id=user.id, type='feed' if i % 3 else 'diaper', amount_ml=120,
+                                 timestamp=now - timedelta(minutes=45 * i)))
+        for i in range(moments_per_user):
+            db.session.add(Moment(user_id=user.id, content=f'moment {i}', is_favorite=(i % 15 == 0),
+                                  timestamp=now - timedelta(hours=7 * i)))
+    db.session.commit()
+    # 收藏部分索引与完整索引的等值前缀相同，没有统计信息时 SQLite 按索引创建顺序二选一
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点查询执行计划检查')
+    parser.add_argument('--database-url', help='默认创建临时 SQLite 并写入样例数据')
+    parser.add_argument('--verbose', action='store_true', help='打印完整执行计划')
+    args = parser.parse_args()
+
+    os.environ.update({'FLASK_ENV': 'production', 'SECRET_KEY': 'explain', 'SCHEMA_CHECK': 'off',
+                       'DATABASE_URL': args.database_url or make_temp_database_url('explain')})
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from sqlalchemy import text
+    from app import app
+    from models import db, User, Event, Moment
+    from utils.schema import bootstrap_schema
+    from utils.time_utils import beijing_now
+
+    failures = 0
+    with app.app_context():
+        now = beijing_now()
+        if not args.database_url:
+            bootstrap_schema()
+            seed(db, User, Event, Moment, now)
+        engine = db.engine
+        with engine.connect() as conn:
+            if engine.dialect.name == 'postgresql':
+                # 样例数据量小，禁用顺序扫描才能看出索引是否可用
+                conn.execute(text('SET enable_seqscan = off'))
+            with explain_mode(engine):
+                for name, stmt, expected in build_checks(Event, Moment, now):
+                    lines = plan_lines(conn, stmt)
+                    plan = '\n'.join(lines)
+                    used = next((idx for idx in expected if idx in plan), None)
+                    sorted_ = has_sort(lines, engine.dialect.name)
+                    ok = used is not None and not sorted_
+                    failures += not ok
+                    detail = used or f'expected {"/".join(expected)}'
+                    print(f'{"ok  " if ok else "FAIL"} {name:<20} {detail}{"  + sort" if sorted_ else ""}')
+                    if args.verbose or not ok:
+                        for line in lines:
+                            print(f'       {line}')
+
+        inspector = db.inspect(engine)
+        for table in ('event', 'moment'):
+            names = sorted(i['name'] for i in inspector.get_indexes(table))
+            print(f'{table} indexes ({len(names)}): {", ".join(names)}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+本地替身 LLM 服务：兼容 Ollama 与 OpenAI 协议，无需 GPU 或网络。
+可配置出词速率、首包延迟分布和故障注入，用于测量 AI 路径的性能。
+
+用法：
+    python benchmarks/fake_llm_server.py --port 11434 --tokens-per-sec 30 \\
+        --latency lognormal:-1.5,0.5 --failure-rate 0.05
+
+然后以 AI_MODEL_TYPE=ollama OLLAMA_BASE_URL=http://127.0.0.1:11434 启动应用，
+或 AI_MODEL_TYPE=openai OPENAI_BASE_URL=http://127.0.0.1:11434/v1 OPENAI_API_KEY=fake。
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = "建议保持规律作息，注意观察宝宝的精神状态和进食情况，如有异常及时咨询儿科医生。"
+
+
+class LatencyDistribution:
+    """首包延迟分布：fixed:秒 / uniform:下限,上限 / lognormal:mu,sigma"""
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',') if p] or [0.0]
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f'未知的延迟分布：{spec}')
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return random.uniform(self.params[0], self.params[1])
+        return random.lognormvariate(self.params[0], self.params[1])
+
+
+class FakeLLMConfig:
+    """替身服务运行参数"""
+
+    def __init__(self, tokens_per_sec: float = 50, latency: str = 'fixed:0.2', failure_rate: float = 0.0,
+                 failure_status: int = 500, hang_rate: float = 0.0, hang_seconds: float = 30,
+                 answer: str = DEFAULT_ANSWER):
+        self.tokens_per_sec = tokens_per_sec
+        self.latency = LatencyDistribution(latency)
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.answer = answer
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def tokens(self):
+        # 中文按字切分，近似真实模型的出词粒度
+        return list(self.answer)
+
+    def count(self, failed: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.failures += 1
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config: FakeLLMConfig = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b'{}'
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+    def _inject_fault(self) -> bool:
+        """按配置注入故障；返回 True 表示已处理完请求"""
+        cfg = self.config
+        roll = random.random()
+        if roll < cfg.failure_rate:
+            cfg.count(failed=True)
+            self._send_json(cfg.failure_status, {'error': 'injected failure'})
+            return True
+        if roll < cfg.failure_rate + cfg.hang_rate:
+            cfg.count(failed=True)
+            time.sleep(cfg.hang_seconds)
+            self._send_json(504, {'error': 'injected hang'})
+            return True
+        cfg.count()
+        time.sleep(max(0.0, cfg.latency.sample()))
+        return False
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.config.tokens_per_sec if self.config.tokens_per_sec > 0 else 0.0
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json(200, {'models': [{'name': 'fake:latest'}]})
+        elif self.path == '/v1/models':
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'fake', 'object': 'model', 'owned_by': 'bench'}]})
+        elif self.path == '/stats':
+            cfg = self.config
+            self._send_json(200, {'requests': cfg.requests, 'failures': cfg.failures})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        body = self._read_json()
+        if self.path == '/api/generate':
+            self._ollama_generate(body)
+        elif self.path == '/v1/chat/completions':
+            self._openai_chat(body)
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def _ollama_generate(self, body: dict) -> None:
+        if self._inject_fault():
+            return
+        tokens = self.config.tokens()
+        delay = self._token_delay()
+        model = body.get('model', 'fake')
+        if not body.get('stream', True):
+            time.sleep(delay * len(tokens))
+            self._send_json(200, {'model': model, 'response': ''.join(tokens), 'done': True})
+            return
+        self._start_stream('application/x-ndjson')
+        for tok in tokens:
+            time.sleep(delay)
+            self._write_chunk(json.dumps({'model': model, 'response': tok, 'done': False}, ensure_ascii=False).encode() + b'\n')
+        self._write_chunk(json.dumps({'model': model, 'response': '', 'done': True}).encode() + b'\n')
+        self._end_stream()
+
+    def _openai_chat(self, body: dict) -> None:
+        if self._inject_fault():
+            return
+        tokens = self.config.tokens()
+        delay = self._token_delay()
+        model = body.get('model', 'fake')
+        created = int(time.time())
+        if not body.get('stream'):
+            time.sleep(delay * len(tokens))
+            self._send_json(200, {
+                'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': ''.join(tokens)}}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(tokens), 'total_tokens': len(tokens)},
+            })
+            return
+        self._start_stream('text/event-stream')
+        for tok in tokens:
+            time.sleep(delay)
+            chunk = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                     'choices': [{'index': 0, 'delta': {'content': tok}, 'finish_reason': None}]}
+            self._write_chunk(f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n'.encode())
+        self._write_chunk(b'data: [DONE]\n\n')
+        self._end_stream()
+
+
+def make_server(config: FakeLLMConfig, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """创建替身服务（port=0 时自动分配端口）"""
+    handler = type('BoundFakeLLMHandler', (FakeLLMHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(config: FakeLLMConfig, host: str = '127.0.0.1', port: int = 0):
+    """在后台线程中启动替身服务，返回 (server, base_url)"""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='本地替身 LLM 服务（Ollama / OpenAI 兼容）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--tokens-per-sec', type=float, default=50, help='出词速率，0 表示不限速')
+    parser.add_argument('--latency', default='fixed:0.2', help='首包延迟分布：fixed:s / uniform:a,b / lognormal:mu,sigma')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='立即返回错误的请求比例')
+    parser.add_argument('--failure-status', type=int, default=500)
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='长时间无响应的请求比例（模拟超时）')
+    parser.add_argument('--hang-seconds', type=float, default=30)
+    return parser
+
+
+def config_from_args(args) -> FakeLLMConfig:
+    return FakeLLMConfig(
+        tokens_per_sec=args.tokens_per_sec,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+    )
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    server = make_server(config_from_args(args), args.host, args.port)
+    print(f'fake LLM listening on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+批量导入压测：生成一份其他应用格式的 CSV（英文列名、美式日期、oz 奶量、不带时区），
+导入到临时库并报告每秒行数；再导入一次确认全部被识别为重复。
+
+    python benchmarks/import_bench.py                   # 默认 50000 行
+    python benchmarks/import_bench.py --rows 200000 --batch-size 10000
+    python benchmarks/import_bench.py --database-url postgresql://...
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_temp_database_url  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIN_ROWS_PER_SEC = 10000
+
+
+def write_csv(path: str, rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    ts = datetime.now().replace(microsecond=0) - timedelta(minutes=121 * rows)  # 最后一行仍早于当前时间
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Start Time', 'Activity', 'Amount', 'Unit', 'Diaper Type', 'Notes'])
+        for _ in range(rows):
+            ts += timedelta(minutes=rng.randint(20, 120), seconds=rng.randint(0, 59))
+            stamp = ts.strftime('%m/%d/%Y %I:%M:%S %p')
+            if rng.random() < 0.55:
+                writer.writerow([stamp, 'Bottle', f'{rng.randint(2, 7)}.{rng.randint(0, 9)}', 'oz', '', ''])
+            else:
+                writer.writerow([stamp, 'Diaper', '', '', rng.choice(['Wet', 'Dirty', 'Mixed']), 'imported'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='事件批量导入压测')
+    parser.add_argument('--database-url', help='默认使用临时 SQLite')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--tz', default='America/New_York', help='CSV 中时间所属时区')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.update({'FLASK_ENV': 'production', 'SECRET_KEY': 'bench-secret', 'SCHEMA_CHECK': 'off',
+                       'DATABASE_URL': args.database_url or make_temp_database_url('import')})
+    sys.path.insert(0, ROOT)
+    from app import app
+    from models import db, User
+    from services.import_service import EventImportService
+    from utils.schema import bootstrap_schema
+
+    fd, path = tempfile.mkstemp(prefix='import_', suffix='.csv')
+    os.close(fd)
+    try:
+        write_csv(path, args.rows, args.seed)
+        with app.app_context():
+            bootstrap_schema()
+            user = User.query.filter_by(email='import-bench@example.com').first()
+            if user is None:
+                user = User(email='import-bench@example.com')
+                user.set_password('import-bench')
+                db.session.add(user)
+                db.session.commit()
+
+            results = []
+            for label in ('first', 'repeat'):
+                with open(path, 'rb') as f:
+                    report = EventImportService.run(user.id, EventImportService.open_text(f), 'csv',
+                                                    args.tz, args.batch_size)
+                results.append(report)
+                print(f"{label:<7} read {report['read']:>7}  inserted {report['inserted']:>7}  "
+                      f"duplicates {report['duplicates']:>7}  invalid {report['invalid']:>4}  "
+                      f"{report['seconds']:>6.2f} s  {report['rows_per_sec']:>7} rows/s")
+    finally:
+        os.remove(path)
+
+    first, repeat = results
+    failures = []
+    if first['invalid'] or first['inserted'] != args.rows:
+        failures.append(f"首次导入应写入全部 {args.rows} 行：{first['inserted']} 行写入，{first['invalid']} 行无效")
+    if repeat['inserted']:
+        failures.append(f"重复导入写入了 {repeat['inserted']} 行")
+    if first['rows_per_sec'] < MIN_ROWS_PER_SEC:
+        failures.append(f"吞吐 {first['rows_per_sec']} 行/秒 低于 {MIN_ROWS_PER_SEC}")
+    for failure in failures:
+        print('FAIL:', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+撞库压测：若干攻击线程用随机 IP（X-Forwarded-For）和真实账号高频提交错误密码，
+同时一个正常用户持续访问 /api/last；对比攻击前后正常请求的 p95，确认密码哈希的 CPU 被线程池限住。
+
+    python benchmarks/login_bench.py                           # 默认 16 个攻击线程、20 秒
+    python benchmarks/login_bench.py --hash-workers 16 --hash-queue 0   # 近似不限并发的旧行为，用于对比
+    python benchmarks/login_bench.py --rate-limit               # 同时打开按 IP / 账号限流
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import HTTPClient, print_table, start_app_server, summarize  # noqa: E402
+
+MAX_P95_RATIO = 3.0  # 攻击期间正常请求 p95 不超过攻击前的倍数
+MIN_P95_SLACK_MS = 100.0  # 基线很小时允许的绝对增量
+
+
+def victim_latencies(client: HTTPClient, seconds: float):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        client.fetch('GET', '/api/last')
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='撞库时登录 CPU 隔离压测')
+    parser.add_argument('--attackers', type=int, default=16)
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--hash-workers', type=int, default=1)
+    parser.add_argument('--hash-queue', type=int, default=4)
+    parser.add_argument('--rate-limit', action='store_true')
+    args = parser.parse_args()
+
+    _, base_url = start_app_server({
+        'PROXY_FIX_HOPS': '1',
+        'RATE_LIMIT_ENABLED': 'true' if args.rate_limit else 'false',
+        'PASSWORD_HASH_WORKERS': str(args.hash_workers),
+        'PASSWORD_HASH_QUEUE': str(args.hash_queue),
+    })
+    from app import app
+    from models import db, User
+    from services.password_service import PasswordService
+
+    with app.app_context():
+        password_hash = PasswordService.hash('correct-password')
+        emails = [f'login-bench{i}@example.com' for i in range(args.accounts)]
+        db.session.add_all(User(email=e, password_hash=password_hash) for e in emails)
+        db.session.commit()
+
+    victim = HTTPClient(base_url)
+    victim.fetch('POST', '/login', form={'email': emails[0], 'password': 'correct-password'})
+    baseline = summarize(victim_latencies(victim, min(5.0, args.seconds / 4)))
+
+    stop = threading.Event()
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def attack(seed: int):
+        rng = random.Random(seed)
+        client = HTTPClient(base_url)
+        while not stop.is_set():
+            ip = '.'.join(str(rng.randint(1, 254)) for _ in range(4))
+            status, _ = client.fetch('POST', '/login', form={'email': rng.choice(emails), 'password': 'wrong'},
+                                     headers={'X-Forwarded-For': ip})
+            with lock:
+                outcomes[status] += 1
+
+    threads = [threading.Thread(target=attack, args=(i,), daemon=True) for i in range(args.attackers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    attacked = summarize(victim_latencies(victim, args.seconds))
+    stop.set()
+    for t in threads:
+        t.join(timeout=30)
+    elapsed = time.perf_counter() - started
+
+    print_table([('baseline', baseline), ('under_attack', attacked)], ['count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+    total = sum(outcomes.values())
+    print(f'login attempts {total} ({total / elapsed:.1f}/s): '
+          + ', '.join(f'{code}={n}' for code, n in sorted(outcomes.items())))
+
+    limit = max(baseline['p95_ms'] * MAX_P95_RATIO, baseline['p95_ms'] + MIN_P95_SLACK_MS)
+    if attacked['p95_ms'] > limit:
+        print(f'FAIL: 攻击期间 /api/last p95 {attacked["p95_ms"]} ms 超过 {limit:.1f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+模拟 AI 关键词匹配检查：生成含数百个关键词的规则文件，确认字典树匹配与“长词优先的正则多选分支”
+得分一致，且扫描耗时不随关键词数量增长。
+
+    python benchmarks/mock_ai_check.py                       # 默认 40 / 200 / 800 个关键词
+    python benchmarks/mock_ai_check.py --sizes 100,1000,3000 --prompts 500
+
+任一问题的得分不一致，或最大规模每千字耗时超过最小规模的 --max-growth 倍时退出码为 1。
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.mock_ai import MockRuleEngine  # noqa: E402
+
+# 常用汉字区段里取字拼词，词之间共享前缀（“安全”/“安全感”）的情况自然出现
+CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 400)] + list('abcdefgh')
+
+
+def make_rules(rng: random.Random, keywords: int, per_rule: int = 8) -> dict:
+    words = set()
+    while len(words) < keywords:
+        if words and rng.random() < 0.3:
+            # 在已有关键词后面接字，制造前缀重叠
+            words.add(rng.choice(sorted(words)) + rng.choice(CHARS))
+        else:
+            words.add(''.join(rng.choice(CHARS) for _ in range(rng.randint(2, 5))))
+    words = sorted(words)
+    rng.shuffle(words)
+    rules = [{'id': f'r{i}', 'keywords': words[i:i + per_rule], 'answer': f'answer {i}'}
+             for i in range(0, len(words), per_rule)]
+    return {'rules': rules, 'default': 'default'}
+
+
+def make_prompt(rng: random.Random, words: list, length: int) -> str:
+    parts, size = [], 0
+    while size < length:
+        part = rng.choice(words) if rng.random() < 0.2 else ''.join(rng.choice(CHARS) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.1:
+            part = part.upper()
+        parts.append(part)
+        size += len(part)
+    return ''.join(parts)
+
+
+def reference_scores(data: dict, prompt: str) -> Counter:
+    """原实现：关键词按长度倒序拼成一个忽略大小写的正则，逐个命中计分"""
+    owners = {}
+    for rule in data['rules']:
+        for kw in rule['keywords']:
+            kw = kw.strip().lower()
+            if kw and rule['id'] not in owners.setdefault(kw, []):
+                owners[kw].append(rule['id'])
+    pattern = re.compile('|'.join(map(re.escape, sorted(owners, key=len, reverse=True))), re.IGNORECASE)
+    scores = Counter()
+    for m in pattern.finditer(prompt):
+        for rule_id in owners[m.group().lower()]:
+            scores[rule_id] += 1
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟 AI 关键词匹配检查')
+    parser.add_argument('--sizes', default='40,200,800', help='逗号分隔的关键词数量')
+    parser.add_argument('--prompts', type=int, default=300, help='每种规模比对的问题数')
+    parser.add_argument('--length', type=int, default=200, help='每个问题的字数')
+    parser.add_argument('--max-growth', type=float, default=2.0, help='最大规模相对最小规模允许的耗时倍数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(',') if s)
+    failures, per_kchar = [], {}
+    print(f'{"keywords":>10}{"mismatch":>10}{"us/kchar":>12}')
+    for size in sizes:
+        rng = random.Random(args.seed + size)
+        data = make_rules(rng, size)
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            path = f.name
+        try:
+            engine = MockRuleEngine.from_file(path)
+        finally:
+            os.remove(path)
+        words = [kw for rule in data['rules'] for kw in rule['keywords']]
+        prompts = [make_prompt(rng, words, args.length) for _ in range(args.prompts)]
+
+        mismatched = sum(engine.score(p) != reference_scores(data, p) for p in prompts[:100])
+        started = time.perf_counter()
+        for p in prompts:
+            engine.score(p)
+        elapsed = time.perf_counter() - started
+        per_kchar[size] = elapsed * 1e6 / (sum(map(len, prompts)) / 1000)
+        print(f'{size:>10}{mismatched:>10}{per_kchar[size]:>12.1f}')
+        if mismatched:
+            failures.append(f'{size} 个关键词时有 {mismatched} 个问题的得分与正则实现不一致')
+
+    smallest, largest = per_kchar[sizes[0]], per_kchar[sizes[-1]]
+    if len(sizes) > 1 and largest > smallest * args.max_growth:
+        failures.append(f'{sizes[-1]} 个关键词时每千字 {largest:.1f}us，超过 {sizes[0]} 个时的 {args.max_growth} 倍')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+页面体积预算检查：渲染各页面，统计 HTML 字节、内联 <script>/<style> 字节和引用的本地 CSS/JS（gzip 后）字节，
+超出 page_budgets.json 中的预算时退出码为 1。
+
+    python benchmarks/page_budget.py
+    python benchmarks/page_budget.py --update-budgets   # 按当前体积加 20% 余量重写预算
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_temp_database_url, print_table  # noqa: E402
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'page_budgets.json')
+INLINE_RE = re.compile(r'<(script|style)(?![^>]*\bsrc=)[^>]*>(.*?)</\1>', re.S)
+LOCAL_ASSET_RE = re.compile(r'<(?:script[^>]+src|link[^>]+href)="(/static/[^"?]+\.(?:css|js))[^"]*"')
+HEADROOM = 1.2
+
+
+def measure(client, static_dir: str, path: str) -> dict:
+    resp = client.get(path)
+    html = resp.get_data()
+    text = html.decode('utf-8')
+    inline = sum(len(m.group(2).encode('utf-8')) for m in INLINE_RE.finditer(text))
+    assets = 0
+    for url in set(LOCAL_ASSET_RE.findall(text)):
+        with open(os.path.join(static_dir, url[len('/static/'):]), 'rb') as f:
+            assets += len(gzip.compress(f.read()))
+    return {'status': resp.status_code, 'html_bytes': len(html), 'html_gz': len(gzip.compress(html)),
+            'inline_bytes': inline, 'assets_gz': assets}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='页面体积预算检查')
+    parser.add_argument('--update-budgets', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.update({'FLASK_ENV': 'production', 'SECRET_KEY': 'budget', 'SCHEMA_CHECK': 'off',
+                       'AI_MODEL_TYPE': 'mock', 'DATABASE_URL': make_temp_database_url('budget')})
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import app
+    from models import db, Moment
+    from utils.schema import bootstrap_schema
+    import datagen
+
+    with app.app_context():
+        bootstrap_schema()
+        datagen.populate(users=1, events=200, moments=30, with_media=False)
+        moment_id = db.session.query(Moment.id).first()[0]
+
+    client = app.test_client()
+    client.post('/login', data={'email': datagen.EMAIL_TEMPLATE.format(0), 'password': datagen.PASSWORD})
+    pages = {
+        'index': '/',
+        'history': '/history',
+        'moments': '/moments',
+        'moment_detail': f'/moments/{moment_id}',
+        'create_moment': '/moments/create',
+        'edit_moment': f'/moments/{moment_id}/edit',
+        'ai': '/ai',
+        'settings': '/settings',
+    }
+    results = {name: measure(client, app.static_folder, path) for name, path in pages.items()}
+    print_table(results.items(), ['status', 'html_bytes', 'html_gz', 'inline_bytes', 'assets_gz'])
+
+    if args.update_budgets:
+        budgets = {name: {k: int(r[k] * HEADROOM) for k in ('html_bytes', 'inline_bytes', 'assets_gz')}
+                   for name, r in results.items()}
+        with open(BUDGETS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(budgets, f, indent=2)
+            f.write('\n')
+        print(f'\n预算已更新：{BUDGETS_PATH}')
+        return
+
+    with open(BUDGETS_PATH, 'r', encoding='utf-8') as f:
+        budgets = json.load(f)
+    failures = []
+    for name, r in results.items():
+        if r['status'] != 200:
+            failures.append(f'{name}: 状态码 {r["status"]}')
+        for key, limit in budgets.get(name, {}).items():
+            if r[key] > limit:
+                failures.append(f'{name}: {key} {r[key]} 超出预算 {limit}')
+    for msg in failures:
+        print('FAIL: ' + msg)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+全链路压测：生成数据后并发跑每个热点场景，报告吞吐和 p50/p95/p99，并与 suite_baseline.json 比较。
+
+    python benchmarks/run_suite.py                                    # 临时 SQLite
+    python benchmarks/run_suite.py --targets sqlite,postgresql://u:p@localhost/bench
+    python benchmarks/run_suite.py --scenarios index,api_last --requests 500
+    python benchmarks/run_suite.py --update-baseline                  # 更新当前数据库类型的基线
+
+基线按数据库类型和场景分组；p95 超出基线或吞吐低于基线 --tolerance 以上时退出码为 1。
+AI 场景固定使用 mock 后端；结束后只删除本次新增、且属于压测数据的媒体文件（占位图和压测用户上传的时光）。
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import HTTPClient, make_temp_database_url, print_table, start_app_server, summarize  # noqa: E402
+import datagen  # noqa: E402
+from scenarios import SCENARIOS  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'suite_baseline.json')
+MOMENTS_DIR = os.path.join(datagen.ROOT, 'static', 'moments')
+COLUMNS = ['count', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'errors']
+
+
+def dialect_of(url: str) -> str:
+    scheme = url.split(':', 1)[0].split('+', 1)[0]
+    return 'postgresql' if scheme.startswith('postgres') else scheme
+
+
+def run_scenario(name, clients, requests_count, concurrency, seed) -> dict:
+    fn = SCENARIOS[name]
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(i):
+        rng = random.Random(seed * 100003 + i)
+        started = time.perf_counter()
+        try:
+            status = fn(clients[i % len(clients)], rng)
+        except Exception as exc:  # 连接错误等同失败请求计入
+            status = repr(exc)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not isinstance(status, int) or status >= 400:
+                errors.append(status)
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_count)))
+    wall = time.perf_counter() - wall
+
+    stats = summarize(latencies)
+    stats['rps'] = round(len(latencies) / wall, 2) if wall else 0.0
+    stats['errors'] = len(errors)
+    if errors:
+        stats['first_error'] = str(errors[0])
+    return stats
+
+
+def run_target(args, database_url: str) -> dict:
+    """在当前进程中针对一个数据库跑完整套场景"""
+    before = set(os.listdir(MOMENTS_DIR)) if os.path.isdir(MOMENTS_DIR) else set()
+    server, base_url = start_app_server({
+        'DATABASE_URL': database_url,
+        'AI_MODEL_TYPE': 'mock',
+        'SQL_PROFILING': 'false',
+        'LOG_LEVEL': 'WARNING',
+    })
+    from app import app
+
+    try:
+        with app.app_context():
+            seeded = datagen.populate(args.users, args.events, args.moments, seed=args.seed)
+        print(f'[{dialect_of(database_url)}] seeded {seeded}', file=sys.stderr)
+
+        clients = []
+        for i in range(args.users):
+            client = HTTPClient(base_url)
+            client.fetch('POST', '/login', form={'email': datagen.EMAIL_TEMPLATE.format(i),
+                                                'password': datagen.PASSWORD})
+            clients.append(client)
+
+        results = {}
+        for name in args.scenarios:
+            # 预热一轮，避免首次模板编译和连接建立计入结果
+            run_scenario(name, clients, min(args.concurrency, args.requests), args.concurrency, args.seed + 1)
+            results[name] = run_scenario(name, clients, args.requests, args.concurrency, args.seed)
+            print(f'[{dialect_of(database_url)}] {name}: {results[name]["rps"]} rps, '
+                  f'p95 {results[name]["p95_ms"]} ms', file=sys.stderr)
+        return results
+    finally:
+        server.shutdown()
+        if os.path.isdir(MOMENTS_DIR):
+            # 媒体目录可能与真实数据共用，按数据库中压测用户的记录认领文件，其他新文件一律不动
+            with app.app_context():
+                owned = datagen.bench_media()
+            for filename in (set(os.listdir(MOMENTS_DIR)) - before) & owned:
+                os.remove(os.path.join(MOMENTS_DIR, filename))
+
+
+def run_in_subprocess(args, database_url: str) -> dict:
+    """应用只能在一个进程中按一个 DATABASE_URL 导入一次，多目标时逐个起子进程"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--database-url', database_url, '--json',
+           '--scenarios', ','.join(args.scenarios), '--requests', str(args.requests),
+           '--concurrency', str(args.concurrency), '--users', str(args.users), '--events', str(args.events),
+           '--moments', str(args.moments), '--seed', str(args.seed)]
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out)[dialect_of(database_url)]
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for dialect, scenarios in results.items():
+        for name, stats in scenarios.items():
+            base = baseline.get(dialect, {}).get(name)
+            if stats['errors']:
+                failures.append(f'{dialect}/{name}: {stats["errors"]} 个请求失败（{stats.get("first_error")}）')
+            if not base:
+                continue
+            if stats['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                failures.append(f'{dialect}/{name}: p95 {stats["p95_ms"]} ms 超出基线 {base["p95_ms"]} ms')
+            if stats['rps'] < base['rps'] * (1 - tolerance):
+                failures.append(f'{dialect}/{name}: 吞吐 {stats["rps"]} rps 低于基线 {base["rps"]} rps')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点接口全链路压测')
+    parser.add_argument('--targets', default='sqlite',
+                        help='逗号分隔：sqlite（临时库）或数据库 URL，多个目标依次在子进程中运行')
+    parser.add_argument('--database-url', help='只压测这一个数据库（在当前进程中运行）')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='逗号分隔的场景名')
+    parser.add_argument('--requests', type=int, default=200, help='每个场景的请求数')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--events', type=int, default=1000, help='每个用户的事件数')
+    parser.add_argument('--moments', type=int, default=200, help='每个用户的时光数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=0.3, help='相对基线允许的退化比例')
+    parser.add_argument('--json', action='store_true', help='只输出 JSON 结果')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    args.scenarios = [s for s in args.scenarios.split(',') if s]
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f'未知场景：{", ".join(unknown)}（可选 {", ".join(SCENARIOS)}）')
+
+    if args.database_url:
+        results = {dialect_of(args.database_url): run_target(args, args.database_url)}
+    else:
+        targets = [make_temp_database_url('suite') if t == 'sqlite' else t
+                   for t in args.targets.split(',') if t]
+        if len(targets) == 1:
+            results = {dialect_of(targets[0]): run_target(args, targets[0])}
+        else:
+            results = {dialect_of(t): run_in_subprocess(args, t) for t in targets}
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False))
+        return
+
+    for dialect, scenarios in results.items():
+        print(f'\n== {dialect} ({args.requests} requests/scenario, concurrency {args.concurrency}) ==')
+        print_table(scenarios.items(), COLUMNS)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        for dialect, scenarios in results.items():
+            baseline[dialect] = {name: {'rps': s['rps'], 'p95_ms': s['p95_ms']} for name, s in scenarios.items()}
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f'\n基线已更新：{BASELINE_PATH}')
+        return
+
+    failures = compare(results, baseline, args.tolerance)
+    for msg in failures:
+        print('FAIL: ' + msg)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+压测场景：每个场景是一次用户操作，对应一个或一组热点接口。
+
+场景函数签名为 fn(client, rng) -> 状态码；client 已登录为某个压测用户。
+"""
+import html
+import io
+import json
+import random
+import re
+import urllib.parse
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict
+
+SEARCH_TERMS = ['翻身', '洗澡', '米糊', '睡', '公园', '疫苗', '小牙', '奶奶']
+HISTORY_NEXT = re.compile(rb'href="(/history\?[^"]*cursor=[^"]*)"')
+QUESTIONS = ['宝宝夜里哭闹怎么办？', '宝宝奶量多少合适？', '宝宝发烧了怎么办？', '宝宝不睡觉怎么哄睡？']
+
+_upload_image = None
+
+
+def _image_bytes() -> bytes:
+    """上传用的小图（首次调用时生成，所有场景共用）"""
+    global _upload_image
+    if _upload_image is None:
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new('RGB', (1280, 960), (120, 170, 210)).save(buf, format='JPEG', quality=85)
+        _upload_image = buf.getvalue()
+    return _upload_image
+
+
+def _get(client, path: str) -> int:
+    return client.fetch('GET', path)[0]
+
+
+def index(client, rng: random.Random) -> int:
+    return _get(client, '/')
+
+
+def api_last(client, rng: random.Random) -> int:
+    return _get(client, '/api/last')
+
+
+def series(client, rng: random.Random) -> int:
+    status = _get(client, f'/api/feed_series?limit={rng.choice([30, 60, 120])}')
+    return max(status, _get(client, f'/api/diaper_series?days={rng.choice([7, 14, 30])}'))
+
+
+def history(client, rng: random.Random) -> int:
+    """打开历史记录，沿页面上“更早的记录”链接往前翻若干页"""
+    path = f'/history?type={rng.choice(["all", "feed", "diaper"])}'
+    status = 200
+    for _ in range(rng.randint(1, 3)):
+        code, body = client.fetch('GET', path)
+        status = max(status, code)
+        match = HISTORY_NEXT.search(body) if code == 200 else None
+        if not match:
+            break
+        path = html.unescape(match.group(1).decode())
+    return status
+
+
+def moments_scroll(client, rng: random.Random) -> int:
+    """模拟下拉浏览：从第 1 页连续加载若干页"""
+    status = 200
+    for page in range(1, rng.randint(2, 5) + 1):
+        status = max(status, _get(client, f'/api/moments/load?page={page}&per_page=10'))
+    return status
+
+
+def moments_fragment(client, rng: random.Random) -> int:
+    """模拟页面内滚动：沿服务端返回的游标连续拉取若干页卡片片段"""
+    status, cursor = 200, ''
+    for _ in range(rng.randint(2, 5)):
+        code, body = client.fetch('GET', '/moments/fragment?' + urllib.parse.urlencode({'cursor': cursor}))
+        status = max(status, code)
+        cursor = json.loads(body).get('next_cursor') if code == 200 else None
+        if not cursor:
+            break
+    return status
+
+
+def search(client, rng: random.Random) -> int:
+    return _get(client, '/api/moments/search?' + urllib.parse.urlencode({'q': rng.choice(SEARCH_TERMS)}))
+
+
+def record_feed(client, rng: random.Random) -> int:
+    status, _ = client.fetch('POST', '/record_feed', form={'amount_ml': str(rng.randint(8, 20) * 10)})
+    return 200 if status in (200, 302) else status
+
+
+def sync_feed(client, rng: random.Random) -> int:
+    """离线发件箱的在线路径：每次记录一个带幂等键的事件，不跳转也不重新渲染首页"""
+    event = {'client_id': uuid.UUID(int=rng.getrandbits(128)).hex, 'type': 'feed',
+             'amount_ml': rng.randint(8, 20) * 10, 'timestamp': datetime.now(timezone.utc).isoformat()}
+    status, _ = client.fetch('POST', '/api/events/sync', json_body={'events': [event]})
+    return status
+
+
+def changes_poll(client, rng: random.Random) -> int:
+    """本地镜像的增量刷新：带上次的版本号轮询，稳定状态下没有变化"""
+    status, body = client.fetch('GET', f'/api/changes?since={getattr(client, "revision", 0)}')
+    if status == 200:
+        client.revision = json.loads(body)['revision']
+    return status
+
+
+def upload(client, rng: random.Random) -> int:
+    status, _ = client.fetch('POST', '/moments/create', form={'content': '压测上传'},
+                             files={'media': ('bench.jpg', _image_bytes(), 'image/jpeg')})
+    return 200 if status in (200, 302) else status
+
+
+def ai_chat(client, rng: random.Random) -> int:
+    return client.fetch('POST', '/api/ai/chat', json_body={'question': rng.choice(QUESTIONS)})[0]
+
+
+def ai_analyze(client, rng: random.Random) -> int:
+    return client.fetch('POST', '/api/ai/analyze', json_body={})[0]
+
+
+SCENARIOS: Dict[str, Callable] = {
+    'index': index,
+    'api_last': api_last,
+    'series': series,
+    'history': history,
+    'moments_scroll': moments_scroll,
+    'moments_fragment': moments_fragment,
+    'search': search,
+    'record_feed': record_feed,
+    'sync_feed': sync_feed,
+    'changes_poll': changes_poll,
+    'upload': upload,
+    'ai_chat': ai_chat,
+    'ai_analyze': ai_analyze,
+}
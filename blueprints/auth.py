@@ -1,14 +1,23 @@
 """
 认证蓝图：注册 / 登录 / 退出
 """
+import math
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import db, User
+from services.baby_service import SESSION_BABY_ID
+from services.password_service import PasswordService, HashBusy
+from utils import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 
 SESSION_USER_ID = 'uid'
 
+def _rejected(template: str, message: str, status: int, retry_after: float):
+	"""限流（429）或哈希排队已满（503）：直接渲染表单页，带 Retry-After"""
+	retry_after = max(1, math.ceil(retry_after))
+	flash(message.format(seconds=retry_after), 'warning')
+	return render_template(template), status, {'Retry-After': str(retry_after)}
+
 @auth_bp.get('/login')
 def login_page():
 	return render_template('login.html')
@@ -20,10 +29,25 @@ def login_submit():
 	if not email or not password:
 		flash('请输入邮箱和密码', 'warning')
 		return redirect(url_for('auth.login_page'))
+	# 哈希之前先按 IP 和账号取令牌，撞库请求不消耗哈希 CPU
+	wait = rate_limit.hit_ip('login_ip') or rate_limit.hit('login_account', email)
+	if wait:
+		return _rejected('login.html', '尝试过于频繁，请 {seconds} 秒后再试', 429, wait)
 	user = User.query.filter_by(email=email).first()
-	if not user or not check_password_hash(user.password_hash, password):
+	try:
+		ok = user is not None and PasswordService.verify(user.password_hash, password)
+	except HashBusy as e:
+		return _rejected('login.html', str(e), 503, 1)
+	if not ok:
 		flash('邮箱或密码错误', 'danger')
 		return redirect(url_for('auth.login_page'))
+	if PasswordService.needs_rehash(user.password_hash):
+		# 哈希参数已调整：趁手里有明文密码时按新参数重新哈希，线程池忙时留到下次登录
+		try:
+			user.password_hash = PasswordService.hash(password)
+			db.session.commit()
+		except HashBusy:
+			pass
 	# 登录
 	session[SESSION_USER_ID] = user.id
 	flash('登录成功', 'success')
@@ -44,13 +68,21 @@ def register_submit():
 	if password != password2:
 		flash('两次输入的密码不一致', 'warning')
 		return redirect(url_for('auth.register_page'))
+	wait = rate_limit.hit_ip('register_ip')
+	if wait:
+		return _rejected('register.html', '注册过于频繁，请 {seconds} 秒后再试', 429, wait)
 	# 唯一性校验
 	if User.query.filter_by(email=email).first():
 		flash('该邮箱已注册', 'warning')
 		return redirect(url_for('auth.login_page'))
 	# 创建
-	u = User(email=email, password_hash=generate_password_hash(password))
+	try:
+		password_hash = PasswordService.hash(password)
+	except HashBusy as e:
+		return _rejected('register.html', str(e), 503, 1)
+	u = User(email=email, password_hash=password_hash)
 	db.session.add(u)
+	# 注册时自动建立的家庭带一个空白宝宝资料，之后可在设置页填写或再添加
 	db.session.commit()
 	flash('注册成功，请登录', 'success')
 	return redirect(url_for('auth.login_page'))
@@ -58,5 +90,6 @@ def register_submit():
 @auth_bp.post('/logout')
 def logout_submit():
 	session.pop(SESSION_USER_ID, None)
+	session.pop(SESSION_BABY_ID, None)
 	flash('您已退出登录', 'info')
 	return redirect(url_for('main.index'))
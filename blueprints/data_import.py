@@ -0,0 +1,35 @@
+"""
+数据导入蓝图
+包含：上传其他育儿应用导出的 CSV / JSON / JSONL，批量导入喂奶和换尿布记录
+"""
+from flask import Blueprint, flash, redirect, request, session, url_for
+from utils.decorators import login_required
+from services.baby_service import BabyService
+from services.import_service import EventImportService, RowError
+
+# 创建蓝图
+import_bp = Blueprint('data_import', __name__)
+
+
+@import_bp.post('/import/events')
+@login_required
+def import_events():
+    """上传文件大小受 MAX_CONTENT_LENGTH 限制；更大的文件用 `flask import-events` 导入"""
+    file = request.files.get('file')
+    fmt = EventImportService.detect_format(file.filename or '') if file else None
+    if fmt is None:
+        flash('请选择 .csv、.json 或 .jsonl 文件', 'warning')
+        return redirect(url_for('profile.settings'))
+    try:
+        report = EventImportService.run(session['uid'], EventImportService.open_text(file.stream), fmt,
+                                        request.form.get('tz') or 'Asia/Shanghai', baby_id=BabyService.current_id())
+    except (RowError, UnicodeDecodeError) as e:
+        flash(f'导入失败：{e}', 'danger')
+        return redirect(url_for('profile.settings'))
+
+    message = f"导入完成：新增 {report['inserted']} 条，跳过重复 {report['duplicates']} 条"
+    if report['invalid']:
+        line, error = report['errors'][0]
+        message += f"，{report['invalid']} 行无效（第 {line} 行：{error}）"
+    flash(message, 'warning' if report['invalid'] else 'success')
+    return redirect(url_for('main.history'))
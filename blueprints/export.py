@@ -0,0 +1,55 @@
+"""
+数据导出蓝图
+包含：事件 / 时光的 CSV、JSONL 下载，以及带媒体文件的 ZIP 归档
+"""
+from flask import Blueprint, Response, current_app, flash, redirect, request, stream_with_context, url_for
+from utils.decorators import login_required, read_replica
+from utils.time_utils import beijing_now
+from services.export_service import ExportService, EXPORTS, FORMATS
+from services.family_service import FamilyService
+
+# 创建蓝图
+export_bp = Blueprint('export', __name__)
+
+MIMETYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'zip': 'application/zip'}
+
+
+def _streaming_download(chunks, fmt: str, filename: str) -> Response:
+    """边查询边输出的下载响应；响应关闭时（含客户端中途断开）归还导出名额"""
+    response = Response(stream_with_context(chunks), mimetype=MIMETYPES[fmt],
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+    response.call_on_close(ExportService.release_slot)
+    return response
+
+
+def _busy():
+    flash('当前导出任务较多，请稍后再试', 'warning')
+    return redirect(url_for('profile.settings'))
+
+
+@export_bp.get('/export/archive.zip')
+@login_required
+@read_replica
+def export_archive():
+    """全部事件和时光打包下载，media=1 时附带时光图片和视频"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        fmt = 'csv'
+    media_root = current_app.static_folder if request.args.get('media') == '1' else None
+    if not ExportService.acquire_slot(current_app.config['EXPORT_MAX_CONCURRENT']):
+        return _busy()
+    chunks = ExportService.iter_zip(FamilyService.current_id(), fmt, media_root)
+    return _streaming_download(chunks, 'zip', ExportService.filename('history', 'zip', beijing_now().date().isoformat()))
+
+
+@export_bp.get('/export/<entity>.<fmt>')
+@login_required
+@read_replica
+def export_file(entity: str, fmt: str):
+    """单类数据下载：/export/events.csv、/export/moments.jsonl 等"""
+    if entity not in EXPORTS or fmt not in FORMATS:
+        return ('', 404)
+    if not ExportService.acquire_slot(current_app.config['EXPORT_MAX_CONCURRENT']):
+        return _busy()
+    chunks = ExportService.iter_text(FamilyService.current_id(), entity, fmt)
+    return _streaming_download(chunks, fmt, ExportService.filename(entity, fmt, beijing_now().date().isoformat()))
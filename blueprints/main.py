@@ -5,8 +5,11 @@
 import os
 import json
 from datetime import datetime, timedelta, timezone, date
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, jsonify, session, send_from_directory
 from models import db, Event
+from services.baby_service import BabyService
+from services.family_service import FamilyService
+from utils.decorators import read_replica
 from flask import current_app
 from sqlalchemy import func
 
@@ -32,10 +35,9 @@ def format_elapsed(delta: timedelta) -> str:
 
 def build_index_context():
     now = beijing_now()
-    # 按用户过滤 - 未登录不显示数据
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
+    # 按家庭和当前宝宝过滤（两位家长看到同一份数据，多个宝宝分开统计）- 未登录不显示数据
+    family_id, baby_id = BabyService.current_scope()
+    if not family_id:
         # 未登录时返回空数据
         return {
             'last_feed_time': None,
@@ -49,7 +51,7 @@ def build_index_context():
             'today_diaper_count': 0,
         }
     
-    q = Event.query.filter(Event.user_id == uid)
+    q = BabyService.scoped(Event, family_id, baby_id)
     last_feed = q.filter_by(type='feed').order_by(Event.timestamp.desc()).first()
     last_diaper = q.filter_by(type='diaper').order_by(Event.timestamp.desc()).first()
 
@@ -59,18 +61,17 @@ def build_index_context():
     last_feed_ts = last_feed.timestamp.isoformat() if last_feed else None
     last_diaper_ts = last_diaper.timestamp.isoformat() if last_diaper else None
 
-    # 确保数据库中的时间有时区信息
-    if last_feed and last_feed.timestamp.tzinfo is None:
-        last_feed.timestamp = last_feed.timestamp.replace(tzinfo=BEIJING_TZ)
-    if last_diaper and last_diaper.timestamp.tzinfo is None:
-        last_diaper.timestamp = last_diaper.timestamp.replace(tzinfo=BEIJING_TZ)
-        
-    feed_elapsed = format_elapsed(now - last_feed.timestamp) if last_feed else None
-    diaper_elapsed = format_elapsed(now - last_diaper.timestamp) if last_diaper else None
+    # 数据库中的时间不带时区，补成北京时间后再计算间隔；只用局部变量，
+    # 改写 ORM 属性会让只读请求自动刷出 UPDATE 并推进同步版本号
+    def aware(ts):
+        return ts.replace(tzinfo=BEIJING_TZ) if ts.tzinfo is None else ts
+
+    feed_elapsed = format_elapsed(now - aware(last_feed.timestamp)) if last_feed else None
+    diaper_elapsed = format_elapsed(now - aware(last_diaper.timestamp)) if last_diaper else None
 
     # 今日统计（UTC 天起算）
     start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    base_filters = [Event.timestamp >= start_of_day, Event.user_id == uid]
+    base_filters = [Event.timestamp >= start_of_day, BabyService.in_baby(Event, family_id, baby_id)]
     today_feed_total_ml = db.session.query(func.coalesce(func.sum(Event.amount_ml), 0)).filter(
         Event.type == 'feed', *base_filters
     ).scalar() or 0
@@ -96,8 +97,14 @@ def build_index_context():
     }
 
 @main_bp.route('/')
+@read_replica
 def index():
     ctx = build_index_context()
+    family_id = FamilyService.current_id()
+    if family_id:
+        from services.change_log_service import ChangeLogService
+        ctx['sync_token'] = ChangeLogService.current_revision(family_id)
+        ctx['baby_id'] = BabyService.current_id()
     return render_template('index.html', **ctx)
 
 from utils.decorators import login_required
@@ -114,7 +121,8 @@ def record_feed():
             flash('请填写奶量（ml）', 'warning')
             return redirect(url_for('main.index') + '#feed-pane')
         amount = int(amount)
-        e = Event(type='feed', amount_ml=amount, note=note, timestamp=beijing_now(), user_id=uid)
+        e = Event(type='feed', amount_ml=amount, note=note, timestamp=beijing_now(), user_id=uid,
+                  family_id=FamilyService.current_id(), baby_id=BabyService.current_id())
         db.session.add(e)
         db.session.commit()
         flash(f'已记录喂奶 {amount} ml', 'success')
@@ -135,7 +143,8 @@ def record_diaper():
         kind_label = {'pee': '尿', 'poop': '便', 'both': '尿+便'}.get(diaper_kind, '')
         if kind_label:
             note = f'[{kind_label}] ' + (note or '')
-        e = Event(type='diaper', amount_ml=None, note=note, timestamp=beijing_now(), user_id=uid)
+        e = Event(type='diaper', amount_ml=None, note=note, timestamp=beijing_now(), user_id=uid,
+                  family_id=FamilyService.current_id(), baby_id=BabyService.current_id())
         db.session.add(e)
         db.session.commit()
         flash('已记录换尿布', 'success')
@@ -145,31 +154,50 @@ def record_diaper():
         flash('记录失败：' + str(exc), 'danger')
     return redirect(url_for('main.index') + '#diaper-pane')
 
+def _parse_date(value: str):
+    """解析 YYYY-MM-DD，空值或格式不对时返回 None"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
 @main_bp.route('/history')
+@read_replica
 def history():
+    """历史记录：键集分页，支持 type / from / to / q 筛选，按天分组显示小计"""
+    from services.event_history_service import EventHistoryService, EVENT_TYPES, DEFAULT_LIMIT
     t = request.args.get('type', 'all')
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
+    if t not in EVENT_TYPES:
+        t = 'all'
+    date_from = _parse_date(request.args.get('from', ''))
+    date_to = _parse_date(request.args.get('to', ''))
+    q = request.args.get('q', '').strip()
+    # 翻页链接带上同一组筛选条件，类型按钮只带日期和关键字
+    range_filters = {k: v for k, v in (('from', date_from and date_from.isoformat()),
+                                       ('to', date_to and date_to.isoformat()), ('q', q)) if v}
+    filters = dict(range_filters, type=t) if t != 'all' else range_filters
+    family_id, baby_id = BabyService.current_scope()
+    if not family_id:
         # 未登录时返回空列表
-        return render_template('history.html', events=[], filter_type=t)
-    
-    q = Event.query.filter(Event.user_id == uid)
-    if t == 'feed':
-        q = q.filter_by(type='feed')
-    elif t == 'diaper':
-        q = q.filter_by(type='diaper')
-    events = q.order_by(Event.timestamp.desc()).limit(200).all()
-    return render_template('history.html', events=events, filter_type=t)
+        return render_template('history.html', groups=[], filter_type=t, filters=filters,
+                               range_filters=range_filters, next_cursor=None, paged=False)
+
+    per_page = request.args.get('per_page', DEFAULT_LIMIT, type=int)
+    try:
+        events, next_cursor = EventHistoryService.page(family_id, baby_id, request.args.get('cursor') or None, per_page,
+                                                       t, date_from, date_to, q or None)
+    except ValueError:
+        return redirect(url_for('main.history', **filters))
+    groups = EventHistoryService.group_by_day(family_id, baby_id, events, t, q or None)
+    return render_template('history.html', groups=groups, filter_type=t, filters=filters,
+                           range_filters=range_filters, next_cursor=next_cursor, paged=bool(request.args.get('cursor')))
 
 @main_bp.post('/event/<int:event_id>/delete')
 @login_required
 def delete_event(event_id: int):
-    from flask import session
-    uid = session.get('uid')
-    e = Event.query.get_or_404(event_id)
-    if uid and e.user_id and e.user_id != uid:
-        flash('无权限删除该记录', 'danger')
+    e = FamilyService.owned(Event, event_id, FamilyService.current_id())
+    if e is None:
+        flash('记录不存在或无权限删除', 'danger')
         return redirect(request.referrer or url_for('main.history'))
     try:
         db.session.delete(e)
@@ -200,17 +228,10 @@ def undo_last():
             return redirect(url_for('main.index'))
     except Exception:
         pass
-    e = Event.query.get(undo_id)
+    e = FamilyService.owned(Event, undo_id, FamilyService.current_id())
     if not e:
         flash('记录不存在，无法撤销', 'warning')
     else:
-        from flask import session
-        uid = session.get('uid')
-        if uid and e.user_id and e.user_id != uid:
-            flash('无权限撤销该记录', 'danger')
-            session.pop('undo_event_id', None)
-            session.pop('undo_expire_ts', None)
-            return redirect(url_for('main.index'))
         try:
             db.session.delete(e)
             db.session.commit()
@@ -223,18 +244,19 @@ def undo_last():
     return redirect(url_for('main.index'))
 
 @main_bp.route('/api/last')
+@read_replica
 def api_last():
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
+    family_id, baby_id = BabyService.current_scope()
+    if not family_id:
         return jsonify({
             'last_feed': None,
             'last_diaper': None,
             'now': beijing_now().isoformat()
         })
     
-    last_feed = Event.query.filter(Event.user_id == uid, Event.type == 'feed').order_by(Event.timestamp.desc()).first()
-    last_diaper = Event.query.filter(Event.user_id == uid, Event.type == 'diaper').order_by(Event.timestamp.desc()).first()
+    q = BabyService.scoped(Event, family_id, baby_id)
+    last_feed = q.filter(Event.type == 'feed').order_by(Event.timestamp.desc()).first()
+    last_diaper = q.filter(Event.type == 'diaper').order_by(Event.timestamp.desc()).first()
     return jsonify({
         'last_feed': last_feed.to_dict() if last_feed else None,
         'last_diaper': last_diaper.to_dict() if last_diaper else None,
@@ -242,10 +264,10 @@ def api_last():
     })
 
 @main_bp.route('/api/feed_series')
+@read_replica
 def api_feed_series():
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
+    family_id, baby_id = BabyService.current_scope()
+    if not family_id:
         return jsonify({'items': [], 'count': 0})
     
     try:
@@ -254,8 +276,8 @@ def api_feed_series():
     except Exception:
         limit = 30
     events = (
-        Event.query
-        .filter(Event.user_id == uid, Event.type == 'feed')
+        BabyService.scoped(Event, family_id, baby_id)
+        .filter(Event.type == 'feed')
         .order_by(Event.timestamp.desc())
         .limit(limit)
         .all()
@@ -271,10 +293,10 @@ def api_feed_series():
     return jsonify({'items': data, 'count': len(data)})
 
 @main_bp.route('/api/diaper_series')
+@read_replica
 def api_diaper_series():
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
+    family_id, baby_id = BabyService.current_scope()
+    if not family_id:
         return jsonify({'items': [], 'count': 0})
     
     try:
@@ -285,8 +307,8 @@ def api_diaper_series():
     now = beijing_now()
     start = (now - timedelta(days=days-1)).replace(hour=0, minute=0, second=0, microsecond=0)
     events = (
-        Event.query
-        .filter(Event.user_id == uid, Event.type == 'diaper', Event.timestamp >= start)
+        BabyService.scoped(Event, family_id, baby_id)
+        .filter(Event.type == 'diaper', Event.timestamp >= start)
         .order_by(Event.timestamp.asc())
         .all()
     )
@@ -310,6 +332,91 @@ def api_diaper_series():
     items = [buckets[(start + timedelta(days=i)).date().isoformat()] for i in range(days)]
     return jsonify({'items': items, 'count': len(items)})
 
+@main_bp.post('/api/events/sync')
+def api_events_sync():
+    """离线发件箱批量同步：写入客户端事件，并返回 since 令牌之后服务端变化的事件"""
+    from services.event_sync_service import EventSyncService, MAX_BATCH
+    uid = session.get('uid')
+    if not uid:
+        return jsonify({'success': False, 'error': '请先登录'}), 401
+
+    payload = request.get_json(silent=True) or {}
+    # 发件箱按用户分组提交，登录用户已切换时拒绝，避免把上一位用户的记录写到当前账号
+    if payload.get('user_id') not in (None, uid):
+        return jsonify({'success': False, 'error': '登录用户已变更'}), 409
+    events = payload.get('events') or []
+    if not isinstance(events, list) or len(events) > MAX_BATCH:
+        return jsonify({'success': False, 'error': f'events 必须是不超过 {MAX_BATCH} 条的数组'}), 400
+    try:
+        since = EventSyncService.decode_token(payload.get('since'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': '无效的同步令牌'}), 400
+
+    family_id = FamilyService.current_id()
+    results, last_created = EventSyncService.push(uid, family_id, events, BabyService.current_id())
+    if last_created:
+        # 撤销窗口从事件发生时刻算起，离线补传的旧记录不会被误撤销
+        session['undo_event_id'] = last_created['id']
+        session['undo_expire_ts'] = last_created['timestamp'].isoformat()
+    changes, token, has_more = EventSyncService.changes_since(family_id, since)
+    return jsonify({
+        'success': True,
+        'results': results,
+        'changes': changes,
+        'sync_token': token,
+        'has_more': has_more,
+        'server_time': beijing_now().isoformat(),
+    })
+
+@main_bp.route('/api/changes')
+@read_replica
+def api_changes():
+    """增量同步：返回家庭版本号 since 之后变化的事件和时光（删除以墓碑下发）"""
+    from services.change_log_service import ChangeLogService, DEFAULT_LIMIT, ENTITIES
+    family_id = FamilyService.current_id()
+    if not family_id:
+        return jsonify({'success': False, 'error': '请先登录'}), 401
+    try:
+        since = int(request.args.get('since') or 0)
+        limit = int(request.args.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since / limit 必须是整数'}), 400
+    if since < 0:
+        return jsonify({'success': False, 'error': '无效的 since'}), 400
+    entities = [e for e in (request.args.get('entities') or '').split(',') if e]
+    unknown = [e for e in entities if e not in ENTITIES]
+    if unknown:
+        return jsonify({'success': False, 'error': f'未知的实体类型: {",".join(unknown)}'}), 400
+    return jsonify(dict(ChangeLogService.changes(family_id, since, entities or None, limit), success=True))
+
+@main_bp.get('/api/changes/stream')
+def api_changes_stream():
+    """家庭版本号的 SSE 推送：版本号超过 since 时通知页面同步；连接数达到上限时返回 503，页面退回切回时同步"""
+    from services.change_stream_service import ChangeStreamService
+    family_id = FamilyService.current_id()
+    if not family_id:
+        return jsonify({'success': False, 'error': '请先登录'}), 401
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since 必须是整数'}), 400
+    if not ChangeStreamService.acquire_slot(current_app.config['CHANGE_STREAM_MAX_CONCURRENT']):
+        return jsonify({'success': False, 'error': '实时连接较多，请稍后再试'}), 503
+    # 不用 stream_with_context：请求上下文随响应头返回就结束，长连接期间不占数据库连接
+    response = Response(
+        ChangeStreamService.events(current_app._get_current_object(), family_id, since),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    response.call_on_close(ChangeStreamService.release_slot)
+    return response
+
+@main_bp.route('/sw.js')
+def service_worker():
+    """Service Worker 需要从根路径提供，作用域才能覆盖整个站点（非静态路径，响应不缓存）"""
+    return send_from_directory(os.path.join(current_app.static_folder, 'js'), 'sw.js',
+                               mimetype='application/javascript')
+
 @main_bp.route('/favicon.ico')
 def favicon():
     return ('', 204)
@@ -3,6 +3,7 @@
 包含：时光发布、查看、编辑、删除、收藏等功能
 """
 import os
+import uuid
 from datetime import datetime, date, timedelta
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, session
 from models import db, Moment
@@ -10,7 +11,13 @@ from sqlalchemy import or_
 
 # 创建蓝图
 moments_bp = Blueprint('moments', __name__)
-from utils.decorators import login_required
+from utils.decorators import login_required, read_replica
+# Pillow / cv2 首次处理媒体时才导入，不拖慢 worker 启动
+from utils.lazy_imports import PIL_Image as Image, cv2
+from utils.metrics import MEDIA_PROCESSING_DURATION
+from services.baby_service import BabyService
+from services.family_service import FamilyService
+from services.moment_feed_service import MomentFeedService, DEFAULT_LIMIT
 
 def get_date_label(d: date) -> str:
     """获取日期标签"""
@@ -24,67 +31,63 @@ def get_date_label(d: date) -> str:
     return d.strftime('%m月%d日')
 
 @moments_bp.route('/moments')
+@read_replica
 def moments():
-    """时光页面 - 类似朋友圈，支持懒加载"""
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
-        # 未登录时返回空列表
-        return render_template('moments.html', moments=[], has_prev=False, has_next=False, 
-                             prev_num=None, next_num=None, page=1, pages=0, per_page=10)
-    
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    """时光页面 - 类似朋友圈，首屏与滚动加载共用卡片片段"""
+    family_id, baby_id = BabyService.current_scope()
+    per_page = request.args.get('per_page', DEFAULT_LIMIT, type=int)
     favorite_only = request.args.get('favorite', 'false').lower() == 'true'
-    
-    # 构建查询 - 只查询当前用户的数据
-    query = Moment.query.filter(Moment.user_id == uid)
-    
-    # 如果只显示收藏
-    if favorite_only:
-        query = query.filter(Moment.is_favorite == True)
-    
-    # 使用索引优化查询
-    moments = query.order_by(Moment.timestamp.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if not family_id:
+        # 未登录时返回空列表
+        return render_template('moments.html', cards=None, next_cursor=None,
+                               favorite_only=favorite_only, per_page=per_page)
 
-    # 构建日期分组：今天/昨天/具体日期
-    today_d = date.today()
-    yesterday_d = today_d - timedelta(days=1)
-    def label_for(d: date) -> str:
-        if d == today_d:
-            return '今天'
-        if d == yesterday_d:
-            return '昨天'
-        return d.strftime('%m月%d日')
-
-    groups = []
-    last_label = None
-    for m in moments.items:
-        d = (m.timestamp.date())
-        label = label_for(d)
-        if label != last_label:
-            groups.append({'label': label, 'items': []})
-            last_label = label
-        groups[-1]['items'].append(m)
-
-    return render_template('moments.html', moments=moments, groups=groups, 
-                         favorite_only=favorite_only, per_page=per_page)
+    # ?cursor= 供未启用脚本时的“加载更多”链接使用
+    try:
+        items, next_cursor = MomentFeedService.page(family_id, baby_id, request.args.get('cursor'), per_page, favorite_only)
+    except ValueError:
+        return redirect(url_for('moments.moments', favorite=str(favorite_only).lower()))
+
+    return render_template('moments.html', cards=MomentFeedService.render_cards(items) if items else None,
+                           next_cursor=next_cursor, favorite_only=favorite_only, per_page=per_page)
+
+@moments_bp.route('/moments/fragment')
+@read_replica
+def moments_fragment():
+    """滚动加载/搜索：返回一页卡片 HTML 和分页状态"""
+    family_id, baby_id = BabyService.current_scope()
+    if not family_id:
+        return jsonify({'success': False, 'error': '请先登录'}), 401
+
+    try:
+        items, next_cursor = MomentFeedService.page(
+            family_id,
+            baby_id,
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('per_page', DEFAULT_LIMIT, type=int),
+            favorite_only=request.args.get('favorite', 'false').lower() == 'true',
+            query=request.args.get('q', '').strip() or None,
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'html': MomentFeedService.render_cards(items),
+        'count': len(items),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
 
 @moments_bp.route('/api/moments/load')
+@read_replica
 def load_moments_api():
     """懒加载时光API"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     favorite_only = request.args.get('favorite', 'false').lower() == 'true'
     
-    # 构建查询
-    from flask import session
-    uid = session.get('uid')
-    query = Moment.query
-    if uid:
-        query = query.filter(Moment.user_id == uid)
+    # 构建查询（未登录时为空）
+    query = BabyService.scoped(Moment, *BabyService.current_scope())
     
     if favorite_only:
         query = query.filter(Moment.is_favorite == True)
@@ -116,6 +119,7 @@ def load_moments_api():
     })
 
 @moments_bp.route('/api/moments/search')
+@read_replica
 def search_moments():
     """搜索时光API"""
     query = request.args.get('q', '').strip()
@@ -125,12 +129,8 @@ def search_moments():
     if not query:
         return jsonify({'moments': [], 'total': 0, 'message': '请输入搜索关键词'})
     
-    # 使用全文搜索
-    from flask import session
-    uid = session.get('uid')
-    base = Moment.query
-    if uid:
-        base = base.filter(Moment.user_id == uid)
+    # 使用全文搜索（未登录时为空）
+    base = BabyService.scoped(Moment, *BabyService.current_scope())
     search_query = base.filter(
         or_(
             Moment.content.contains(query),
@@ -194,7 +194,6 @@ def create_moment():
                 # 生成缩略图
                 if image_path:
                     try:
-                        from PIL import Image
                         img_path = os.path.join(current_app.static_folder or 'static', image_path)
                         with Image.open(img_path) as img:
                             # 生成缩略图
@@ -209,7 +208,8 @@ def create_moment():
 
         from flask import session
         uid = session.get('uid')
-        moment = Moment(content=content, image_path=image_path, thumb_path=thumb_path, video_path=video_path, user_id=uid)
+        moment = Moment(content=content, image_path=image_path, thumb_path=thumb_path, video_path=video_path, user_id=uid,
+                        family_id=FamilyService.current_id(), baby_id=BabyService.current_id())
         db.session.add(moment)
         db.session.commit()
 
@@ -224,10 +224,8 @@ def create_moment():
 @login_required
 def delete_moment(moment_id):
     """删除时光"""
-    from flask import session
-    uid = session.get('uid')
     try:
-        moment = Moment.query.filter(Moment.user_id == uid, Moment.id == moment_id).first_or_404()
+        moment = FamilyService.scoped(Moment, FamilyService.current_id()).filter(Moment.id == moment_id).first_or_404()
         # 删除图片文件
         if moment.image_path and os.path.exists(moment.image_path):
             os.remove(moment.image_path)
@@ -239,24 +237,25 @@ def delete_moment(moment_id):
     return redirect(url_for('moments.moments'))
 
 @moments_bp.route('/moments/<int:moment_id>')
+@read_replica
 def moment_detail(moment_id: int):
     """时光详情页（查看，不编辑）"""
-    from flask import session, flash, redirect, url_for
-    uid = session.get('uid')
-    if not uid:
+    from flask import flash, redirect, url_for
+    family_id = FamilyService.current_id()
+    if not family_id:
         flash('请先登录', 'warning')
         return redirect(url_for('auth.login_page'))
     
-    moment = Moment.query.filter(Moment.user_id == uid, Moment.id == moment_id).first_or_404()
+    moment = FamilyService.scoped(Moment, family_id).filter(Moment.id == moment_id).first_or_404()
     
-    # 上下条（同页内，只查询当前用户的）
+    # 上下条（只在同一个宝宝的时光中查找）
     prev_m = (
-        Moment.query.filter(Moment.user_id == uid, Moment.timestamp > moment.timestamp)
+        BabyService.scoped(Moment, family_id, moment.baby_id).filter(Moment.timestamp > moment.timestamp)
         .order_by(Moment.timestamp.asc())
         .first()
     )
     next_m = (
-        Moment.query.filter(Moment.user_id == uid, Moment.timestamp < moment.timestamp)
+        BabyService.scoped(Moment, family_id, moment.baby_id).filter(Moment.timestamp < moment.timestamp)
         .order_by(Moment.timestamp.desc())
         .first()
     )
@@ -265,12 +264,11 @@ def moment_detail(moment_id: int):
 @moments_bp.route('/moments/<int:moment_id>/favorite', methods=['POST'])
 def toggle_favorite(moment_id: int):
     """切换收藏状态"""
-    from flask import session
-    uid = session.get('uid')
-    if not uid:
+    family_id = FamilyService.current_id()
+    if not family_id:
         return jsonify({'success': False, 'error': '请先登录'}), 401
     
-    moment = Moment.query.filter(Moment.user_id == uid, Moment.id == moment_id).first_or_404()
+    moment = FamilyService.scoped(Moment, family_id).filter(Moment.id == moment_id).first_or_404()
     moment.is_favorite = not moment.is_favorite
     db.session.commit()
     return jsonify({'success': True, 'is_favorite': moment.is_favorite})
@@ -278,12 +276,12 @@ def toggle_favorite(moment_id: int):
 @moments_bp.route('/moments/<int:moment_id>/share')
 def share_moment(moment_id: int):
     """分享时光"""
-    from flask import session, jsonify
-    uid = session.get('uid')
-    if not uid:
+    from flask import jsonify
+    family_id = FamilyService.current_id()
+    if not family_id:
         return jsonify({'success': False, 'error': '请先登录'}), 401
     
-    moment = Moment.query.filter(Moment.user_id == uid, Moment.id == moment_id).first_or_404()
+    moment = FamilyService.scoped(Moment, family_id).filter(Moment.id == moment_id).first_or_404()
     # 生成分享链接
     share_url = request.url_root + url_for('moments.moment_detail', moment_id=moment_id)
     return jsonify({
@@ -297,9 +295,7 @@ def share_moment(moment_id: int):
 @login_required
 def edit_moment(moment_id):
     """编辑时光"""
-    from flask import session
-    uid = session.get('uid')
-    moment = Moment.query.filter(Moment.user_id == uid, Moment.id == moment_id).first_or_404()
+    moment = FamilyService.scoped(Moment, FamilyService.current_id()).filter(Moment.id == moment_id).first_or_404()
     if request.method == 'GET':
         return render_template('edit_moment.html', moment=moment)
     try:
@@ -342,12 +338,14 @@ def edit_moment(moment_id):
         flash('保存失败：' + str(exc), 'danger')
         return redirect(url_for('moments.edit_moment', moment_id=moment_id))
 
+def _media_stem():
+    """媒体文件名主体：时间戳加随机后缀，同一秒内的并发上传不会互相覆盖"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+@MEDIA_PROCESSING_DURATION.time(kind='image')
 def save_moment_image(image_file):
     """保存并压缩时光图片"""
     try:
-        from PIL import Image
-        import io
-
         # 创建时光图片目录
         moments_dir = os.path.join(current_app.static_folder or 'static', 'moments')
         os.makedirs(moments_dir, exist_ok=True)
@@ -363,7 +361,7 @@ def save_moment_image(image_file):
             img = img.resize(new_size, Image.LANCZOS)
 
         # 生成文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = _media_stem()
         filename = f'moment_{timestamp}.webp'
         filepath = os.path.join(moments_dir, filename)
 
@@ -385,17 +383,15 @@ def save_moment_image(image_file):
     except Exception as e:
         raise Exception(f'图片处理失败：{str(e)}')
 
+@MEDIA_PROCESSING_DURATION.time(kind='video')
 def save_moment_video(video_file):
     """保存视频文件并生成缩略图"""
     try:
-        from PIL import Image
-        try:
-            import cv2
-        except ImportError:
+        if not cv2.available():
             # 如果没有cv2，直接保存视频不生成缩略图
             moments_dir = os.path.join(current_app.static_folder or 'static', 'moments')
             os.makedirs(moments_dir, exist_ok=True)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = _media_stem()
             video_filename = f'moment_{timestamp}.mp4'
             video_filepath = os.path.join(moments_dir, video_filename)
             video_file.save(video_filepath)
@@ -403,7 +399,7 @@ def save_moment_video(video_file):
         
         moments_dir = os.path.join(current_app.static_folder or 'static', 'moments')
         os.makedirs(moments_dir, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = _media_stem()
         
         # 保存视频
         video_filename = f'moment_{timestamp}.mp4'
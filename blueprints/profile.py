@@ -1,11 +1,14 @@
 """
 用户资料和设置功能蓝图
-包含：宝宝资料管理、头像上传、封面设置等功能
+包含：宝宝资料管理（一个家庭可有多个宝宝）、家庭成员与邀请码、头像上传、封面设置等功能
 """
-import os
-import json
 from datetime import date, timedelta
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from models import db
+from services.baby_service import BabyService, SESSION_BABY_ID
+from services.family_service import FamilyService
+from utils.decorators import login_required
+from utils.metrics import MEDIA_PROCESSING_DURATION
 
 # 创建蓝图
 profile_bp = Blueprint('profile', __name__)
@@ -33,115 +36,141 @@ def calc_age_months(birth: date, today: date | None = None) -> int:
         months -= 1
     return max(0, months)
 
-def instance_file(pathname: str) -> str:
-    inst = current_app.instance_path
-    try:
-        os.makedirs(inst, exist_ok=True)
-    except Exception:
-        pass
-    return os.path.join(inst, pathname)
-
-def load_profile() -> dict:
-    import json
-    p = instance_file('profile.json')
-    if os.path.exists(p):
-        try:
-            with open(p, 'r', encoding='utf-8') as f:
-                return json.load(f) or {}
-        except Exception:
-            return {}
-    return {}
+def _image_upload(field: str, label: str):
+    """取出上传的 JPG/PNG 文件，不符合时闪现提示并返回 None"""
+    f = request.files.get(field)
+    if not f or f.filename == '':
+        flash(f'未选择{label}', 'warning')
+        return None
+    if not f.filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+        flash('仅支持 JPG/PNG 图片', 'warning')
+        return None
+    return f
 
-def save_profile(data: dict) -> None:
-    import json
-    p = instance_file('profile.json')
-    with open(p, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def _current_baby():
+    """当前宝宝；用户还没有宝宝资料时新建一个"""
+    baby = BabyService.current()
+    if baby is None:
+        baby = BabyService.create(session['uid'])
+        db.session.commit()
+        session[SESSION_BABY_ID] = baby.id
+    return baby
 
 @profile_bp.post('/profile')
+@login_required
 def update_profile():
     name = request.form.get('baby_name', '').strip()
-    birth = request.form.get('baby_birth', '').strip()
-    # 简单校验 YYYY-MM-DD
-    if birth:
-        try:
-            y, m, d = [int(x) for x in birth.split('-')]
-            _ = date(y, m, d)
-        except Exception:
-            flash('生日格式应为 YYYY-MM-DD', 'warning')
-            return redirect(request.referrer or url_for('main.index'))
     try:
-        prof = load_profile()
-        prof['name'] = name
-        prof['birth'] = birth
-        save_profile(prof)
+        birth = BabyService.parse_birth(request.form.get('baby_birth', ''))
+    except ValueError:
+        flash('生日格式应为 YYYY-MM-DD', 'warning')
+        return redirect(request.referrer or url_for('main.index'))
+    try:
+        BabyService.update(_current_baby(), name, birth)
         flash('宝宝资料已保存', 'success')
     except Exception as exc:
+        db.session.rollback()
         flash('保存失败：' + str(exc), 'danger')
     return redirect(request.referrer or url_for('main.index'))
 
+@profile_bp.post('/babies')
+@login_required
+def add_baby():
+    """新增宝宝并切换过去"""
+    try:
+        birth = BabyService.parse_birth(request.form.get('baby_birth', ''))
+    except ValueError:
+        flash('生日格式应为 YYYY-MM-DD', 'warning')
+        return redirect(url_for('profile.settings'))
+    baby = BabyService.create(session['uid'], request.form.get('baby_name', ''), birth)
+    db.session.commit()
+    BabyService.select(session['uid'], baby.id)
+    flash('已添加宝宝', 'success')
+    return redirect(url_for('profile.settings'))
+
+@profile_bp.post('/babies/<int:baby_id>/select')
+@login_required
+def select_baby(baby_id: int):
+    """切换当前宝宝：首页、历史、时光和 AI 只读取该宝宝的数据，之后的记录也记到其名下"""
+    if not BabyService.select(session['uid'], baby_id):
+        flash('宝宝不存在', 'warning')
+    return redirect(request.referrer or url_for('main.index'))
+
 @profile_bp.get('/settings')
 def settings():
-    # 直接渲染，模板可使用注入的 baby_* 变量
-    return render_template('settings.html')
+    # 模板可使用注入的 baby_* 变量；登录后另附家庭和成员
+    family, members = None, []
+    uid = session.get('uid')
+    if uid:
+        family_id = FamilyService.current_id()
+        family, members = FamilyService.get(family_id), FamilyService.members(family_id)
+    is_owner = any(m.user_id == uid and m.role == 'owner' for m, _ in members)
+    return render_template('settings.html', family=family, members=members, is_owner=is_owner)
+
+@profile_bp.post('/family/join')
+@login_required
+def join_family():
+    """凭邀请码加入另一位家长的家庭"""
+    try:
+        FamilyService.join(session['uid'], request.form.get('invite_code', ''))
+    except ValueError as exc:
+        flash(str(exc), 'warning')
+        return redirect(url_for('profile.settings'))
+    session.pop(SESSION_BABY_ID, None)
+    flash('已加入家庭，之后的记录和时光全家共享', 'success')
+    return redirect(url_for('profile.settings'))
+
+@profile_bp.post('/family/leave')
+@login_required
+def leave_family():
+    """退出家庭，已有数据留在原家庭"""
+    try:
+        FamilyService.leave(session['uid'])
+    except ValueError as exc:
+        flash(str(exc), 'warning')
+        return redirect(url_for('profile.settings'))
+    session.pop(SESSION_BABY_ID, None)
+    flash('已退出家庭', 'success')
+    return redirect(url_for('profile.settings'))
+
+@profile_bp.post('/family/invite/reset')
+@login_required
+def reset_invite_code():
+    """更换邀请码（仅 owner），旧码立即失效"""
+    family_id = FamilyService.current_id()
+    if not any(m.user_id == session['uid'] and m.role == 'owner' for m, _ in FamilyService.members(family_id)):
+        flash('只有家庭创建者可以更换邀请码', 'warning')
+    else:
+        FamilyService.reset_invite_code(family_id)
+        flash('已更换邀请码', 'success')
+    return redirect(url_for('profile.settings'))
 
 @profile_bp.post('/avatar/upload')
+@login_required
 def upload_avatar():
-    f = request.files.get('avatar')
-    if not f or f.filename == '':
-        flash('未选择图片', 'warning')
+    f = _image_upload('avatar', '图片')
+    if f is None:
         return redirect(request.referrer or url_for('main.index'))
-    # 校验扩展名
-    filename = f.filename.lower()
-    ext = None
-    for e in ('jpg', 'jpeg', 'png'):
-        if filename.endswith('.' + e):
-            ext = e
-            break
-    if not ext:
-        flash('仅支持 JPG/PNG 图片', 'warning')
-        return redirect(request.referrer or url_for('main.index'))
-    # 保存到 static 下的固定文件名
-    target_name = 'avatar.jpg' if ext in ('jpg', 'jpeg') else 'avatar.png'
     try:
-        save_path = os.path.join(current_app.static_folder or 'static', target_name)
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        f.save(save_path)
+        with MEDIA_PROCESSING_DURATION.time(kind='avatar'):
+            BabyService.save_media(_current_baby(), 'avatar', f.stream)
         flash('头像已更新', 'success')
     except Exception as exc:
+        db.session.rollback()
         flash('头像更新失败：' + str(exc), 'danger')
     return redirect(request.referrer or url_for('main.index'))
 
 @profile_bp.post('/cover/upload')
+@login_required
 def upload_cover():
-    f = request.files.get('cover')
-    if not f or f.filename == '':
-        flash('未选择封面图片', 'warning')
-        return redirect(request.referrer or url_for('main.index'))
-    filename = f.filename.lower()
-    ext = None
-    for e in ('jpg', 'jpeg', 'png'):
-        if filename.endswith('.' + e):
-            ext = e
-            break
-    if not ext:
-        flash('仅支持 JPG/PNG 图片', 'warning')
+    f = _image_upload('cover', '封面图片')
+    if f is None:
         return redirect(request.referrer or url_for('main.index'))
     try:
-        from PIL import Image
-        import io
-        img = Image.open(f.stream).convert('RGB')
-        # 等比缩放到最大宽度 1920（高度按比例），超大图降采样
-        max_w = int(os.environ.get('COVER_MAX_WIDTH', '1920'))
-        if img.width > max_w:
-            ratio = max_w / float(img.width)
-            new_size = (max_w, int(img.height * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
-        # 输出为 WebP（若需要可改为高压 JPG）
-        out_path = os.path.join(current_app.static_folder or 'static', 'cover.webp')
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        img.save(out_path, format='WEBP', quality=int(os.environ.get('COVER_QUALITY', '85')))
+        with MEDIA_PROCESSING_DURATION.time(kind='cover'):
+            BabyService.save_media(_current_baby(), 'cover', f.stream)
         flash('封面已更新并压缩为 WebP', 'success')
     except Exception as exc:
+        db.session.rollback()
         flash('封面更新失败：' + str(exc), 'danger')
     return redirect(request.referrer or url_for('main.index'))
@@ -3,7 +3,13 @@
 """
 import os
 from datetime import timedelta
-from typing import Optional
+from typing import Tuple
+
+
+def _rate(name: str, default: str) -> Tuple[int, int]:
+    """令牌桶限额 'burst/per_minute'"""
+    burst, per_minute = os.environ.get(name, default).split('/')
+    return int(burst), int(per_minute)
 
 
 class Config:
@@ -14,10 +20,87 @@ class Config:
     SEND_FILE_MAX_AGE_DEFAULT = timedelta(days=30)
     
     # AI配置
-    AI_MODEL_TYPE = os.environ.get('AI_MODEL_TYPE', 'ollama')
+    AI_MODEL_TYPE = os.environ.get('AI_MODEL_TYPE', 'ollama')  # 可选: ollama / openai / mock / stub
     OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+    OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', 'gemma3:1b')
+    OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # 兼容 OpenAI 协议的服务地址
+    OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
     AI_FAST_MODE = os.environ.get('AI_FAST_MODE', 'true').lower() == 'true'
+    AI_CONNECT_TIMEOUT = float(os.environ.get('AI_CONNECT_TIMEOUT', '2'))
+    AI_TIMEOUT = float(os.environ.get('AI_TIMEOUT', '15'))
+    # 主后端失败后降级到 mock 的冷却时间（秒），期满先做健康检查再恢复
+    AI_FALLBACK_COOLDOWN = float(os.environ.get('AI_FALLBACK_COOLDOWN', '60'))
+    AI_RESPONSE_CACHE_SECONDS = int(os.environ.get('AI_RESPONSE_CACHE_SECONDS', '3600'))
+    # 时光分析摘要：新时光写入后延迟多少秒在后台刷新（防抖）
+    AI_DIGEST_DEBOUNCE_SECONDS = float(os.environ.get('AI_DIGEST_DEBOUNCE_SECONDS', '30'))
     
+    # 数据库结构管理：启动时不建表，只校验迁移版本（off / warn / strict）
+    SCHEMA_AUTO_CREATE = False
+    SCHEMA_CHECK = os.environ.get('SCHEMA_CHECK', 'warn')
+
+    # 数据库连接池（PostgreSQL）：每个 worker 最多 pool_size + max_overflow 个连接
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+    # 早于托管平台回收空闲连接的时间主动重建连接
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+    # 只读副本（DATABASE_READ_URL）：写入后多少秒内同一会话的读取仍走主库
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', '10'))
+    # 增量同步：删除墓碑保留天数，超过后由 `flask changes-prune` 清理，更旧的同步令牌需要全量重建
+    CHANGE_TOMBSTONE_DAYS = int(os.environ.get('CHANGE_TOMBSTONE_DAYS', '90'))
+    # 家庭实时推送（/api/changes/stream）：每个 worker 一个线程按间隔读取被订阅家庭的版本号；
+    # 每条 SSE 连接占一个请求线程，连接数达到上限时客户端退回切回页面时同步
+    CHANGE_STREAM_POLL_SECONDS = float(os.environ.get('CHANGE_STREAM_POLL_SECONDS', '1'))
+    CHANGE_STREAM_HEARTBEAT_SECONDS = float(os.environ.get('CHANGE_STREAM_HEARTBEAT_SECONDS', '20'))
+    CHANGE_STREAM_MAX_SECONDS = float(os.environ.get('CHANGE_STREAM_MAX_SECONDS', '300'))  # 到时结束，浏览器自动重连
+    CHANGE_STREAM_MAX_CONCURRENT = int(os.environ.get('CHANGE_STREAM_MAX_CONCURRENT', '4'))
+    # 历史导出：每个 worker 进程同时进行的导出数上限，超出时提示稍后再试
+    EXPORT_MAX_CONCURRENT = int(os.environ.get('EXPORT_MAX_CONCURRENT', '2'))
+
+    # 密码哈希：每个 worker 进程的哈希线程数和排队上限，排队满或等待超时的登录直接返回 503
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')  # 变更后用户下次登录时重新哈希
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '1'))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', '4'))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '5'))
+    # 登录注册令牌桶限流 'burst/per_minute'：按 IP 和按账号（邮箱）分别计数
+    # 多 worker 部署时设 RATE_LIMIT_STORE=sqlite:////dev/shm/baby_ratelimit.db 共享计数（gunicorn.conf.py 默认如此）
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+    LOGIN_IP_LIMIT = _rate('LOGIN_IP_LIMIT', '20/10')
+    LOGIN_ACCOUNT_LIMIT = _rate('LOGIN_ACCOUNT_LIMIT', '10/2')
+    REGISTER_IP_LIMIT = _rate('REGISTER_IP_LIMIT', '5/2')
+    # 反向代理层数：大于 0 时按 X-Forwarded-For 取客户端 IP（限流按 IP 计数依赖它）。
+    # Render 前面有一层代理，render.yaml 中设为 1；为 0 时按 IP 的限流按 remote_addr 计数（在代理之后即代理地址）
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', '0'))
+
+    # SQLite 连接参数，每个新连接建立时通过 PRAGMA 设置（见 utils/database.py）
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(64 * 1024 * 1024)))
+
+    # 请求级 SQL 剖析：Server-Timing 响应头和每请求一行 JSON 日志
+    SQL_PROFILING = os.environ.get('SQL_PROFILING', 'true').lower() == 'true'
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', '100'))
+    # N+1 检测：off / log / raise；同一请求内相同语句执行达到阈值次数即报告
+    SQL_NPLUS1_DETECT = os.environ.get('SQL_NPLUS1_DETECT', 'off')
+    SQL_NPLUS1_THRESHOLD = int(os.environ.get('SQL_NPLUS1_THRESHOLD', '5'))
+
+    # 静态资源：超过 ASSET_IMAGE_MAX_KB 的 JPG/PNG 在构建时转为 WebP；上传后其他 worker 在检查间隔内看到新清单
+    ASSET_IMAGE_MAX_WIDTH = int(os.environ.get('ASSET_IMAGE_MAX_WIDTH', '1920'))
+    ASSET_IMAGE_QUALITY = int(os.environ.get('ASSET_IMAGE_QUALITY', '85'))
+    ASSET_IMAGE_MAX_KB = int(os.environ.get('ASSET_IMAGE_MAX_KB', '200'))
+    ASSET_MANIFEST_CHECK_SECONDS = float(os.environ.get('ASSET_MANIFEST_CHECK_SECONDS', '5'))
+    # Flask-Compress 只压缩页面和 JSON；流式响应（静态文件、SSE）不压缩
+    COMPRESS_MIMETYPES = ['text/html', 'application/json']
+    COMPRESS_STREAMS = False
+
+    # Prometheus 指标：/metrics；多进程时由 gunicorn.conf.py 设置 METRICS_DIR
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # 抓取需带 Authorization: Bearer <token>；未设置时只有调试模式可匿名访问，否则 /metrics 返回 404
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
     # 时区配置
     TIMEZONE_OFFSET = 8  # 北京时间 UTC+8
 
@@ -27,24 +110,55 @@ def _get_database_url() -> str:
     database_url = os.environ.get('DATABASE_URL')
     if not database_url:
         return 'sqlite:///baby.db'
-    
-    # 处理Render等平台的数据库URL
+    return _normalize_database_url(database_url)
+
+
+def _normalize_database_url(database_url: str) -> str:
+    """处理Render等平台的数据库URL"""
     if database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
-    
     return database_url
 
 
+def _engine_options(database_uri: str) -> dict:
+    """按数据库类型生成 SQLALCHEMY_ENGINE_OPTIONS"""
+    if database_uri.startswith('sqlite'):
+        # 忙等待由 PRAGMA busy_timeout 控制，驱动层超时保持一致
+        return {'connect_args': {'timeout': Config.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+    }
+
+
+def _replica_binds() -> dict:
+    """配置了 DATABASE_READ_URL 时注册只读副本 bind"""
+    read_url = os.environ.get('DATABASE_READ_URL')
+    if not read_url:
+        return {}
+    read_url = _normalize_database_url(read_url)
+    return {'replica': {'url': read_url, **_engine_options(read_url)}}
+
+
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///baby.db'
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = _replica_binds()
+    # 本地单进程开发时空库自动建表并标记为最新版本，省去首次运行的初始化步骤；已有的库仍需 `flask db-bootstrap`
+    SCHEMA_AUTO_CREATE = os.environ.get('SCHEMA_AUTO_CREATE', 'true').lower() == 'true'
 
 
 class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = _get_database_url()
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = _replica_binds()
 
 
 # 配置字典
@@ -0,0 +1,138 @@
+"""
+gunicorn 生产配置
+    gunicorn -c gunicorn.conf.py app:app
+
+worker 数按 CPU 核数和可用内存推算，默认 gthread（SSE / AI 流式响应各占一个线程，
+慢请求不会阻塞整个 worker）；安装 gevent 后可设 GUNICORN_WORKER_CLASS=gevent。
+所有参数均可用环境变量覆盖。
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _available_memory_mb():
+    """容器内存上限（cgroup）与系统可用内存中较小者，读取失败返回 None"""
+    limits = []
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+            if raw.isdigit() and int(raw) < 1 << 60:
+                limits.append(int(raw) // (1024 * 1024))
+        except OSError:
+            pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    limits.append(int(line.split()[1]) // 1024)
+                    break
+    except OSError:
+        pass
+    return min(limits) if limits else None
+
+
+def _default_workers():
+    cpu_workers = multiprocessing.cpu_count() * 2 + 1
+    memory_mb = _available_memory_mb()
+    if memory_mb is None:
+        return cpu_workers
+    # 每个 worker 的内存预算（预加载依赖后 fork，共享页不重复计算）
+    per_worker_mb = _env_int('GUNICORN_WORKER_MEMORY_MB', 160)
+    return max(1, min(cpu_workers, memory_mb // per_worker_mb))
+
+
+def _worker_class():
+    requested = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    if requested == 'gevent':
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            return 'gthread'
+    return requested
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '9000')}"
+worker_class = _worker_class()
+workers = _env_int('WEB_CONCURRENCY', _default_workers())
+threads = _env_int('GUNICORN_THREADS', 8) if worker_class == 'gthread' else 1
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 200)
+
+# gevent 需要在导入应用前打补丁，预加载会让 master 先导入未打补丁的模块
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true' if worker_class != 'gevent' else 'false').lower() == 'true'
+
+# 定期重启 worker 回收内存碎片，抖动避免所有 worker 同时重启
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# AI 流式响应可能持续较久；gthread 下 timeout 只约束 worker 心跳
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# 长于前端负载均衡器的空闲超时，避免复用已被关闭的连接导致 502
+keepalive = _env_int('GUNICORN_KEEPALIVE', 75)
+
+# 心跳文件放在内存文件系统，避免磁盘 IO 卡顿被误判为超时
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '*')
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# 多进程指标：各 worker 把指标写入该目录，/metrics 合并输出（须在导入应用前设置）
+os.environ.setdefault('METRICS_DIR', os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else '/tmp', 'baby_metrics'))
+
+# 登录限流计数由所有 worker 共享，否则实际限额随 worker 数放大
+os.environ.setdefault('RATE_LIMIT_STORE', 'sqlite:///' + os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else '/tmp',
+                                                                      'baby_ratelimit.db'))
+
+# master 中预加载的重量级依赖，fork 后各 worker 共享内存页
+preload_modules = [m for m in os.environ.get('PRELOAD_MODULES', 'requests').split(',') if m.strip()]
+
+
+def on_starting(server):
+    from utils.metrics import reset_directory
+
+    reset_directory()
+
+
+def when_ready(server):
+    from utils.lazy_imports import preload
+
+    loaded = preload(preload_modules)
+    server.log.info('worker_class=%s workers=%s threads=%s preload_app=%s preloaded=%s',
+                    worker_class, workers, threads, preload_app, ','.join(loaded) or '-')
+    if preload_app:
+        from app import app
+        timings = app.extensions.get('startup_timings', {})
+        server.log.info('启动耗时(ms): %s', ' '.join(f'{k}={v * 1000:.1f}' for k, v in timings.items()))
+
+
+def post_fork(server, worker):
+    """fork 后丢弃从 master 继承的数据库连接，每个 worker 建立自己的连接池"""
+    if not preload_app:
+        return
+    from app import app
+    from models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    """worker 退出前写出最后一次指标"""
+    from utils.metrics import REGISTRY
+
+    REGISTRY.flush(force=True)
+
+
+def child_exit(server, worker):
+    """worker 退出后归档其计数器和直方图，丢弃仪表"""
+    from utils.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -1,7 +1,7 @@
 """Add uid
 
 Revision ID: 78a99fddf6e7
-Revises: 969606519b6b
+Revises: 0448717c06f9
 Create Date: 2025-10-05 16:31:54.499558
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '78a99fddf6e7'
-down_revision = '969606519b6b'
+down_revision = '0448717c06f9'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,34 @@
+"""Add ai_digest
+
+Revision ID: a1c3e5f7b901
+Revises: 78a99fddf6e7
+Create Date: 2026-10-19 10:12:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b901'
+down_revision = '78a99fddf6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ai_digest',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('watermark', sa.String(length=64), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'kind', name='uq_ai_digest_user_kind')
+    )
+
+
+def downgrade():
+    op.drop_table('ai_digest')
@@ -0,0 +1,98 @@
+"""Baby profiles table, baby_id on event and moment, import instance/profile.json
+
+Revision ID: a8d0f2b4c569
+Revises: f6b8d0e2a347
+Create Date: 2026-10-19 20:12:45.630118
+
+"""
+import json
+import os
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d0f2b4c569'
+down_revision = 'f6b8d0e2a347'
+branch_labels = None
+depends_on = None
+
+
+def _legacy_profile():
+    """旧版全站共用的 instance/profile.json，读取失败时视为空"""
+    try:
+        from flask import current_app
+        path = os.path.join(current_app.instance_path, 'profile.json')
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f) or {}
+    except (RuntimeError, OSError, ValueError):
+        return '', None
+    try:
+        birth = date.fromisoformat(data.get('birth') or '')
+    except ValueError:
+        birth = None
+    return (data.get('name') or '')[:50], birth
+
+
+def _recreate_indexes():
+    """SQLite 的 batch 模式重建表后，反射回来的索引丢失倒序和部分索引条件，按模型重建"""
+    op.drop_index('idx_moment_user_favorite_ts', table_name='moment')
+    op.drop_index('idx_moment_user_ts', table_name='moment')
+    op.create_index('idx_moment_user_ts', 'moment', ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('idx_moment_user_favorite_ts', 'moment', ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+                    unique=False, sqlite_where=sa.text('is_favorite = 1'), postgresql_where=sa.text('is_favorite'))
+    op.drop_index('idx_event_user_type_ts', table_name='event')
+    op.drop_index('idx_event_user_ts', table_name='event')
+    op.create_index('idx_event_user_type_ts', 'event', ['user_id', 'type', sa.text('timestamp DESC'), sa.text('id DESC')],
+                    unique=False)
+    op.create_index('idx_event_user_ts', 'event', ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+
+
+def upgrade():
+    op.create_table('baby',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('birth_date', sa.Date(), nullable=True),
+    sa.Column('avatar_path', sa.String(length=255), nullable=True),
+    sa.Column('cover_path', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_baby_user', 'baby', ['user_id', 'id'], unique=False)
+
+    # SQLite 加外键列只能走 batch 重建表，之后重建丢失了倒序 / 部分条件的索引
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('baby_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_event_baby_id', 'baby', ['baby_id'], ['id'])
+    with op.batch_alter_table('moment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('baby_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_moment_baby_id', 'baby', ['baby_id'], ['id'])
+    _recreate_indexes()
+
+    # 以前所有用户看到的都是同一份 profile.json，每个现有用户各得一份副本作为第一个宝宝
+    name, birth = _legacy_profile()
+    op.get_bind().execute(sa.text("""
+        INSERT INTO baby (user_id, name, birth_date, created_at, updated_at)
+        SELECT id, :name, :birth, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM "user"
+    """), {'name': name, 'birth': birth})
+    for table in ('event', 'moment'):
+        op.execute(f"""
+            UPDATE {table} SET baby_id = (SELECT MIN(b.id) FROM baby b WHERE b.user_id = {table}.user_id)
+            WHERE user_id IS NOT NULL
+        """)
+
+
+def downgrade():
+    with op.batch_alter_table('moment', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_moment_baby_id', type_='foreignkey')
+        batch_op.drop_column('baby_id')
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_event_baby_id', type_='foreignkey')
+        batch_op.drop_column('baby_id')
+    op.drop_index('idx_baby_user', table_name='baby')
+    op.drop_table('baby')
+    _recreate_indexes()
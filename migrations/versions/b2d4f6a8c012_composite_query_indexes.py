@@ -0,0 +1,60 @@
+"""Composite indexes aligned with query shapes
+
+Revision ID: b2d4f6a8c012
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 11:05:12.604381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c012'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+# 单列索引和旧复合索引被新的 (user_id, ...) 复合索引覆盖；
+# idx_*_user_id 由已移除的启动建索引代码创建，不一定存在
+REDUNDANT_INDEXES = [
+    'ix_event_type',
+    'ix_event_timestamp',
+    'ix_event_user_id',
+    'idx_event_user_id',
+    'idx_event_type_timestamp',
+    'ix_moment_is_favorite',
+    'ix_moment_timestamp',
+    'ix_moment_user_id',
+    'idx_moment_user_id',
+    'idx_moment_timestamp_favorite',
+    'idx_moment_content',
+]
+
+
+def upgrade():
+    for name in REDUNDANT_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    op.create_index('idx_event_user_type_ts', 'event', ['user_id', 'type', sa.text('timestamp DESC')], unique=False)
+    op.create_index('idx_event_user_ts', 'event', ['user_id', sa.text('timestamp DESC')], unique=False)
+    op.create_index('idx_moment_user_ts', 'moment', ['user_id', sa.text('timestamp DESC'), 'id'], unique=False)
+    op.create_index('idx_moment_user_favorite_ts', 'moment', ['user_id', sa.text('timestamp DESC')], unique=False,
+                    sqlite_where=sa.text('is_favorite = 1'), postgresql_where=sa.text('is_favorite'))
+
+
+def downgrade():
+    op.drop_index('idx_moment_user_favorite_ts', table_name='moment')
+    op.drop_index('idx_moment_user_ts', table_name='moment')
+    op.drop_index('idx_event_user_ts', table_name='event')
+    op.drop_index('idx_event_user_type_ts', table_name='event')
+
+    op.create_index('idx_moment_content', 'moment', ['content'], unique=False)
+    op.create_index('idx_moment_timestamp_favorite', 'moment', ['timestamp', 'is_favorite'], unique=False)
+    op.create_index('ix_moment_user_id', 'moment', ['user_id'], unique=False)
+    op.create_index('ix_moment_timestamp', 'moment', ['timestamp'], unique=False)
+    op.create_index('ix_moment_is_favorite', 'moment', ['is_favorite'], unique=False)
+    op.create_index('idx_event_type_timestamp', 'event', ['type', 'timestamp'], unique=False)
+    op.create_index('ix_event_user_id', 'event', ['user_id'], unique=False)
+    op.create_index('ix_event_timestamp', 'event', ['timestamp'], unique=False)
+    op.create_index('ix_event_type', 'event', ['type'], unique=False)
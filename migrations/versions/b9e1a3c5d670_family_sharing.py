@@ -0,0 +1,191 @@
+"""Families shared by several parents: family, family_member, family_id on data tables
+
+Revision ID: b9e1a3c5d670
+Revises: a8d0f2b4c569
+Create Date: 2026-10-19 22:31:07.482615
+
+"""
+import secrets
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e1a3c5d670'
+down_revision = 'a8d0f2b4c569'
+branch_labels = None
+depends_on = None
+
+INVITE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+
+family = sa.table('family', sa.column('id', sa.Integer), sa.column('invite_code', sa.String),
+                  sa.column('created_at', sa.DateTime))
+family_member = sa.table('family_member', sa.column('family_id', sa.Integer), sa.column('user_id', sa.Integer),
+                         sa.column('role', sa.String), sa.column('joined_at', sa.DateTime))
+
+# 现有数据按时间顺序接在 sync_revision 的起始版本之后编号（同 ChangeLogService.rebuild）
+REBUILD_SQL = """
+    INSERT INTO change_log ({owner}, revision, entity, entity_id, op, changed_at)
+    SELECT src.{owner},
+           r.revision + ROW_NUMBER() OVER (PARTITION BY src.{owner} ORDER BY src.ts, src.entity, src.entity_id),
+           src.entity, src.entity_id, 'upsert', CURRENT_TIMESTAMP
+    FROM (
+        SELECT {owner}, 'event' AS entity, id AS entity_id, timestamp AS ts FROM event WHERE {owner} IS NOT NULL
+        UNION ALL
+        SELECT {owner}, 'moment' AS entity, id AS entity_id, timestamp AS ts FROM moment WHERE {owner} IS NOT NULL
+    ) src
+    JOIN sync_revision r ON r.{owner} = src.{owner}
+"""
+
+
+def _create_sync_tables(owner, target):
+    op.create_table('sync_revision',
+    sa.Column(owner, sa.Integer(), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.Column('pruned_revision', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint([owner], [f'{target}.id'], ),
+    sa.PrimaryKeyConstraint(owner)
+    )
+    op.create_table('change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column(owner, sa.Integer(), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=8), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint([owner], [f'{target}.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint(owner, 'entity', 'entity_id', name='uq_change_log_entity'),
+    sa.UniqueConstraint(owner, 'revision', name=f'uq_change_log_{target}_revision')
+    )
+
+
+def _rebuild_sync(owner, target, base_sql):
+    """重建变更日志：各分区的起始版本取 base_sql 算出的旧版本号 + 1 并记为已清理，
+    客户端手中的旧令牌因此全部过期，下次同步时全量刷新"""
+    bind = op.get_bind()
+    bases = dict(bind.execute(sa.text(base_sql)).all())
+    op.drop_table('change_log')
+    op.drop_table('sync_revision')
+    _create_sync_tables(owner, target)
+    ids = [row[0] for row in bind.execute(sa.text(f'SELECT id FROM "{target}"')).all()]
+    if ids:
+        bind.execute(sa.text(f'INSERT INTO sync_revision ({owner}, revision, pruned_revision) VALUES (:id, :base, :base)'),
+                     [{'id': i, 'base': (bases.get(i) or 0) + 1} for i in ids])
+    op.execute(REBUILD_SQL.format(owner=owner))
+    op.execute(f"""
+        UPDATE sync_revision SET revision = COALESCE(
+            (SELECT MAX(c.revision) FROM change_log c WHERE c.{owner} = sync_revision.{owner}), revision)
+    """)
+
+
+def _recreate_ai_digest(owner, target):
+    # 摘要是可再生成的缓存，直接重建
+    op.drop_table('ai_digest')
+    op.create_table('ai_digest',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column(owner, sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('watermark', sa.String(length=64), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint([owner], [f'{target}.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint(owner, 'kind', name=f'uq_ai_digest_{target}_kind')
+    )
+
+
+def _create_indexes(scope):
+    """SQLite 的 batch 模式重建表后，反射回来的索引丢失倒序和部分索引条件，按模型创建"""
+    op.create_index(f'idx_event_{scope}_type_ts', 'event', [f'{scope}_id', 'type', sa.text('timestamp DESC'), sa.text('id DESC')],
+                    unique=False)
+    op.create_index(f'idx_event_{scope}_ts', 'event', [f'{scope}_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+    op.create_index(f'idx_moment_{scope}_ts', 'moment', [f'{scope}_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+    op.create_index(f'idx_moment_{scope}_favorite_ts', 'moment', [f'{scope}_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+                    unique=False, sqlite_where=sa.text('is_favorite = 1'), postgresql_where=sa.text('is_favorite'))
+    op.create_index(f'idx_baby_{scope}', 'baby', [f'{scope}_id', 'id'], unique=False)
+
+
+def _drop_indexes(scope):
+    op.drop_index(f'idx_event_{scope}_type_ts', table_name='event')
+    op.drop_index(f'idx_event_{scope}_ts', table_name='event')
+    op.drop_index(f'idx_moment_{scope}_ts', table_name='moment')
+    op.drop_index(f'idx_moment_{scope}_favorite_ts', table_name='moment')
+    op.drop_index(f'idx_baby_{scope}', table_name='baby')
+
+
+def upgrade():
+    op.create_table('family',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('invite_code', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('invite_code')
+    )
+    op.create_table('family_member',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('family_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=10), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['family_id'], ['family.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index('idx_family_member_family', 'family_member', ['family_id', 'user_id'], unique=False)
+
+    # 每个现有用户各自成为一个家庭的创建者；id 由数据库分配，兼容 PostgreSQL 的序列
+    bind = op.get_bind()
+    now = datetime.now()
+    for (user_id,) in bind.execute(sa.text('SELECT id FROM "user" ORDER BY id')).all():
+        code = ''.join(secrets.choice(INVITE_ALPHABET) for _ in range(8))
+        family_id = bind.execute(
+            family.insert().values(invite_code=code, created_at=now).returning(family.c.id)).scalar()
+        bind.execute(family_member.insert().values(family_id=family_id, user_id=user_id, role='owner', joined_at=now))
+
+    # SQLite 加外键列只能走 batch 重建表，之后按家庭重建索引
+    op.drop_index('idx_baby_user', table_name='baby')
+    for table in ('event', 'moment', 'baby'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('family_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(f'fk_{table}_family_id', 'family', ['family_id'], ['id'])
+        op.execute(f"""
+            UPDATE {table} SET family_id = (SELECT m.family_id FROM family_member m WHERE m.user_id = {table}.user_id)
+            WHERE user_id IS NOT NULL
+        """)
+    with op.batch_alter_table('baby', schema=None) as batch_op:
+        batch_op.alter_column('family_id', existing_type=sa.Integer(), nullable=False)
+    op.drop_index('idx_event_user_type_ts', table_name='event')
+    op.drop_index('idx_event_user_ts', table_name='event')
+    op.drop_index('idx_moment_user_ts', table_name='moment')
+    op.drop_index('idx_moment_user_favorite_ts', table_name='moment')
+    _create_indexes('family')
+
+    _recreate_ai_digest('family_id', 'family')
+    _rebuild_sync('family_id', 'family', """
+        SELECT m.family_id, MAX(r.revision) FROM sync_revision r
+        JOIN family_member m ON m.user_id = r.user_id GROUP BY m.family_id
+    """)
+
+
+def downgrade():
+    # 回到按用户分区：事件和时光归记录人，宝宝归创建者
+    _rebuild_sync('user_id', 'user', """
+        SELECT m.user_id, r.revision FROM sync_revision r
+        JOIN family_member m ON m.family_id = r.family_id
+    """)
+    _recreate_ai_digest('user_id', 'user')
+
+    _drop_indexes('family')
+    for table in ('event', 'moment', 'baby'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_family_id', type_='foreignkey')
+            batch_op.drop_column('family_id')
+    _create_indexes('user')
+
+    op.drop_index('idx_family_member_family', table_name='family_member')
+    op.drop_table('family_member')
+    op.drop_table('family')
@@ -0,0 +1,71 @@
+"""Per-baby reads: backfill baby_id, index event/moment by (family_id, baby_id)
+
+Revision ID: c0f2a4b6d781
+Revises: b9e1a3c5d670
+Create Date: 2026-10-19 23:48:25.163094
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0f2a4b6d781'
+down_revision = 'b9e1a3c5d670'
+branch_labels = None
+depends_on = None
+
+baby = sa.table('baby', sa.column('family_id', sa.Integer), sa.column('user_id', sa.Integer),
+                sa.column('name', sa.String), sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime))
+
+
+def _create_indexes(name, columns):
+    """SQLite 上与模型一致的倒序和部分索引（同 b9e1a3c5d670 的 _create_indexes）"""
+    keyset = [sa.text('timestamp DESC'), sa.text('id DESC')]
+    op.create_index(f'idx_event_{name}_type_ts', 'event', columns + ['type'] + keyset, unique=False)
+    op.create_index(f'idx_event_{name}_ts', 'event', columns + keyset, unique=False)
+    op.create_index(f'idx_moment_{name}_ts', 'moment', columns + keyset, unique=False)
+    op.create_index(f'idx_moment_{name}_favorite_ts', 'moment', columns + keyset,
+                    unique=False, sqlite_where=sa.text('is_favorite = 1'), postgresql_where=sa.text('is_favorite'))
+
+
+def _drop_indexes(name):
+    op.drop_index(f'idx_event_{name}_type_ts', table_name='event')
+    op.drop_index(f'idx_event_{name}_ts', table_name='event')
+    op.drop_index(f'idx_moment_{name}_ts', table_name='moment')
+    op.drop_index(f'idx_moment_{name}_favorite_ts', table_name='moment')
+
+
+def upgrade():
+    # 每个家庭至少有一个宝宝（与注册时的 FamilyService._create_family 一致），创建者记为家庭的 owner
+    bind = op.get_bind()
+    now = datetime.now()
+    orphans = bind.execute(sa.text("""
+        SELECT m.family_id, m.user_id FROM family_member m
+        WHERE m.role = 'owner' AND NOT EXISTS (SELECT 1 FROM baby b WHERE b.family_id = m.family_id)
+    """)).all()
+    for family_id, user_id in orphans:
+        bind.execute(baby.insert().values(family_id=family_id, user_id=user_id, name='', created_at=now, updated_at=now))
+
+    # 选中宝宝之前写入的记录归到家庭的第一个宝宝，此后读取都按 baby_id 过滤
+    for table in ('event', 'moment'):
+        op.execute(f"""
+            UPDATE {table} SET baby_id = (SELECT MIN(b.id) FROM baby b WHERE b.family_id = {table}.family_id)
+            WHERE baby_id IS NULL AND family_id IS NOT NULL
+        """)
+
+    _drop_indexes('family')
+    _create_indexes('family_baby', ['family_id', 'baby_id'])
+    # 收藏部分索引与完整索引的等值前缀相同，靠统计信息区分二者的行数
+    op.execute('ANALYZE event')
+    op.execute('ANALYZE moment')
+
+    # 时光分析改为按宝宝缓存（kind 为 moments:<baby_id>），旧的整家摘要直接丢弃
+    op.execute("DELETE FROM ai_digest WHERE kind = 'moments'")
+
+
+def downgrade():
+    _drop_indexes('family_baby')
+    _create_indexes('family', ['family_id'])
+    op.execute("DELETE FROM ai_digest WHERE kind LIKE 'moments:%'")
@@ -0,0 +1,44 @@
+"""Moment updated_at for fragment caching, keyset feed indexes
+
+Revision ID: c3e5a7b9d014
+Revises: b2d4f6a8c012
+Create Date: 2026-10-19 14:20:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d014'
+down_revision = 'b2d4f6a8c012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 先以可空列加入，用发布时间回填后再加非空约束
+    with op.batch_alter_table('moment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE moment SET updated_at = timestamp WHERE updated_at IS NULL')
+    with op.batch_alter_table('moment', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    # 时光流改为 (timestamp, id) 倒序键集分页（同时修复上面重建表时丢失的索引属性），两个索引的 id 列都改为倒序以免额外排序
+    op.drop_index('idx_moment_user_favorite_ts', table_name='moment')
+    op.drop_index('idx_moment_user_ts', table_name='moment')
+    op.create_index('idx_moment_user_ts', 'moment', ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('idx_moment_user_favorite_ts', 'moment', ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+                    unique=False, sqlite_where=sa.text('is_favorite = 1'), postgresql_where=sa.text('is_favorite'))
+
+
+def downgrade():
+    # SQLite 的 batch 模式会重建表，反射回来的索引丢失倒序和部分索引条件，放在重建索引之前
+    with op.batch_alter_table('moment', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    op.drop_index('idx_moment_user_favorite_ts', table_name='moment')
+    op.drop_index('idx_moment_user_ts', table_name='moment')
+    op.create_index('idx_moment_user_ts', 'moment', ['user_id', sa.text('timestamp DESC'), 'id'], unique=False)
+    op.create_index('idx_moment_user_favorite_ts', 'moment', ['user_id', sa.text('timestamp DESC')], unique=False,
+                    sqlite_where=sa.text('is_favorite = 1'), postgresql_where=sa.text('is_favorite'))
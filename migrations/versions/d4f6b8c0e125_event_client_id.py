@@ -0,0 +1,35 @@
+"""Event client_id idempotency key for offline sync
+
+Revision ID: d4f6b8c0e125
+Revises: c3e5a7b9d014
+Create Date: 2026-10-19 15:42:08.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e125'
+down_revision = 'c3e5a7b9d014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 可空列可以直接 ADD COLUMN，不走 batch 重建表，避免丢失倒序索引
+    op.add_column('event', sa.Column('client_id', sa.String(length=36), nullable=True))
+    # 唯一索引中 NULL 互不冲突，表单提交的旧记录不受影响
+    op.create_index('uq_event_user_client_id', 'event', ['user_id', 'client_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_event_user_client_id', table_name='event')
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_column('client_id')
+
+    # batch 重建表后补回倒序索引
+    op.drop_index('idx_event_user_type_ts', table_name='event')
+    op.drop_index('idx_event_user_ts', table_name='event')
+    op.create_index('idx_event_user_type_ts', 'event', ['user_id', 'type', sa.text('timestamp DESC')], unique=False)
+    op.create_index('idx_event_user_ts', 'event', ['user_id', sa.text('timestamp DESC')], unique=False)
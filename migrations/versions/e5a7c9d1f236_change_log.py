@@ -0,0 +1,63 @@
+"""Per-user change log and sync revision for delta sync
+
+Revision ID: e5a7c9d1f236
+Revises: d4f6b8c0e125
+Create Date: 2026-10-19 17:05:31.214760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d1f236'
+down_revision = 'd4f6b8c0e125'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sync_revision',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.Column('pruned_revision', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=8), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'entity', 'entity_id', name='uq_change_log_entity'),
+    sa.UniqueConstraint('user_id', 'revision', name='uq_change_log_user_revision')
+    )
+
+    # 现有数据按时间顺序编号为各用户的初始版本
+    op.execute("""
+        INSERT INTO change_log (user_id, revision, entity, entity_id, op, changed_at)
+        SELECT user_id,
+               ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY ts, entity, entity_id),
+               entity, entity_id, 'upsert', CURRENT_TIMESTAMP
+        FROM (
+            SELECT user_id, 'event' AS entity, id AS entity_id, timestamp AS ts FROM event WHERE user_id IS NOT NULL
+            UNION ALL
+            SELECT user_id, 'moment' AS entity, id AS entity_id, timestamp AS ts FROM moment WHERE user_id IS NOT NULL
+        ) src
+    """)
+    op.execute("""
+        INSERT INTO sync_revision (user_id, revision, pruned_revision)
+        SELECT u.id, COALESCE(MAX(c.revision), 0), 0
+        FROM "user" u LEFT JOIN change_log c ON c.user_id = u.id
+        GROUP BY u.id
+    """)
+
+
+def downgrade():
+    op.drop_table('change_log')
+    op.drop_table('sync_revision')
@@ -0,0 +1,32 @@
+"""Event (timestamp, id) keyset indexes for paginated history
+
+Revision ID: f6b8d0e2a347
+Revises: e5a7c9d1f236
+Create Date: 2026-10-19 18:36:12.407581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0e2a347'
+down_revision = 'e5a7c9d1f236'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 历史记录改为 (timestamp, id) 倒序键集分页，索引末尾加 id 倒序，翻页不再需要额外排序
+    op.drop_index('idx_event_user_type_ts', table_name='event')
+    op.drop_index('idx_event_user_ts', table_name='event')
+    op.create_index('idx_event_user_type_ts', 'event', ['user_id', 'type', sa.text('timestamp DESC'), sa.text('id DESC')],
+                    unique=False)
+    op.create_index('idx_event_user_ts', 'event', ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_event_user_type_ts', table_name='event')
+    op.drop_index('idx_event_user_ts', table_name='event')
+    op.create_index('idx_event_user_type_ts', 'event', ['user_id', 'type', sa.text('timestamp DESC')], unique=False)
+    op.create_index('idx_event_user_ts', 'event', ['user_id', sa.text('timestamp DESC')], unique=False)
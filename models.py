@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timezone, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # 北京时区 (UTC+8)
 BEIJING_TZ = timezone(timedelta(hours=8))
@@ -28,17 +29,63 @@ class User(db.Model):
 	def __repr__(self):
 		return f'<User {self.email}>'
 
+class Family(db.Model):
+	"""家庭：成员共享宝宝资料、记录和时光；数据按 family_id 分区"""
+	id = db.Column(db.Integer, primary_key=True)
+	invite_code = db.Column(db.String(16), unique=True, nullable=False)  # 其他成员凭邀请码加入
+	created_at = db.Column(db.DateTime, nullable=False, default=beijing_now)
+
+	def __repr__(self):
+		return f'<Family {self.id}>'
+
+class FamilyMember(db.Model):
+	"""家庭成员：每个用户只属于一个家庭"""
+	id = db.Column(db.Integer, primary_key=True)
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
+	user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+	role = db.Column(db.String(10), nullable=False, default='member')  # 'owner' 或 'member'
+	joined_at = db.Column(db.DateTime, nullable=False, default=beijing_now)
+
+	__table_args__ = (
+		db.Index('idx_family_member_family', 'family_id', 'user_id'),
+	)
+
+class Baby(db.Model):
+	"""宝宝资料：一个家庭可以有多个宝宝；头像和封面是媒体目录下的相对路径"""
+	id = db.Column(db.Integer, primary_key=True)
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
+	user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # 创建者
+	name = db.Column(db.String(50), nullable=False, default='')
+	birth_date = db.Column(db.Date, nullable=True)
+	avatar_path = db.Column(db.String(255), nullable=True)
+	cover_path = db.Column(db.String(255), nullable=True)
+	created_at = db.Column(db.DateTime, nullable=False, default=beijing_now)
+	updated_at = db.Column(db.DateTime, nullable=False, default=beijing_now, onupdate=beijing_now)
+
+	__table_args__ = (
+		db.Index('idx_baby_family', 'family_id', 'id'),
+	)
+
+	def __repr__(self):
+		return f'<Baby {self.id} {self.name}>'
+
 class Event(db.Model):
 	id = db.Column(db.Integer, primary_key=True)
-	type = db.Column(db.String(20), nullable=False, index=True)  # 'feed' 或 'diaper' - 添加索引
+	type = db.Column(db.String(20), nullable=False)  # 'feed' 或 'diaper'
 	amount_ml = db.Column(db.Integer, nullable=True)
 	note = db.Column(db.Text, nullable=True, default='')
-	timestamp = db.Column(db.DateTime, nullable=False, default=beijing_now, index=True)  # 添加索引
-	user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+	timestamp = db.Column(db.DateTime, nullable=False, default=beijing_now)
+	user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # 记录人
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=True)  # 读取按家庭过滤
+	baby_id = db.Column(db.Integer, db.ForeignKey('baby.id'), nullable=True)  # 记录时选中的宝宝
+	client_id = db.Column(db.String(36), nullable=True)  # 离线客户端生成的幂等键
 
-	# 添加复合索引
+	# 复合索引与查询形状一致：先按家庭和选中的宝宝过滤，再按类型和 (时间, id) 倒序，历史记录键集分页无需排序（见 benchmarks/explain_check.py）
+	# 幂等键由各设备的发件箱生成，仍按记录人唯一
 	__table_args__ = (
-		db.Index('idx_event_type_timestamp', 'type', 'timestamp'),
+		db.Index('idx_event_family_baby_type_ts', 'family_id', 'baby_id', 'type', timestamp.desc(), id.desc()),
+		db.Index('idx_event_family_baby_ts', 'family_id', 'baby_id', timestamp.desc(), id.desc()),
+		db.Index('uq_event_user_client_id', 'user_id', 'client_id', unique=True),
 	)
 
 	def to_dict(self):
@@ -47,7 +94,10 @@ class Event(db.Model):
 			"type": self.type,
 			"amount_ml": self.amount_ml,
 			"note": self.note,
-			"timestamp": self.timestamp.isoformat()
+			"timestamp": self.timestamp.isoformat(),
+			"client_id": self.client_id,
+			"baby_id": self.baby_id,
+			"user_id": self.user_id
 		}
 
 class Moment(db.Model):
@@ -56,14 +106,18 @@ class Moment(db.Model):
 	image_path = db.Column(db.String(255), nullable=True)  # 图片路径
 	thumb_path = db.Column(db.String(255), nullable=True)  # 缩略图路径
 	video_path = db.Column(db.String(255), nullable=True)  # 视频路径
-	is_favorite = db.Column(db.Boolean, default=False, index=True)  # 是否收藏 - 添加索引
-	timestamp = db.Column(db.DateTime, nullable=False, default=beijing_now, index=True)  # 添加索引
-	user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+	is_favorite = db.Column(db.Boolean, default=False)  # 是否收藏
+	timestamp = db.Column(db.DateTime, nullable=False, default=beijing_now)
+	user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # 发布人
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=True)
+	baby_id = db.Column(db.Integer, db.ForeignKey('baby.id'), nullable=True)  # 发布时选中的宝宝
+	updated_at = db.Column(db.DateTime, nullable=False, default=beijing_now, onupdate=beijing_now)  # 卡片片段缓存键
 
-	# 添加复合索引
+	# 时光流按家庭、宝宝、(时间, id) 倒序键集分页；收藏只占少数，用部分索引
 	__table_args__ = (
-		db.Index('idx_moment_timestamp_favorite', 'timestamp', 'is_favorite'),
-		db.Index('idx_moment_content', 'content'),  # 为内容搜索添加索引
+		db.Index('idx_moment_family_baby_ts', 'family_id', 'baby_id', timestamp.desc(), id.desc()),
+		db.Index('idx_moment_family_baby_favorite_ts', 'family_id', 'baby_id', timestamp.desc(), id.desc(),
+			sqlite_where=db.text('is_favorite = 1'), postgresql_where=db.text('is_favorite')),
 	)
 	
 	def to_dict(self):
@@ -74,7 +128,45 @@ class Moment(db.Model):
 			"thumb_path": self.thumb_path,
 			"video_path": self.video_path,
 			"is_favorite": self.is_favorite,
-			"timestamp": self.timestamp.isoformat()
+			"baby_id": self.baby_id,
+			"user_id": self.user_id,
+			"timestamp": self.timestamp.isoformat(),
+			"updated_at": self.updated_at.isoformat() if self.updated_at else None
 		}
 
+class AIDigest(db.Model):
+	"""AI 分析摘要：按家庭预计算，记录所覆盖内容的水位线"""
+	id = db.Column(db.Integer, primary_key=True)
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
+	kind = db.Column(db.String(20), nullable=False)  # 摘要类型，如 'moments'
+	watermark = db.Column(db.String(64), nullable=False)  # 生成时覆盖内容的指纹
+	content = db.Column(db.Text, nullable=False)
+	updated_at = db.Column(db.DateTime, nullable=False, default=beijing_now, onupdate=beijing_now)
+
+	__table_args__ = (
+		db.UniqueConstraint('family_id', 'kind', name='uq_ai_digest_family_kind'),
+	)
+
+class SyncRevision(db.Model):
+	"""按家庭递增的数据版本号；写入方在同一事务中加锁递增，保证同一家庭的版本号按提交顺序单调。
+	也是家庭成员实时推送的频道：版本号变化即有新数据"""
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), primary_key=True)
+	revision = db.Column(db.Integer, nullable=False, default=0)
+	pruned_revision = db.Column(db.Integer, nullable=False, default=0)  # 早于此版本的删除记录已清理
+
+class ChangeLog(db.Model):
+	"""变更日志：每个实体只保留最近一次变更（删除后留作墓碑），按版本号增量下发"""
+	id = db.Column(db.Integer, primary_key=True)
+	family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
+	revision = db.Column(db.Integer, nullable=False)
+	entity = db.Column(db.String(16), nullable=False)  # 'event' 或 'moment'
+	entity_id = db.Column(db.Integer, nullable=False)
+	op = db.Column(db.String(8), nullable=False)  # 'upsert' 或 'delete'
+	changed_at = db.Column(db.DateTime, nullable=False, default=beijing_now)
+
+	__table_args__ = (
+		db.UniqueConstraint('family_id', 'entity', 'entity_id', name='uq_change_log_entity'),
+		db.UniqueConstraint('family_id', 'revision', name='uq_change_log_family_revision'),
+	)
+
 # 已移除SMSReminder模型
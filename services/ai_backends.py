@@ -0,0 +1,406 @@
+"""
+AI 后端注册表
+各后端（mock / ollama / openai / stub）实现统一的 generate / stream / health_check 接口，
+在 create_app 中按配置解析一次；主后端故障或超时时自动降级到 mock，冷却后再探测恢复。
+"""
+import json
+import threading
+import time
+from typing import Dict, Iterator, Tuple, Type
+from flask import current_app
+from services.mock_ai import get_engine as get_mock_engine
+from utils.cache import get_cache
+from utils.lazy_imports import openai, requests
+from utils import metrics
+
+FAST_SYSTEM_PROMPT = """你是育儿助手。请用简洁、实用的语言回答育儿问题。回答要简短（100字以内），直接给出3-5个要点建议。用中文回答。"""
+
+FULL_SYSTEM_PROMPT = """你是一个专业的育儿助手，专门帮助新手父母解决育儿问题。请用温暖、专业、易懂的语言回答育儿相关问题。
+
+            你的回答应该：
+            1. 基于科学的育儿知识
+            2. 考虑宝宝的安全和健康
+            3. 提供实用的建议
+            4. 用温和、鼓励的语气
+            5. 如果涉及医疗问题，建议咨询专业医生
+
+            请用中文回答，语言要亲切自然。"""
+
+
+class AIBackendError(Exception):
+    """AI 后端调用失败"""
+
+
+def _full_prompt(prompt: str, context: str) -> str:
+    if context:
+        return f"上下文信息：{context}\n\n用户问题：{prompt}"
+    return prompt
+
+
+class AIBackend:
+    """AI 后端基类"""
+    name = 'base'
+
+    def __init__(self, config: dict):
+        self.config = config
+
+    def generate(self, prompt: str, system_prompt: str = '', context: str = '') -> str:
+        raise NotImplementedError
+
+    def generate_checked(self, prompt: str, system_prompt: str = '', context: str = '') -> Tuple[str, bool]:
+        """同 generate，另返回回答是否来自降级后的备用后端"""
+        return self.generate(prompt, system_prompt, context), False
+
+    def stream(self, prompt: str, system_prompt: str = '', context: str = '') -> Iterator[str]:
+        """流式输出；默认一次性返回完整回答"""
+        yield self.generate(prompt, system_prompt, context)
+
+    def health_check(self) -> bool:
+        return True
+
+    def status(self) -> dict:
+        return {'backend': self.name}
+
+
+class MockBackend(AIBackend):
+    """规则引擎模拟回答"""
+    name = 'mock'
+
+    def generate(self, prompt: str, system_prompt: str = '', context: str = '') -> str:
+        # 只匹配用户问题，避免上下文里的统计词干扰分类
+        return get_mock_engine().answer(prompt)
+
+    def stream(self, prompt: str, system_prompt: str = '', context: str = '') -> Iterator[str]:
+        for line in self.generate(prompt, system_prompt, context).splitlines(keepends=True):
+            yield line
+
+
+class StubBackend(AIBackend):
+    """本地桩后端：立即返回固定格式的回答，用于开发和压测"""
+    name = 'stub'
+
+    def generate(self, prompt: str, system_prompt: str = '', context: str = '') -> str:
+        return f"[stub] 已收到问题：{prompt[:50]}"
+
+    def stream(self, prompt: str, system_prompt: str = '', context: str = '') -> Iterator[str]:
+        for word in self.generate(prompt, system_prompt, context).split(' '):
+            yield word + ' '
+
+
+class OllamaBackend(AIBackend):
+    """Ollama 本地模型（复用连接，回答按提示缓存）"""
+    name = 'ollama'
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.base_url = config.get('OLLAMA_BASE_URL', 'http://localhost:11434').rstrip('/')
+        self.model = config.get('OLLAMA_MODEL', 'gemma3:1b')
+        self.timeout = (config.get('AI_CONNECT_TIMEOUT', 2), config.get('AI_TIMEOUT', 15))
+        self._session = None
+        self._cache = get_cache('ai_responses', timeout=config.get('AI_RESPONSE_CACHE_SECONDS', 3600))
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def _payload(self, prompt: str, system_prompt: str, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "prompt": f"{system_prompt}\n\n{prompt}",
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "max_tokens": 300,  # 限制回答长度，提高速度
+                "num_predict": 200,  # 预测token数量
+                "repeat_penalty": 1.1,
+                "stop": ["\n\n", "用户:", "问题:"]
+            }
+        }
+
+    def generate(self, prompt: str, system_prompt: str = '', context: str = '') -> str:
+        full_prompt = _full_prompt(prompt, context)
+        cache_key = (self.model, system_prompt, full_prompt)
+        cached = self._cache.get(cache_key)
+        if cached:
+            return f"[缓存回答] {cached}"
+        try:
+            response = self.session.post(f"{self.base_url}/api/generate",
+                                         json=self._payload(full_prompt, system_prompt, False),
+                                         timeout=self.timeout)
+        except Exception as exc:
+            raise AIBackendError(f"无法连接到Ollama服务：{exc}") from exc
+        if response.status_code != 200:
+            raise AIBackendError(f"Ollama服务错误：{response.status_code}")
+        answer = response.json().get('response') or '抱歉，无法生成回答。'
+        self._cache.set(cache_key, answer)
+        return answer
+
+    def stream(self, prompt: str, system_prompt: str = '', context: str = '') -> Iterator[str]:
+        try:
+            response = self.session.post(f"{self.base_url}/api/generate",
+                                         json=self._payload(_full_prompt(prompt, context), system_prompt, True),
+                                         timeout=self.timeout, stream=True)
+        except Exception as exc:
+            raise AIBackendError(f"无法连接到Ollama服务：{exc}") from exc
+        if response.status_code != 200:
+            raise AIBackendError(f"Ollama服务错误：{response.status_code}")
+        with response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+
+    def health_check(self) -> bool:
+        try:
+            resp = self.session.get(f"{self.base_url}/api/tags", timeout=self.timeout[0])
+            return resp.status_code == 200
+        except Exception:
+            return False
+
+
+class OpenAIBackend(AIBackend):
+    """OpenAI（或兼容 OpenAI 协议的服务）"""
+    name = 'openai'
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.model = config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = openai.OpenAI(
+                api_key=self.config.get('OPENAI_API_KEY') or None,
+                base_url=self.config.get('OPENAI_BASE_URL') or None,
+                timeout=self.config.get('AI_TIMEOUT', 15),
+                max_retries=0,
+            )
+        return self._client
+
+    def _messages(self, prompt: str, system_prompt: str, context: str) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": _full_prompt(prompt, context)}
+        ]
+
+    def generate(self, prompt: str, system_prompt: str = '', context: str = '') -> str:
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system_prompt, context),
+                max_tokens=500,
+                temperature=0.7
+            )
+        except Exception as exc:
+            raise AIBackendError(f"OpenAI调用失败：{exc}") from exc
+        return response.choices[0].message.content.strip()
+
+    def stream(self, prompt: str, system_prompt: str = '', context: str = '') -> Iterator[str]:
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system_prompt, context),
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            )
+        except Exception as exc:
+            raise AIBackendError(f"OpenAI调用失败：{exc}") from exc
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    def health_check(self) -> bool:
+        try:
+            self.client.models.list()
+            return True
+        except Exception:
+            return False
+
+
+class FallbackBackend(AIBackend):
+    """故障降级包装：主后端失败后在冷却期内直接走备用后端"""
+
+    def __init__(self, primary: AIBackend, fallback: AIBackend, cooldown: float = 60):
+        super().__init__(primary.config)
+        self.primary = primary
+        self.fallback = fallback
+        self.cooldown = cooldown
+        self.name = primary.name
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    def _primary_available(self) -> bool:
+        with self._lock:
+            if self._down_until == 0.0:
+                return True
+            if time.monotonic() < self._down_until:
+                return False
+            # 冷却结束：先做一次轻量健康检查，避免真实请求再等一个完整超时
+            self._down_until = time.monotonic() + self.cooldown
+        if self.primary.health_check():
+            self._mark_up()
+            return True
+        return False
+
+    def _mark_down(self, exc: Exception) -> None:
+        with self._lock:
+            self._down_until = time.monotonic() + self.cooldown
+        metrics.AI_FALLBACKS.inc(backend=self.primary.name)
+        try:
+            current_app.logger.warning('AI 后端 %s 不可用，%s 秒内降级到 %s：%s',
+                                       self.primary.name, self.cooldown, self.fallback.name, exc)
+        except RuntimeError:
+            pass
+
+    def _mark_up(self) -> None:
+        with self._lock:
+            self._down_until = 0.0
+
+    def generate(self, prompt: str, system_prompt: str = '', context: str = '') -> str:
+        return self.generate_checked(prompt, system_prompt, context)[0]
+
+    def generate_checked(self, prompt: str, system_prompt: str = '', context: str = '') -> Tuple[str, bool]:
+        if self._primary_available():
+            try:
+                return self.primary.generate(prompt, system_prompt, context), False
+            except Exception as exc:
+                self._mark_down(exc)
+        return self.fallback.generate(prompt, system_prompt, context), True
+
+    def stream(self, prompt: str, system_prompt: str = '', context: str = '') -> Iterator[str]:
+        if self._primary_available():
+            started = False
+            try:
+                for chunk in self.primary.stream(prompt, system_prompt, context):
+                    started = True
+                    yield chunk
+                return
+            except Exception as exc:
+                self._mark_down(exc)
+                if started:
+                    return
+        yield from self.fallback.stream(prompt, system_prompt, context)
+
+    def health_check(self) -> bool:
+        healthy = self.primary.health_check()
+        if healthy:
+            self._mark_up()
+        return healthy
+
+    def status(self) -> dict:
+        with self._lock:
+            degraded = self._down_until != 0.0
+        return {
+            'backend': self.primary.name,
+            'fallback': self.fallback.name,
+            'degraded': degraded,
+            'active': self.fallback.name if degraded else self.primary.name,
+        }
+
+
+BACKENDS: Dict[str, Type[AIBackend]] = {
+    'mock': MockBackend,
+    'stub': StubBackend,
+    'ollama': OllamaBackend,
+    'openai': OpenAIBackend,
+}
+
+
+def register_backend(name: str, backend_cls: Type[AIBackend]) -> None:
+    """注册自定义后端"""
+    BACKENDS[name] = backend_cls
+
+
+def create_backend(config: dict) -> AIBackend:
+    """按配置创建后端；非 mock 后端自动包装降级逻辑，未注册的名称在启动时报错"""
+    name = (config.get('AI_MODEL_TYPE') or 'mock').lower()
+    backend_cls = BACKENDS.get(name)
+    if backend_cls is None:
+        # 拼错的名称不能悄悄退回 mock，否则线上一直给出模拟回答却没人察觉
+        raise ValueError(f'未知的 AI_MODEL_TYPE：{name}（可选 {" / ".join(sorted(BACKENDS))}）')
+    backend = backend_cls(config)
+    if backend_cls in (MockBackend, StubBackend):
+        return backend
+    return FallbackBackend(backend, MockBackend(config), cooldown=config.get('AI_FALLBACK_COOLDOWN', 60))
+
+
+def init_app(app) -> AIBackend:
+    """在应用工厂中解析一次 AI 后端"""
+    backend = create_backend(app.config)
+    app.extensions['ai_backend'] = backend
+    return backend
+
+
+def get_backend() -> AIBackend:
+    """获取当前应用的 AI 后端"""
+    backend = current_app.extensions.get('ai_backend')
+    if backend is None:
+        backend = init_app(current_app)
+    return backend
+
+
+def system_prompt() -> str:
+    """按配置选择系统提示"""
+    return FAST_SYSTEM_PROMPT if current_app.config.get('AI_FAST_MODE', True) else FULL_SYSTEM_PROMPT
+
+
+def _active_name(backend: AIBackend) -> str:
+    return backend.status().get('active', backend.name)
+
+
+def generate(prompt: str, context: str = '') -> str:
+    """使用当前后端生成回答，失败时抛出异常"""
+    return generate_checked(prompt, context)[0]
+
+
+def generate_checked(prompt: str, context: str = '') -> Tuple[str, bool]:
+    """同 generate，另返回回答是否来自降级后的备用后端（要持久化结果的调用方据此跳过保存）"""
+    backend = get_backend()
+    name = _active_name(backend)
+    started = time.perf_counter()
+    outcome = 'error'
+    metrics.AI_IN_FLIGHT.inc()
+    try:
+        result = backend.generate_checked(prompt, system_prompt(), context)
+        outcome = 'ok'
+        return result
+    finally:
+        metrics.AI_IN_FLIGHT.dec()
+        metrics.AI_REQUEST_DURATION.observe(time.perf_counter() - started, backend=name,
+                                            operation='generate', outcome=outcome)
+
+
+def stream(prompt: str, context: str = '') -> Iterator[str]:
+    """使用当前后端流式生成回答"""
+    backend = get_backend()
+    chunks = backend.stream(prompt, system_prompt(), context)
+
+    def timed() -> Iterator[str]:
+        name = _active_name(backend)
+        started = time.perf_counter()
+        first = True
+        outcome = 'error'
+        metrics.AI_IN_FLIGHT.inc()
+        try:
+            for chunk in chunks:
+                if first:
+                    metrics.AI_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started, backend=name)
+                    first = False
+                yield chunk
+            outcome = 'ok'
+        finally:
+            metrics.AI_IN_FLIGHT.dec()
+            metrics.AI_REQUEST_DURATION.observe(time.perf_counter() - started, backend=name,
+                                                operation='stream', outcome=outcome)
+
+    return timed()
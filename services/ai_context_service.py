@@ -0,0 +1,122 @@
+"""
+AI 上下文服务
+从事件历史中用聚合查询计算当前宝宝的喂养统计摘要，供 AI 提示使用。
+摘要大小固定，不随历史增长；缓存键为 (家庭, 宝宝, 家庭同步版本号)：任何 worker 写入事件都会推进
+数据库中的版本号（见 ChangeLogService），其他 worker 下次读取时自然换用新键，无需跨进程失效。
+宝宝月龄取自会话中选中的宝宝，不进缓存。
+"""
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import func, case, select
+from models import db, Event, BEIJING_TZ
+from services.baby_service import BabyService
+from services.change_log_service import ChangeLogService
+from utils.cache import get_cache
+from utils.time_utils import beijing_now, calc_age_months
+
+# 滑动窗口随时间推移，缓存同时设置较短的过期时间；旧版本号的条目到期后自然淘汰
+_summary_cache = get_cache('ai_context', timeout=300)
+
+
+def _aware(ts):
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=BEIJING_TZ)
+    return ts
+
+
+class AIContextService:
+    """AI 上下文服务类"""
+
+    @staticmethod
+    def get_feeding_summary(family_id: int, baby_id: Optional[int]) -> dict:
+        """获取某个宝宝的喂养统计摘要（带缓存）"""
+        # 先读版本号再计算：计算期间有新写入时结果记在旧版本号下，不会被当作新数据复用
+        key = (family_id, baby_id, ChangeLogService.current_revision(family_id))
+        summary = _summary_cache.get(key)
+        if summary is None:
+            summary = AIContextService.compute_feeding_summary(family_id, baby_id)
+            _summary_cache.set(key, summary)
+        return summary
+
+    @staticmethod
+    def compute_feeding_summary(family_id: int, baby_id: Optional[int]) -> dict:
+        """用一次聚合查询计算 24 小时 / 7 天的喂养与换尿布统计
+
+        日均值按实际覆盖的天数计算：从宝宝最早一条记录到现在，限制在 1~7 天之间，
+        刚开始记录的几天不会被按 7 天摊薄。
+        """
+        now = beijing_now()
+        since_24h = now - timedelta(hours=24)
+        since_7d = now - timedelta(days=7)
+        is_feed = Event.type == 'feed'
+        is_diaper = Event.type == 'diaper'
+        in_24h = Event.timestamp >= since_24h
+        in_baby = BabyService.in_baby(Event, family_id, baby_id)
+        first_record = select(func.min(Event.timestamp)).where(in_baby).scalar_subquery()
+
+        row = db.session.query(
+            func.count(case((is_feed & in_24h, Event.id))),
+            func.coalesce(func.sum(case((is_feed & in_24h, Event.amount_ml))), 0),
+            func.count(case((is_feed, Event.id))),
+            func.coalesce(func.sum(case((is_feed, Event.amount_ml))), 0),
+            func.min(case((is_feed, Event.timestamp))),
+            func.max(case((is_feed, Event.timestamp))),
+            func.count(case((is_diaper & in_24h, Event.id))),
+            func.count(case((is_diaper, Event.id))),
+            first_record,
+        ).filter(
+            in_baby,
+            Event.timestamp >= since_7d,
+        ).one()
+
+        (feed_count_24h, feed_ml_24h, feed_count_7d, feed_ml_7d,
+         first_feed, last_feed, diaper_count_24h, diaper_count_7d, first_record) = row
+
+        first_record = _aware(first_record)
+        days = (now - first_record).total_seconds() / 86400 if first_record else 7
+        days = min(7.0, max(1.0, days))
+
+        # 平均喂奶间隔：7 天内首末两次之间的跨度除以间隔数
+        avg_interval_min = None
+        first_feed, last_feed = _aware(first_feed), _aware(last_feed)
+        if feed_count_7d and feed_count_7d > 1 and first_feed and last_feed:
+            avg_interval_min = int((last_feed - first_feed).total_seconds() // 60 // (feed_count_7d - 1))
+        minutes_since_feed = int((now - last_feed).total_seconds() // 60) if last_feed else None
+
+        return {
+            'feed_count_24h': int(feed_count_24h or 0),
+            'feed_ml_24h': int(feed_ml_24h or 0),
+            'feed_count_7d': int(feed_count_7d or 0),
+            'feed_ml_7d_daily_avg': int((feed_ml_7d or 0) / days),
+            'feed_interval_avg_min': avg_interval_min,
+            'minutes_since_last_feed': minutes_since_feed,
+            'diaper_count_24h': int(diaper_count_24h or 0),
+            'diaper_per_day_7d': round((diaper_count_7d or 0) / days, 1),
+        }
+
+    @staticmethod
+    def format_summary(summary: dict, age: Optional[int] = None) -> str:
+        """把摘要格式化为简短的提示上下文"""
+        lines = [f"宝宝月龄：{age}个月" if age is not None else "宝宝月龄：未知"]
+        lines.append(f"近24小时喂奶：{summary['feed_count_24h']}次，共{summary['feed_ml_24h']}ml")
+        lines.append(f"近7天喂奶：共{summary['feed_count_7d']}次，日均{summary['feed_ml_7d_daily_avg']}ml")
+        if summary.get('feed_interval_avg_min') is not None:
+            lines.append(f"平均喂奶间隔：{summary['feed_interval_avg_min']}分钟")
+        if summary.get('minutes_since_last_feed') is not None:
+            lines.append(f"距上次喂奶：{summary['minutes_since_last_feed']}分钟")
+        lines.append(f"近24小时换尿布：{summary['diaper_count_24h']}次，近7天日均{summary['diaper_per_day_7d']}次")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def build_context(family_id: Optional[int], baby_id: Optional[int] = None) -> str:
+        """构建当前宝宝的 AI 提示上下文；未登录时没有宝宝资料"""
+        if not family_id:
+            return "宝宝月龄：未知"
+        return AIContextService.format_summary(AIContextService.get_feeding_summary(family_id, baby_id),
+                                               AIContextService._baby_age_months())
+
+    @staticmethod
+    def _baby_age_months() -> Optional[int]:
+        """当前会话选中宝宝的月龄，未设置生日时为 None"""
+        baby = BabyService.current()
+        return calc_age_months(baby.birth_date) if baby and baby.birth_date else None
@@ -0,0 +1,177 @@
+"""
+AI 分析摘要服务
+按宝宝预计算时光分析结果（kind 为 `moments:<baby_id>`）并记录其覆盖内容的水位线：
+新时光写入后在后台防抖刷新，接口直接返回已存摘要，只有内容变化时才重新生成。
+"""
+import hashlib
+import threading
+from typing import Callable, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import event
+from models import db, Moment, AIDigest
+from services import ai_backends
+from services.baby_service import BabyService
+
+MOMENTS_DIGEST_KIND = 'moments'
+ANALYZE_WINDOW = 10  # 参与分析的最近时光条数
+
+
+class Debouncer:
+    """按键防抖：同一键在延迟内重复触发只执行最后一次"""
+
+    def __init__(self):
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, key, delay: float, fn: Callable, *args) -> None:
+        with self._lock:
+            old = self._timers.pop(key, None)
+            if old:
+                old.cancel()
+            timer = threading.Timer(delay, self._run, (key, fn, args))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def _run(self, key, fn: Callable, args: tuple) -> None:
+        with self._lock:
+            self._timers.pop(key, None)
+        fn(*args)
+
+    def pending(self) -> int:
+        """等待执行的任务数"""
+        with self._lock:
+            return len(self._timers)
+
+
+_debouncer = Debouncer()
+
+
+class AIDigestService:
+    """AI 分析摘要服务类"""
+
+    @staticmethod
+    def digest_kind(baby_id: Optional[int]) -> str:
+        return f'{MOMENTS_DIGEST_KIND}:{baby_id}'
+
+    @staticmethod
+    def recent_moments(family_id: int, baby_id: Optional[int]) -> List[Moment]:
+        """获取宝宝最近参与分析的时光"""
+        return (
+            BabyService.scoped(Moment, family_id, baby_id)
+            .order_by(Moment.timestamp.desc())
+            .limit(ANALYZE_WINDOW)
+            .all()
+        )
+
+    @staticmethod
+    def compute_watermark(moments: List[Moment]) -> str:
+        """计算时光内容指纹，内容、媒体或条目变化都会改变水位线"""
+        h = hashlib.sha1()
+        for m in moments:
+            h.update(f"{m.id}|{m.timestamp.isoformat()}|{bool(m.image_path)}|{bool(m.video_path)}|".encode())
+            h.update((m.content or '').encode())
+            h.update(b'\x00')
+        return h.hexdigest()
+
+    @staticmethod
+    def build_prompt(moments: List[Moment]) -> str:
+        """构建分析提示"""
+        parts = []
+        for m in moments:
+            lines = [
+                f"时间：{m.timestamp.strftime('%Y-%m-%d %H:%M')}",
+                f"内容：{m.content}",
+            ]
+            if m.image_path:
+                lines.append("包含图片")
+            if m.video_path:
+                lines.append("包含视频")
+            lines.append("---")
+            parts.append('\n'.join(lines))
+        moments_text = '\n'.join(parts) + '\n'
+        return f"请分析以下宝宝的成长记录，提供专业的观察和建议：\n\n{moments_text}"
+
+    @staticmethod
+    def get_digest(family_id: int, baby_id: Optional[int]) -> Tuple[str, bool]:
+        """获取时光分析摘要，返回 (内容, 是否命中已存摘要)"""
+        moments = AIDigestService.recent_moments(family_id, baby_id)
+        if not moments:
+            return "暂无时光记录可供分析", True
+
+        watermark = AIDigestService.compute_watermark(moments)
+        digest = AIDigest.query.filter_by(family_id=family_id, kind=AIDigestService.digest_kind(baby_id)).first()
+        if digest and digest.watermark == watermark:
+            return digest.content, True
+
+        content = AIDigestService._generate_and_store(family_id, baby_id, moments, watermark, digest)
+        return content, False
+
+    @staticmethod
+    def refresh(family_id: int, baby_id: Optional[int]) -> Optional[str]:
+        """内容变化时重新生成摘要；无变化则直接返回"""
+        moments = AIDigestService.recent_moments(family_id, baby_id)
+        if not moments:
+            return None
+        watermark = AIDigestService.compute_watermark(moments)
+        digest = AIDigest.query.filter_by(family_id=family_id, kind=AIDigestService.digest_kind(baby_id)).first()
+        if digest and digest.watermark == watermark:
+            return digest.content
+        return AIDigestService._generate_and_store(family_id, baby_id, moments, watermark, digest)
+
+    @staticmethod
+    def schedule_refresh(family_id: int, baby_id: Optional[int], delay: Optional[float] = None) -> None:
+        """在后台防抖刷新摘要（连续发布多条时光只生成一次）"""
+        if not family_id:
+            return
+        app = current_app._get_current_object()
+        if delay is None:
+            delay = app.config.get('AI_DIGEST_DEBOUNCE_SECONDS', 30)
+        _debouncer.schedule((family_id, baby_id), delay, _refresh_in_background, app, family_id, baby_id)
+
+    @staticmethod
+    def pending_refreshes() -> int:
+        """等待刷新的摘要数"""
+        return _debouncer.pending()
+
+    @staticmethod
+    def _generate_and_store(family_id: int, baby_id: Optional[int], moments: List[Moment], watermark: str,
+                            digest: Optional[AIDigest]) -> str:
+        # 生成失败直接抛出，避免把错误信息当作摘要存下来；主后端故障时的备用回答只返回不保存，
+        # 否则主后端恢复后仍会一直命中这份模拟摘要，直到时光再次变化
+        content, degraded = ai_backends.generate_checked(AIDigestService.build_prompt(moments))
+        if degraded:
+            return content
+        try:
+            if digest is None:
+                digest = AIDigest(family_id=family_id, kind=AIDigestService.digest_kind(baby_id))
+                db.session.add(digest)
+            digest.watermark = watermark
+            digest.content = content
+            db.session.commit()
+        except Exception:
+            # 并发生成时唯一约束可能冲突，结果仍可返回
+            db.session.rollback()
+        return content
+
+
+def _refresh_in_background(app, family_id: int, baby_id: Optional[int]) -> None:
+    with app.app_context():
+        try:
+            AIDigestService.refresh(family_id, baby_id)
+        except Exception as exc:
+            app.logger.warning('AI 摘要刷新失败 family=%s baby=%s: %s', family_id, baby_id, exc)
+        finally:
+            db.session.remove()
+
+
+def _on_moment_change(mapper, connection, target):
+    try:
+        AIDigestService.schedule_refresh(target.family_id, target.baby_id)
+    except RuntimeError:
+        # 无应用上下文（如离线脚本）时跳过后台刷新
+        pass
+
+
+for _evt in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Moment, _evt, _on_moment_change)
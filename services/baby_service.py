@@ -0,0 +1,137 @@
+"""
+宝宝资料服务
+宝宝属于家庭，家庭成员共享资料；一个家庭可以有多个宝宝，存在 baby 表中。
+当前选中的宝宝记在各自的会话里，新记录和时光都标记到该宝宝；首页、历史、图表、时光和 AI
+上下文只读取当前宝宝的数据（`in_baby` / `scoped`，对应 (family_id, baby_id, ...) 复合索引）。
+头像、封面转为 WebP 写入媒体目录（与时光媒体同一目录，文件名唯一，长期缓存），替换后删除旧文件。
+同一请求内多次读取资料只查一次库，结果缓存在 flask.g 上。
+"""
+import os
+import uuid
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from flask import current_app, g, has_request_context, session
+from sqlalchemy import and_
+from models import db, Baby
+from services.family_service import FamilyService
+from utils.lazy_imports import PIL_Image as Image
+
+MEDIA_DIR = 'moments'
+SESSION_BABY_ID = 'baby_id'
+NAME_MAX_LENGTH = 50
+# (最大宽度, WebP 质量)；头像居中裁成正方形
+MEDIA_SIZES = {'avatar': (512, 85), 'cover': (1920, 85)}
+
+
+class BabyService:
+    """宝宝资料服务类"""
+
+    @staticmethod
+    def list_for_family(family_id: int) -> List[Baby]:
+        """家庭的全部宝宝，按创建顺序"""
+        return FamilyService.scoped(Baby, family_id).order_by(Baby.id).all()
+
+    @staticmethod
+    def current(user_id: Optional[int] = None) -> Optional[Baby]:
+        """当前宝宝：请求内取会话中选中的那个（无效时取第一个），请求外取用户所在家庭的第一个"""
+        family_id = FamilyService.current_id(user_id)
+        if not family_id:
+            return None
+        if not has_request_context():
+            return FamilyService.scoped(Baby, family_id).order_by(Baby.id).first()
+        cache = g.setdefault('babies', {})
+        if family_id not in cache:
+            cache[family_id] = BabyService.list_for_family(family_id)
+        babies = cache[family_id]
+        selected = session.get(SESSION_BABY_ID)
+        return next((b for b in babies if b.id == selected), babies[0] if babies else None)
+
+    @staticmethod
+    def current_id(user_id: Optional[int] = None) -> Optional[int]:
+        baby = BabyService.current(user_id)
+        return baby.id if baby else None
+
+    @staticmethod
+    def current_scope(user_id: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+        """读取范围 (family_id, baby_id)：当前用户所在家庭和选中的宝宝，未登录时为 (None, None)"""
+        return FamilyService.current_id(user_id), BabyService.current_id(user_id)
+
+    @staticmethod
+    def in_baby(model, family_id: Optional[int], baby_id: Optional[int]):
+        """某个宝宝的数据条件（家庭条件加 baby_id）；没有宝宝时恒假，不会退回整个家庭"""
+        if not baby_id:
+            return db.false()
+        return and_(FamilyService.in_family(model, family_id), model.baby_id == baby_id)
+
+    @staticmethod
+    def scoped(model, family_id: Optional[int], baby_id: Optional[int]):
+        """某个宝宝的数据查询"""
+        return model.query.filter(BabyService.in_baby(model, family_id, baby_id))
+
+    @staticmethod
+    def select(user_id: int, baby_id: int) -> bool:
+        """切换当前宝宝，不属于用户所在家庭时返回 False"""
+        if not FamilyService.owned(Baby, baby_id, FamilyService.current_id(user_id)):
+            return False
+        session[SESSION_BABY_ID] = baby_id
+        BabyService._forget()
+        return True
+
+    @staticmethod
+    def parse_birth(value: str) -> Optional[date]:
+        """解析 YYYY-MM-DD；空值返回 None，格式不对抛出 ValueError"""
+        value = (value or '').strip()
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+    @staticmethod
+    def create(user_id: int, name: str = '', birth_date: Optional[date] = None) -> Baby:
+        """在用户所在家庭中新增宝宝（不提交）"""
+        baby = Baby(family_id=FamilyService.current_id(user_id), user_id=user_id,
+                    name=name.strip()[:NAME_MAX_LENGTH], birth_date=birth_date)
+        db.session.add(baby)
+        BabyService._forget()
+        return baby
+
+    @staticmethod
+    def update(baby: Baby, name: str, birth_date: Optional[date]) -> None:
+        """修改昵称和生日并提交"""
+        baby.name = name.strip()[:NAME_MAX_LENGTH]
+        baby.birth_date = birth_date
+        db.session.commit()
+        BabyService._forget()
+
+    @staticmethod
+    def save_media(baby: Baby, kind: str, stream) -> str:
+        """把上传的头像 / 封面转为 WebP 写入媒体目录并记录到宝宝资料，提交后删除旧文件"""
+        max_width, quality = MEDIA_SIZES[kind]
+        img = Image.open(stream).convert('RGB')
+        if kind == 'avatar':
+            side = min(img.width, img.height)
+            left, top = (img.width - side) // 2, (img.height - side) // 2
+            img = img.crop((left, top, left + side, top + side))
+        if img.width > max_width:
+            img = img.resize((max_width, int(img.height * max_width / img.width)), Image.LANCZOS)
+
+        static_root = current_app.static_folder or 'static'
+        os.makedirs(os.path.join(static_root, MEDIA_DIR), exist_ok=True)
+        rel_path = f'{MEDIA_DIR}/baby{baby.id}_{kind}_{uuid.uuid4().hex[:12]}.webp'
+        img.save(os.path.join(static_root, rel_path), format='WEBP', quality=quality)
+
+        field = f'{kind}_path'
+        old_path = getattr(baby, field)
+        setattr(baby, field, rel_path)
+        db.session.commit()
+        BabyService._forget()
+        if old_path and old_path.startswith(f'{MEDIA_DIR}/baby{baby.id}_'):
+            try:
+                os.remove(os.path.join(static_root, old_path))
+            except OSError:
+                pass
+        return rel_path
+
+    @staticmethod
+    def _forget() -> None:
+        """丢弃本请求内缓存的资料"""
+        if has_request_context():
+            g.pop('babies', None)
+            g.pop('profile_context', None)
@@ -0,0 +1,237 @@
+"""
+变更日志服务
+Event / Moment 的每次新增、修改、删除都在同一事务中给所属家庭的版本号加一，并把该实体在
+change_log 中的记录改写为最新版本（删除时留下墓碑）。客户端保存上次拿到的版本号，
+`/api/changes?since=` 只返回之后变化过的实体，本地镜像按差异更新即可。
+家庭的版本号同时是实时推送的频道：`/api/changes/stream` 在版本号变化时通知所有成员（见 change_stream_service）。
+"""
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, event, func, insert, inspect, select, text, update
+from sqlalchemy.orm import attributes
+from models import db, Event, Moment, ChangeLog, SyncRevision
+from utils.time_utils import beijing_now
+
+ENTITIES = {'event': Event, 'moment': Moment}
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+_log = ChangeLog.__table__
+_rev = SyncRevision.__table__
+
+# 用当前全部数据重建变更日志；新版本号接在家庭原有版本号之后
+_REBUILD_SQL = """
+INSERT INTO change_log (family_id, revision, entity, entity_id, op, changed_at)
+SELECT src.family_id,
+       COALESCE(r.revision, 0) + ROW_NUMBER() OVER (PARTITION BY src.family_id ORDER BY src.ts, src.entity, src.entity_id),
+       src.entity, src.entity_id, 'upsert', :now
+FROM (
+    SELECT family_id, 'event' AS entity, id AS entity_id, timestamp AS ts FROM event WHERE family_id IS NOT NULL
+    UNION ALL
+    SELECT family_id, 'moment' AS entity, id AS entity_id, timestamp AS ts FROM moment WHERE family_id IS NOT NULL
+) src
+LEFT JOIN sync_revision r ON r.family_id = src.family_id
+{where}
+"""
+
+
+def _bump(connection, family_id: int, count: int) -> int:
+    """把家庭版本号加 count 并返回新值；UPDATE 持有行锁直到事务结束，同一家庭的写入因此串行提交"""
+    new = connection.execute(
+        update(_rev).where(_rev.c.family_id == family_id)
+        .values(revision=_rev.c.revision + count).returning(_rev.c.revision)
+    ).scalar()
+    if new is None:
+        # 还没有版本行的家庭
+        connection.execute(insert(_rev).values(family_id=family_id, revision=count, pruned_revision=0))
+        new = count
+    return new
+
+
+class ChangeLogService:
+    """变更日志服务类"""
+
+    @staticmethod
+    def record(connection, family_id: int, entity: str, entity_ids: Sequence[int], op: str,
+               replace: bool = True) -> int:
+        """在当前事务中登记一批实体的变更，返回最后一个版本号
+
+        ORM 写入由监听器自动调用；绕过 ORM 的批量写入（如离线同步）需要手动调用，
+        刚插入的实体没有旧记录，可以传 replace=False 省掉一次删除。
+        """
+        if not entity_ids:
+            return ChangeLogService.current_revision(family_id, connection)
+        last = _bump(connection, family_id, len(entity_ids))
+        first = last - len(entity_ids) + 1
+        now = beijing_now()
+        if replace:
+            connection.execute(delete(_log).where(
+                _log.c.family_id == family_id, _log.c.entity == entity, _log.c.entity_id.in_(list(entity_ids))))
+        connection.execute(insert(_log), [
+            {'family_id': family_id, 'revision': first + i, 'entity': entity, 'entity_id': entity_id,
+             'op': op, 'changed_at': now}
+            for i, entity_id in enumerate(entity_ids)
+        ])
+        return last
+
+    @staticmethod
+    def current_revision(family_id: int, connection=None) -> int:
+        """家庭当前的版本号（页面渲染时下发，表示页面数据已包含到这里）"""
+        stmt = select(_rev.c.revision).where(_rev.c.family_id == family_id)
+        value = (connection or db.session).execute(stmt).scalar()
+        return value or 0
+
+    @staticmethod
+    def changes(family_id: int, since: int = 0, entities: Optional[Iterable[str]] = None,
+                limit: int = DEFAULT_LIMIT) -> dict:
+        """返回 since 之后的变更
+
+        since 为 0 表示全量；since 早于已清理的墓碑或晚于当前版本时无法给出正确差异，
+        按全量返回并置 reset，客户端应清空本地镜像后应用。
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        entities = [e for e in (entities or ENTITIES) if e in ENTITIES]
+        row = db.session.execute(
+            select(_rev.c.revision, _rev.c.pruned_revision).where(_rev.c.family_id == family_id)).first()
+        # 先读版本号再读日志，只返回不晚于该版本的记录，避免读取期间新提交的变更被令牌跳过
+        current, pruned = (row[0], row[1]) if row else (0, 0)
+        reset = since > 0 and (since < pruned or since > current)
+        if reset:
+            since = 0
+
+        query = (
+            ChangeLog.query
+            .filter(ChangeLog.family_id == family_id, ChangeLog.revision > since,
+                    ChangeLog.revision <= current, ChangeLog.entity.in_(entities))
+            .order_by(ChangeLog.revision.asc())
+        )
+        if since == 0:
+            # 全量时墓碑没有意义
+            query = query.filter(ChangeLog.op != 'delete')
+        logs = query.limit(limit + 1).all()
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+
+        data = ChangeLogService._load(family_id, logs)
+        items = []
+        for log in logs:
+            item = {'entity': log.entity, 'id': log.entity_id, 'op': log.op, 'revision': log.revision}
+            if log.op != 'delete':
+                obj = data.get((log.entity, log.entity_id))
+                if obj is None:
+                    # 读取期间被删除，墓碑会出现在后续版本里
+                    continue
+                item['data'] = obj.to_dict()
+            items.append(item)
+        return {
+            'since': since,
+            'revision': logs[-1].revision if has_more else current,
+            'has_more': has_more,
+            'reset': reset,
+            'changes': items,
+        }
+
+    @staticmethod
+    def _load(family_id: int, logs: List[ChangeLog]) -> Dict[Tuple[str, int], object]:
+        """按实体类型各用一次查询取出需要下发的数据"""
+        wanted: Dict[str, List[int]] = {}
+        for log in logs:
+            if log.op != 'delete':
+                wanted.setdefault(log.entity, []).append(log.entity_id)
+        loaded = {}
+        for entity, ids in wanted.items():
+            model = ENTITIES[entity]
+            for obj in model.query.filter(model.family_id == family_id, model.id.in_(ids)).all():
+                loaded[(entity, obj.id)] = obj
+        return loaded
+
+    @staticmethod
+    def prune(days: int) -> int:
+        """清理超过 days 天的墓碑，返回删除条数；持有更早令牌的客户端下次同步会被要求全量重建"""
+        cutoff = beijing_now() - timedelta(days=days)
+        stale = (
+            db.session.query(ChangeLog.family_id, func.max(ChangeLog.revision))
+            .filter(ChangeLog.op == 'delete', ChangeLog.changed_at < cutoff)
+            .group_by(ChangeLog.family_id)
+            .all()
+        )
+        for family_id, max_revision in stale:
+            db.session.execute(
+                update(_rev).where(_rev.c.family_id == family_id, _rev.c.pruned_revision < max_revision)
+                .values(pruned_revision=max_revision))
+        removed = db.session.execute(
+            delete(_log).where(_log.c.op == 'delete', _log.c.changed_at < cutoff)).rowcount
+        db.session.commit()
+        return removed or 0
+
+    @staticmethod
+    def rebuild(family_ids: Optional[Sequence[int]] = None) -> int:
+        """按现有数据重建变更日志（批量导入等绕过 ORM 的写入之后使用），返回写入条数
+
+        新版本号接在原版本号之后；早于原版本号的令牌可能漏掉已被清除的墓碑，标记为过期。
+        """
+        params = {'now': beijing_now()}
+        log_filter, where = [], ''
+        if family_ids is not None:
+            if not family_ids:
+                return 0
+            log_filter = [_log.c.family_id.in_(list(family_ids))]
+            where = 'WHERE src.family_id IN :family_ids'
+            params['family_ids'] = tuple(family_ids)
+
+        db.session.execute(delete(_log).where(*log_filter))
+        stmt = text(_REBUILD_SQL.format(where=where))
+        if family_ids is not None:
+            from sqlalchemy import bindparam
+            stmt = stmt.bindparams(bindparam('family_ids', expanding=True))
+        written = db.session.execute(stmt, params).rowcount
+
+        latest = dict(db.session.query(ChangeLog.family_id, func.max(ChangeLog.revision))
+                      .filter(*[ChangeLog.family_id.in_(list(family_ids))] if family_ids is not None else [])
+                      .group_by(ChangeLog.family_id).all())
+        existing = {r.family_id: r for r in SyncRevision.query.filter(SyncRevision.family_id.in_(list(latest))).all()}
+        for family_id, revision in latest.items():
+            row = existing.get(family_id)
+            if row is None:
+                db.session.add(SyncRevision(family_id=family_id, revision=revision, pruned_revision=0))
+            else:
+                row.pruned_revision, row.revision = row.revision, revision
+        db.session.commit()
+        return written or 0
+
+
+def _same_value(old, new) -> bool:
+    # 不带时区的列：同一时刻补上时区后写入的值不变
+    if hasattr(old, 'tzinfo') and hasattr(new, 'tzinfo'):
+        return old.replace(tzinfo=None) == new.replace(tzinfo=None)
+    return old == new
+
+
+def _has_changes(target) -> bool:
+    """是否有列的值真的变了；只被赋回相同值（或只补了时区）的对象不算修改"""
+    for attr in inspect(target).mapper.column_attrs:
+        history = attributes.get_history(target, attr.key)
+        if not history.has_changes():
+            continue
+        if len(history.added) != 1 or len(history.deleted) != 1:
+            return True
+        if not _same_value(history.deleted[0], history.added[0]):
+            return True
+    return False
+
+
+def _listener(entity: str, op: str, inserted: bool = False):
+    def handler(mapper, connection, target):
+        if target.family_id is None:
+            return
+        if op == 'upsert' and not inserted and not _has_changes(target):
+            # 只是被标记为脏但没有实际修改的对象
+            return
+        ChangeLogService.record(connection, target.family_id, entity, [target.id], op, replace=not inserted)
+    return handler
+
+
+for _name, _model in ENTITIES.items():
+    event.listen(_model, 'after_insert', _listener(_name, 'upsert', inserted=True))
+    event.listen(_model, 'after_update', _listener(_name, 'upsert'))
+    event.listen(_model, 'after_delete', _listener(_name, 'delete'))
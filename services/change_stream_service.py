@@ -0,0 +1,131 @@
+"""
+家庭实时推送服务
+`/api/changes/stream` 用 Server-Sent Events 把家庭的同步版本号推给打开首页的成员，
+浏览器收到更大的版本号后走原有的 `/api/events/sync` 拉取增量。
+每个进程只有一个后台线程：有人订阅时按间隔一次性读取所有被订阅家庭的版本号
+（sync_revision 主键查询），变化时唤醒等待中的连接；没有订阅者时线程退出。
+版本号存在数据库里，多 worker、多实例下任何一处写入都能被所有连接看到。
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional
+from sqlalchemy import select
+from models import db, SyncRevision
+
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)
+_subscribers: Dict[int, int] = {}  # family_id -> 订阅连接数
+_revisions: Dict[int, int] = {}
+_poller_pid: Optional[int] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_slots_lock = threading.Lock()
+
+
+def _poll(app) -> None:
+    global _poller_pid
+    interval = app.config['CHANGE_STREAM_POLL_SECONDS']
+    while True:
+        with _lock:
+            family_ids = list(_subscribers)
+            if not family_ids:
+                _poller_pid = None
+                return
+        try:
+            with app.app_context():
+                rows = db.session.execute(
+                    select(SyncRevision.family_id, SyncRevision.revision)
+                    .where(SyncRevision.family_id.in_(family_ids))
+                ).all()
+                db.session.remove()
+        except Exception:
+            app.logger.exception('读取家庭同步版本失败')
+            rows = []
+        with _lock:
+            updated = False
+            for family_id, revision in rows:
+                if _revisions.get(family_id) != revision:
+                    _revisions[family_id] = revision
+                    updated = True
+            if updated:
+                _changed.notify_all()
+        time.sleep(interval)
+
+
+def _subscribe(app, family_id: int) -> None:
+    global _poller_pid
+    with _lock:
+        _subscribers[family_id] = _subscribers.get(family_id, 0) + 1
+        # fork 后线程不会被继承，按 pid 判断本进程是否已有轮询线程
+        if _poller_pid != os.getpid():
+            _poller_pid = os.getpid()
+            threading.Thread(target=_poll, args=(app,), name='change-stream', daemon=True).start()
+
+
+def _unsubscribe(family_id: int) -> None:
+    with _lock:
+        count = _subscribers.get(family_id, 0) - 1
+        if count > 0:
+            _subscribers[family_id] = count
+        else:
+            _subscribers.pop(family_id, None)
+            _revisions.pop(family_id, None)
+
+
+def _message(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class ChangeStreamService:
+    """家庭实时推送服务类"""
+
+    @staticmethod
+    def acquire_slot(limit: int) -> bool:
+        """占用一个推送名额；每条连接长期占用一个请求线程，同一进程内不超过 limit 条"""
+        global _slots
+        with _slots_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(limit)
+        return _slots.acquire(blocking=False)
+
+    @staticmethod
+    def release_slot() -> None:
+        if _slots is not None:
+            _slots.release()
+
+    @staticmethod
+    def open_streams() -> int:
+        with _lock:
+            return sum(_subscribers.values())
+
+    @staticmethod
+    def events(app, family_id: int, since: int = 0) -> Iterator[str]:
+        """SSE 文本流：版本号超过 since 时发送 revision 事件，空闲时定期发送注释保活，
+        到达 CHANGE_STREAM_MAX_SECONDS 后结束，由浏览器按 retry 间隔重连"""
+        heartbeat = app.config['CHANGE_STREAM_HEARTBEAT_SECONDS']
+        deadline = time.monotonic() + app.config['CHANGE_STREAM_MAX_SECONDS']
+        sent = since
+        last_write = time.monotonic()
+        _subscribe(app, family_id)
+        try:
+            yield f'retry: {int(app.config["CHANGE_STREAM_POLL_SECONDS"] * 3000)}\n\n'
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return
+                with _lock:
+                    revision = _revisions.get(family_id)
+                    if revision is None or revision <= sent:
+                        # 其他家庭的变化也会唤醒这里，醒来后重新比较
+                        _changed.wait(min(last_write + heartbeat, deadline) - now)
+                        revision = _revisions.get(family_id)
+                if revision is not None and revision > sent:
+                    sent = revision
+                    last_write = time.monotonic()
+                    yield _message('revision', {'revision': revision})
+                elif time.monotonic() - last_write >= heartbeat:
+                    last_write = time.monotonic()
+                    yield ': keepalive\n\n'
+        finally:
+            _unsubscribe(family_id)
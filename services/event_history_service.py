@@ -0,0 +1,97 @@
+"""
+历史记录服务
+按 (timestamp, id) 游标分页查询当前宝宝的事件，支持日期范围、类型和备注关键字筛选；
+页面按天分组，每天的喂奶次数、奶量和换尿布次数由数据库按天聚合，只统计当前页涉及的日期。
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case, func, select, tuple_
+from models import db, Event, BEIJING_TZ
+from services.baby_service import BabyService
+from utils.cursor import decode_cursor, encode_cursor
+
+EVENT_TYPES = ('feed', 'diaper')
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 200
+
+
+def _day_start(d: date) -> datetime:
+    return datetime.combine(d, time.min, tzinfo=BEIJING_TZ)
+
+
+class EventHistoryService:
+    """历史记录服务类"""
+
+    @staticmethod
+    def _filters(family_id: int, baby_id: Optional[int], event_type: Optional[str], date_from: Optional[date],
+                 date_to: Optional[date], query: Optional[str]) -> list:
+        """分页和按天汇总共用的筛选条件；日期范围按北京时间整天计算，两端都包含"""
+        filters = [BabyService.in_baby(Event, family_id, baby_id)]
+        if event_type in EVENT_TYPES:
+            filters.append(Event.type == event_type)
+        if date_from:
+            filters.append(Event.timestamp >= _day_start(date_from))
+        if date_to:
+            filters.append(Event.timestamp < _day_start(date_to + timedelta(days=1)))
+        if query:
+            filters.append(Event.note.contains(query, autoescape=True))
+        return filters
+
+    @staticmethod
+    def page(family_id: int, baby_id: Optional[int], cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+             event_type: Optional[str] = None, date_from: Optional[date] = None,
+             date_to: Optional[date] = None, query: Optional[str] = None) -> Tuple[List[Event], Optional[str]]:
+        """取一页事件，返回 (事件列表, 下一页游标)；没有更多时游标为 None
+
+        与时光流相同，按 (timestamp DESC, id DESC) 键集分页，翻到多深都只读一页索引。
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        filters = EventHistoryService._filters(family_id, baby_id, event_type, date_from, date_to, query)
+        if cursor:
+            filters.append(tuple_(Event.timestamp, Event.id) < decode_cursor(cursor))
+        rows = db.session.scalars(
+            select(Event).where(*filters).order_by(Event.timestamp.desc(), Event.id.desc()).limit(limit + 1)
+        ).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1].timestamp, rows[-1].id)
+        return rows, None
+
+    @staticmethod
+    def day_totals(family_id: int, baby_id: Optional[int], first_day: date, last_day: date, event_type: Optional[str] = None,
+                   query: Optional[str] = None) -> Dict[date, dict]:
+        """[first_day, last_day] 内每天的小计，筛选条件与列表一致（不含游标，跨页的日期按全天统计）"""
+        day = func.date(Event.timestamp)
+        is_feed = Event.type == 'feed'
+        stmt = (
+            select(day,
+                   func.sum(case((is_feed, 1), else_=0)),
+                   func.coalesce(func.sum(case((is_feed, Event.amount_ml), else_=0)), 0),
+                   func.sum(case((Event.type == 'diaper', 1), else_=0)))
+            .where(*EventHistoryService._filters(family_id, baby_id, event_type, first_day, last_day, query))
+            .group_by(day)
+        )
+        totals = {}
+        for d, feeds, feed_ml, diapers in db.session.execute(stmt):
+            # SQLite 的 date() 返回字符串，PostgreSQL 返回 date
+            key = d if isinstance(d, date) else date.fromisoformat(d)
+            totals[key] = {'feed_count': int(feeds or 0), 'feed_ml': int(feed_ml or 0),
+                           'diaper_count': int(diapers or 0)}
+        return totals
+
+    @staticmethod
+    def group_by_day(family_id: int, baby_id: Optional[int], events: List[Event], event_type: Optional[str] = None,
+                     query: Optional[str] = None) -> List[dict]:
+        """把一页事件按日期分组并附上当天小计；事件已按时间倒序，组也按日期倒序"""
+        if not events:
+            return []
+        totals = EventHistoryService.day_totals(family_id, baby_id, events[-1].timestamp.date(),
+                                                events[0].timestamp.date(), event_type, query)
+        groups = []
+        for e in events:
+            d = e.timestamp.date()
+            if not groups or groups[-1]['date'] != d:
+                groups.append({'date': d, 'events': [],
+                               **totals.get(d, {'feed_count': 0, 'feed_ml': 0, 'diaper_count': 0})})
+            groups[-1]['events'].append(e)
+        return groups
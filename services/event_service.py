@@ -4,6 +4,8 @@
 from typing import List, Optional
 from datetime import datetime, timedelta
 from models import db, Event, User
+from services.baby_service import BabyService
+from services.family_service import FamilyService
 from utils.time_utils import beijing_now
 from sqlalchemy import func
 
@@ -29,17 +31,17 @@ class EventService:
     @staticmethod
     def get_user_events(user_id: int, event_type: Optional[str] = None, 
                        limit: int = 200) -> List[Event]:
-        """获取用户事件列表"""
-        query = Event.query.filter(Event.user_id == user_id)
+        """获取用户当前宝宝的事件列表"""
+        query = BabyService.scoped(Event, *BabyService.current_scope(user_id))
         if event_type:
             query = query.filter(Event.type == event_type)
         return query.order_by(Event.timestamp.desc()).limit(limit).all()
     
     @staticmethod
     def get_last_event(user_id: int, event_type: str) -> Optional[Event]:
-        """获取用户最后一次指定类型的事件"""
+        """获取用户当前宝宝最后一次指定类型的事件"""
         return Event.query.filter(
-            Event.user_id == user_id,
+            BabyService.in_baby(Event, *BabyService.current_scope(user_id)),
             Event.type == event_type
         ).order_by(Event.timestamp.desc()).first()
     
@@ -50,7 +52,7 @@ class EventService:
         start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
         base_filters = [
-            Event.user_id == user_id,
+            BabyService.in_baby(Event, *BabyService.current_scope(user_id)),
             Event.timestamp >= start_of_day
         ]
         
@@ -76,11 +78,8 @@ class EventService:
     
     @staticmethod
     def delete_event(event_id: int, user_id: int) -> bool:
-        """删除事件（验证权限）"""
-        event = Event.query.filter(
-            Event.id == event_id,
-            Event.user_id == user_id
-        ).first()
+        """删除事件（验证权限：只能删除本家庭的事件）"""
+        event = FamilyService.owned(Event, event_id, FamilyService.current_id(user_id))
         
         if not event:
             return False
@@ -0,0 +1,158 @@
+"""
+事件批量同步服务
+离线客户端把本地发件箱中的事件（带客户端时间和幂等键 client_id）成批提交：
+已存在的 client_id 视为重复直接确认，其余一次批量插入；同时返回同步令牌（家庭变更日志版本号）之后服务端变化的事件，
+其中包括其他家庭成员记录的事件。
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from models import db, Event, BEIJING_TZ
+from services.baby_service import BabyService
+from services.change_log_service import ChangeLogService
+from utils.time_utils import beijing_now
+
+MAX_BATCH = 200  # 单次同步最多接受的事件数
+DELTA_LIMIT = 500  # 单次返回的服务端变更上限，超出时 has_more 为真
+MAX_CLOCK_SKEW = timedelta(minutes=5)  # 允许客户端时间超前服务器的幅度
+MAX_NOTE_LENGTH = 500
+DIAPER_KIND_LABELS = {'pee': '尿', 'poop': '便', 'both': '尿+便'}
+
+
+class SyncError(ValueError):
+    """单条事件校验失败"""
+
+
+def _parse_timestamp(value, now: datetime) -> datetime:
+    if not isinstance(value, str):
+        raise SyncError('缺少 timestamp')
+    try:
+        ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise SyncError(f'无效的 timestamp: {value}')
+    # 不带时区的客户端时间按北京时间理解，统一换算成北京时间存储
+    ts = ts.replace(tzinfo=BEIJING_TZ) if ts.tzinfo is None else ts.astimezone(BEIJING_TZ)
+    if ts > now + MAX_CLOCK_SKEW:
+        raise SyncError('timestamp 晚于服务器时间')
+    return ts
+
+
+def _parse_event(raw, now: datetime) -> dict:
+    """把客户端提交的一条事件转换为待插入的行"""
+    if not isinstance(raw, dict):
+        raise SyncError('事件格式错误')
+    event_type = raw.get('type')
+    note = raw.get('note') or ''
+    if not isinstance(note, str) or len(note) > MAX_NOTE_LENGTH:
+        raise SyncError('note 过长或格式错误')
+
+    amount_ml = None
+    if event_type == 'feed':
+        try:
+            amount_ml = int(raw.get('amount_ml'))
+        except (TypeError, ValueError):
+            raise SyncError('请填写奶量（ml）')
+        if not 1 <= amount_ml <= 2000:
+            raise SyncError('奶量超出范围')
+    elif event_type == 'diaper':
+        # 与表单记录一致，把尿布类型写进备注前缀
+        kind_label = DIAPER_KIND_LABELS.get(raw.get('diaper_kind') or '')
+        if kind_label:
+            note = f'[{kind_label}] ' + note
+    else:
+        raise SyncError(f'未知的事件类型: {event_type}')
+
+    return {'type': event_type, 'amount_ml': amount_ml, 'note': note,
+            'timestamp': _parse_timestamp(raw.get('timestamp'), now)}
+
+
+class EventSyncService:
+    """事件批量同步服务类"""
+
+    @staticmethod
+    def decode_token(token: Optional[str]) -> Optional[int]:
+        """解析同步令牌；缺省时返回 None，格式不对时抛出 ValueError"""
+        if token in (None, ''):
+            return None
+        value = int(token)
+        if value < 0:
+            raise ValueError(f'无效的同步令牌: {token}')
+        return value
+
+    @staticmethod
+    def push(user_id: int, family_id: int, raw_events: list,
+             baby_id: Optional[int] = None) -> Tuple[List[dict], Optional[dict]]:
+        """以 user_id 为记录人写入一批客户端事件（记到家庭和 baby_id 名下），返回 (逐条结果, 最后一条新建事件)
+
+        每条结果为 {'client_id', 'status': created | duplicate | invalid, 'id' 或 'error'}。
+        """
+        now = beijing_now()
+        results, rows = [], {}
+        for raw in raw_events:
+            client_id = raw.get('client_id') if isinstance(raw, dict) else None
+            if not isinstance(client_id, str) or not 0 < len(client_id) <= 36:
+                results.append({'client_id': client_id, 'status': 'invalid', 'error': '缺少 client_id'})
+                continue
+            if client_id in rows:
+                # 同一批内重复的记录在插入后和第一条一起确认
+                continue
+            try:
+                rows[client_id] = _parse_event(raw, now)
+            except SyncError as e:
+                results.append({'client_id': client_id, 'status': 'invalid', 'error': str(e)})
+
+        # 批量插入不经过补齐宝宝的监听器，未指定时记到用户当前的宝宝
+        ids = EventSyncService._insert(user_id, family_id, rows, baby_id or BabyService.current_id(user_id))
+        created = [cid for cid in rows if cid in ids and ids[cid][1]]
+        for client_id in rows:
+            event_id, is_new = ids[client_id]
+            results.append({'client_id': client_id, 'status': 'created' if is_new else 'duplicate', 'id': event_id})
+
+        last_created = None
+        if created:
+            newest = max(created, key=lambda cid: rows[cid]['timestamp'])
+            last_created = {'id': ids[newest][0], 'timestamp': rows[newest]['timestamp']}
+        return results, last_created
+
+    @staticmethod
+    def _insert(user_id: int, family_id: int, rows: dict, baby_id: Optional[int] = None, retries: int = 1) -> dict:
+        """批量插入未出现过的 client_id，返回 {client_id: (事件 id, 是否新建)}"""
+        if not rows:
+            return {}
+
+        def existing() -> dict:
+            return dict(db.session.query(Event.client_id, Event.id)
+                        .filter(Event.user_id == user_id, Event.client_id.in_(list(rows))).all())
+
+        known = existing()
+        fresh = [dict(row, user_id=user_id, family_id=family_id, baby_id=baby_id, client_id=cid)
+                 for cid, row in rows.items() if cid not in known]
+        if fresh:
+            try:
+                inserted = db.session.execute(insert(Event).returning(Event.timestamp, Event.id), fresh).all()
+                # 批量插入不触发 ORM 事件，在同一事务里手动登记变更日志（新记录没有旧日志可清理）
+                new_ids = [event_id for _, event_id in sorted(inserted)]
+                ChangeLogService.record(db.session.connection(), family_id, 'event', new_ids, 'upsert', replace=False)
+                db.session.commit()
+            except IntegrityError:
+                # 同一发件箱被并发提交（页面与 Service Worker 同时重试），重新比对后再插入
+                db.session.rollback()
+                if retries <= 0:
+                    raise
+                return EventSyncService._insert(user_id, family_id, rows, baby_id, retries - 1)
+        after = existing() if fresh else known
+        return {cid: (after[cid], cid not in known) for cid in rows}
+
+    @staticmethod
+    def changes_since(family_id: int, token: Optional[int], limit: int = DELTA_LIMIT) -> Tuple[List[dict], int, bool]:
+        """返回令牌之后变化的事件（变更日志条目）、新令牌和是否还有更多
+
+        缺少令牌或令牌已过期时不补发全量，直接给出当前版本号；首页只用这些变更修正当天汇总。
+        """
+        if token is None:
+            return [], ChangeLogService.current_revision(family_id), False
+        result = ChangeLogService.changes(family_id, token, entities=('event',), limit=limit)
+        if result['reset']:
+            return [], ChangeLogService.current_revision(family_id), False
+        return result['changes'], result['revision'], result['has_more']
@@ -0,0 +1,172 @@
+"""
+历史数据导出服务
+按服务端游标（yield_per / stream_results）分批读取家庭的全部事件和时光，逐块生成 CSV / JSONL
+或 ZIP 归档（可附带时光媒体文件）。所有导出都是生成器，内存占用与历史长度无关，
+网页下载和 `flask export-history` 共用同一套生成逻辑。
+"""
+import csv
+import io
+import json
+import os
+import threading
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from models import db, Event, Moment
+from services.family_service import FamilyService
+
+FORMATS = ('csv', 'jsonl')
+BATCH_SIZE = 1000  # 每次从游标取出的行数
+CHUNK_BYTES = 64 * 1024  # 文本缓冲超过该大小即向外输出一块
+MEDIA_CHUNK_BYTES = 256 * 1024
+
+EXPORTS = {
+    'events': (Event, ('id', 'type', 'amount_ml', 'note', 'timestamp', 'baby_id')),
+    'moments': (Moment, ('id', 'content', 'image_path', 'thumb_path', 'video_path', 'is_favorite', 'timestamp', 'baby_id')),
+}
+
+_slots: Optional[threading.BoundedSemaphore] = None
+_slots_lock = threading.Lock()
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class _ZipStream(io.RawIOBase):
+    """ZipFile 的写入目标：只追加不回退，写入的数据攒在内存里由生成器及时取走"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportService:
+    """历史数据导出服务类"""
+
+    @staticmethod
+    def acquire_slot(limit: int) -> bool:
+        """占用一个导出名额；同一进程内同时进行的导出不超过 limit 个，避免长下载占满 worker 线程"""
+        global _slots
+        with _slots_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(limit)
+        return _slots.acquire(blocking=False)
+
+    @staticmethod
+    def release_slot() -> None:
+        if _slots is not None:
+            _slots.release()
+
+    @staticmethod
+    def iter_rows(family_id: int, entity: str) -> Iterator[Tuple[str, ...]]:
+        """按宝宝、时间顺序逐批读取某类数据（与 (family_id, baby_id, timestamp) 索引顺序一致）；
+        只查需要的列，不建 ORM 对象，会话标识映射不会随历史增长"""
+        model, fields = EXPORTS[entity]
+        stmt = (
+            select(*(getattr(model, f) for f in fields))
+            .where(FamilyService.in_family(model, family_id))
+            .order_by(model.baby_id.asc(), model.timestamp.asc(), model.id.asc())
+            .execution_options(yield_per=BATCH_SIZE, stream_results=True)
+        )
+        result = db.session.execute(stmt)
+        try:
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            result.close()
+
+    @staticmethod
+    def iter_text(family_id: int, entity: str, fmt: str, bom: bool = True) -> Iterator[str]:
+        """生成 CSV 或 JSONL 文本块；CSV 默认带 BOM，Excel 打开中文不乱码"""
+        _, fields = EXPORTS[entity]
+        buffer = io.StringIO()
+        if fmt == 'csv':
+            if bom:
+                buffer.write('\ufeff')
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            write = lambda row: writer.writerow([_value(v) for v in row])  # noqa: E731
+        else:
+            write = lambda row: buffer.write(  # noqa: E731
+                json.dumps({f: _value(v) for f, v in zip(fields, row)}, ensure_ascii=False) + '\n')
+
+        for row in ExportService.iter_rows(family_id, entity):
+            write(row)
+            if buffer.tell() >= CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def iter_zip(family_id: int, fmt: str, media_root: Optional[str] = None,
+                 entities: Sequence[str] = tuple(EXPORTS)) -> Iterator[bytes]:
+        """生成 ZIP 归档：每类数据一个文件；给出 media_root 时把时光图片和视频放进 media/ 目录"""
+        return (chunk for chunk in ExportService._zip_chunks(family_id, fmt, media_root, entities) if chunk)
+
+    @staticmethod
+    def _zip_chunks(family_id: int, fmt: str, media_root: Optional[str], entities: Sequence[str]) -> Iterator[bytes]:
+        stream = _ZipStream()
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for entity in entities:
+                with archive.open(f'{entity}.{fmt}', 'w', force_zip64=True) as dst:
+                    for text in ExportService.iter_text(family_id, entity, fmt):
+                        dst.write(text.encode('utf-8'))
+                        yield stream.drain()
+            if media_root:
+                for rel_path in ExportService._media_paths(family_id):
+                    path = ExportService._resolve_media(media_root, rel_path)
+                    if path is None:
+                        continue
+                    # 图片和视频本身已压缩，直接存储
+                    info = zipfile.ZipInfo.from_file(path, f'media/{rel_path}')
+                    info.compress_type = zipfile.ZIP_STORED
+                    with open(path, 'rb') as src, archive.open(info, 'w', force_zip64=True) as dst:
+                        for block in iter(lambda: src.read(MEDIA_CHUNK_BYTES), b''):
+                            dst.write(block)
+                            yield stream.drain()
+        yield stream.drain()
+
+    @staticmethod
+    def _media_paths(family_id: int) -> Iterable[str]:
+        fields = EXPORTS['moments'][1]
+        image, video = fields.index('image_path'), fields.index('video_path')
+        seen = set()  # 只记路径字符串，多条时光共用的文件只打包一次
+        for row in ExportService.iter_rows(family_id, 'moments'):
+            for rel_path in (row[image], row[video]):
+                if rel_path and rel_path not in seen:
+                    seen.add(rel_path)
+                    yield rel_path
+
+    @staticmethod
+    def _resolve_media(media_root: str, rel_path: str) -> Optional[str]:
+        """把数据库里的相对路径解析为 media_root 下的文件，越界或不存在时返回 None"""
+        root = os.path.realpath(media_root)
+        path = os.path.realpath(os.path.join(root, rel_path))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    @staticmethod
+    def filename(entity: str, fmt: str, today: str) -> str:
+        return f'baby-{entity}-{today}.{fmt}'
@@ -0,0 +1,194 @@
+"""
+家庭服务
+记录、时光、宝宝资料、变更日志和 AI 摘要都按 family_id 分区，家庭成员看到同一份数据。
+读取一律经过 `scoped` / `owned` 加上家庭条件（对应 family_id 开头的复合索引）；写入时
+未指定 family_id 的事件和时光由插入前监听器按记录人补齐。每个用户注册时自动建立自己的家庭，
+其他成员凭邀请码加入。
+"""
+import secrets
+from typing import List, Optional, Tuple
+from flask import g, has_request_context, session
+from sqlalchemy import delete, event, func, insert, select, update
+from models import db, beijing_now, User, Family, FamilyMember, Baby, Event, Moment, AIDigest, ChangeLog, SyncRevision
+
+INVITE_CODE_LENGTH = 8
+# 去掉容易看错的 0/O、1/I/L
+INVITE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+
+_family = Family.__table__
+_member = FamilyMember.__table__
+
+
+def new_invite_code() -> str:
+    return ''.join(secrets.choice(INVITE_ALPHABET) for _ in range(INVITE_CODE_LENGTH))
+
+
+def _create_family(connection, user_id: int) -> int:
+    """在当前事务中为用户新建家庭（本人为 owner）、家庭的版本行和第一个宝宝，返回家庭 id"""
+    family_id = connection.execute(
+        insert(_family).values(invite_code=new_invite_code(), created_at=beijing_now()).returning(_family.c.id)
+    ).scalar()
+    connection.execute(insert(_member).values(family_id=family_id, user_id=user_id, role='owner',
+                                              joined_at=beijing_now()))
+    # 之后的写入只需 UPDATE 加锁递增版本号，不会并发插入同一行
+    connection.execute(insert(SyncRevision.__table__).values(family_id=family_id, revision=0, pruned_revision=0))
+    # 每个家庭至少有一个宝宝，记录和时光总能标记到某个宝宝，按宝宝读取时不会漏掉
+    connection.execute(insert(Baby.__table__).values(family_id=family_id, user_id=user_id, name='',
+                                                     created_at=beijing_now(), updated_at=beijing_now()))
+    return family_id
+
+
+class FamilyService:
+    """家庭服务类"""
+
+    @staticmethod
+    def family_id_for(user_id: int, connection=None) -> Optional[int]:
+        """用户所属家庭（不走缓存）"""
+        stmt = select(_member.c.family_id).where(_member.c.user_id == user_id)
+        return (connection or db.session).execute(stmt).scalar()
+
+    @staticmethod
+    def current_id(user_id: Optional[int] = None) -> Optional[int]:
+        """当前用户（或指定用户）所属家庭；请求内缓存在 flask.g 上，未登录时为 None"""
+        if not has_request_context():
+            return FamilyService.family_id_for(user_id) if user_id else None
+        uid = user_id or session.get('uid')
+        if not uid:
+            return None
+        cache = g.setdefault('family_ids', {})
+        if uid not in cache:
+            cache[uid] = FamilyService.family_id_for(uid)
+        return cache[uid]
+
+    @staticmethod
+    def in_family(model, family_id: Optional[int]):
+        """家庭条件，供 select() 和聚合查询使用；family_id 为空（未登录）时恒假"""
+        return model.family_id == family_id if family_id else db.false()
+
+    @staticmethod
+    def scoped(model, family_id: Optional[int]):
+        """某个家庭的数据查询"""
+        return model.query.filter(FamilyService.in_family(model, family_id))
+
+    @staticmethod
+    def owned(model, obj_id: int, family_id: Optional[int]):
+        """按 id 取本家庭的一条数据，不属于该家庭时返回 None"""
+        return FamilyService.scoped(model, family_id).filter(model.id == obj_id).first()
+
+    @staticmethod
+    def get(family_id: int) -> Optional[Family]:
+        return db.session.get(Family, family_id)
+
+    @staticmethod
+    def members(family_id: int) -> List[Tuple[FamilyMember, User]]:
+        """家庭成员及其账号，按加入顺序"""
+        return (
+            db.session.query(FamilyMember, User)
+            .join(User, User.id == FamilyMember.user_id)
+            .filter(FamilyMember.family_id == family_id)
+            .order_by(FamilyMember.joined_at, FamilyMember.id)
+            .all()
+        )
+
+    @staticmethod
+    def reset_invite_code(family_id: int) -> str:
+        """换一个邀请码，旧码立即失效"""
+        code = new_invite_code()
+        db.session.execute(update(_family).where(_family.c.id == family_id).values(invite_code=code))
+        db.session.commit()
+        return code
+
+    @staticmethod
+    def join(user_id: int, invite_code: str) -> Family:
+        """凭邀请码加入家庭；邀请码无效时抛出 ValueError
+
+        原家庭只有本人时，原有的宝宝、记录和时光一并并入新家庭，之后重建新家庭的变更日志
+        （成员手中的同步令牌因此过期，下次同步时全量刷新）；原家庭还有其他成员时数据留给他们。
+        """
+        from services.change_log_service import ChangeLogService
+
+        target = Family.query.filter_by(invite_code=(invite_code or '').strip().upper()).first()
+        if target is None:
+            raise ValueError('邀请码无效')
+        old_id = FamilyService.family_id_for(user_id)
+        if old_id == target.id:
+            return target
+
+        others = FamilyMember.query.filter(FamilyMember.family_id == old_id, FamilyMember.user_id != user_id).count()
+        db.session.execute(update(_member).where(_member.c.user_id == user_id)
+                           .values(family_id=target.id, role='member', joined_at=beijing_now()))
+        if not others:
+            FamilyService._merge_blank_babies(old_id, target.id)
+            for model in (Baby, Event, Moment):
+                db.session.execute(update(model.__table__).where(model.__table__.c.family_id == old_id)
+                                   .values(family_id=target.id))
+            for model in (ChangeLog, AIDigest, SyncRevision):
+                db.session.execute(delete(model.__table__).where(model.__table__.c.family_id == old_id))
+            db.session.execute(delete(_family).where(_family.c.id == old_id))
+        db.session.commit()
+        if not others:
+            ChangeLogService.rebuild([target.id])
+        FamilyService._forget()
+        return target
+
+    @staticmethod
+    def _merge_blank_babies(old_id: int, target_id: int) -> None:
+        """原家庭中没填过资料的宝宝（注册后自动建立的）并入目标家庭的第一个宝宝，避免出现重复的未命名宝宝"""
+        first = FamilyService.scoped(Baby, target_id).order_by(Baby.id).first()
+        if first is None:
+            return
+        blank = [b.id for b in FamilyService.scoped(Baby, old_id).filter(
+            Baby.name == '', Baby.birth_date.is_(None), Baby.avatar_path.is_(None), Baby.cover_path.is_(None))]
+        if not blank:
+            return
+        for model in (Event, Moment):
+            db.session.execute(update(model.__table__).where(model.__table__.c.baby_id.in_(blank))
+                               .values(baby_id=first.id))
+        db.session.execute(delete(Baby.__table__).where(Baby.__table__.c.id.in_(blank)))
+
+    @staticmethod
+    def leave(user_id: int) -> int:
+        """退出当前家庭并建立自己的新家庭（数据留在原家庭），返回新家庭 id；只剩本人时不允许退出"""
+        old_id = FamilyService.family_id_for(user_id)
+        if not FamilyMember.query.filter(FamilyMember.family_id == old_id, FamilyMember.user_id != user_id).count():
+            raise ValueError('家庭中只有你一位成员')
+        connection = db.session.connection()
+        connection.execute(delete(_member).where(_member.c.user_id == user_id))
+        family_id = _create_family(connection, user_id)
+        if not FamilyMember.query.filter(FamilyMember.family_id == old_id, FamilyMember.role == 'owner').count():
+            # owner 离开后由最早加入的成员接任，保证有人可以更换邀请码
+            heir = (FamilyMember.query.filter(FamilyMember.family_id == old_id)
+                    .order_by(FamilyMember.joined_at, FamilyMember.id).first())
+            heir.role = 'owner'
+        db.session.commit()
+        FamilyService._forget()
+        return family_id
+
+    @staticmethod
+    def _forget() -> None:
+        """成员变化后丢弃本请求缓存"""
+        if has_request_context():
+            g.pop('family_ids', None)
+            g.pop('babies', None)
+            g.pop('profile_context', None)
+
+
+def _on_user_insert(mapper, connection, target):
+    # 注册即建立自己的家庭，后续所有写入都能确定 family_id
+    _create_family(connection, target.id)
+
+
+def _fill_scope(mapper, connection, target):
+    # 写入方未指定家庭时按记录人补齐；请求内已缓存的直接使用，避免在 flush 中再查一次
+    if target.family_id is None and target.user_id:
+        cached = g.get('family_ids', {}).get(target.user_id) if has_request_context() else None
+        target.family_id = cached or FamilyService.family_id_for(target.user_id, connection)
+    # 未指定宝宝时记到家庭的第一个宝宝
+    if target.baby_id is None and target.family_id:
+        target.baby_id = connection.execute(
+            select(func.min(Baby.__table__.c.id)).where(Baby.__table__.c.family_id == target.family_id)).scalar()
+
+
+event.listen(User, 'after_insert', _on_user_insert)
+for _model in (Event, Moment):
+    event.listen(_model, 'before_insert', _fill_scope)
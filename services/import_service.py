@@ -0,0 +1,372 @@
+"""
+事件批量导入服务
+从其他育儿记录应用导出的 CSV / JSON / JSONL 中流式读取喂奶和换尿布记录：逐行校验、把时间统一换算为
+北京时间，按批次在独立事务里多行插入。去重分两层：每行按内容生成确定的 client_id，重复导入同一文件
+由 (user_id, client_id) 唯一索引忽略；与家庭中已记录的事件同类型、同一分钟、同奶量的行视为重复跳过
+（另一位家长已经记过的同一次喂奶不会重复导入）。
+"""
+import hashlib
+import io
+import json
+import re
+import time
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import select
+from models import db, Event, BEIJING_TZ
+from services.ai_context_service import AIContextService
+from services.baby_service import BabyService
+from services.change_log_service import ChangeLogService
+from services.event_sync_service import DIAPER_KIND_LABELS, MAX_CLOCK_SKEW, MAX_NOTE_LENGTH
+from services.family_service import FamilyService
+from utils.time_utils import beijing_now
+
+FORMATS = ('csv', 'json', 'jsonl')
+DEFAULT_BATCH_SIZE = 5000
+MAX_ERRORS = 20  # 报告中保留的出错行数
+OZ_TO_ML = 29.5735
+JSON_READ_BYTES = 64 * 1024
+
+# 各应用导出的列名（统一小写、空格和连字符换成下划线后匹配）
+COLUMN_ALIASES = {
+    'timestamp': ('timestamp', 'time', 'datetime', 'date_time', 'start', 'start_time', 'started_at', 'date',
+                  '时间', '开始时间', '记录时间'),
+    'type': ('type', 'event', 'event_type', 'activity', 'category', '类型', '事件'),
+    'amount': ('amount_ml', 'amount', 'ml', 'volume', 'quantity', '奶量', '奶量_ml'),
+    'unit': ('unit', 'units', '单位'),
+    'note': ('note', 'notes', 'comment', 'comments', 'memo', '备注'),
+    'diaper_kind': ('diaper_kind', 'diaper_type', 'kind', 'status', 'condition', '尿布类型'),
+}
+FEED_TYPES = {'feed', 'feeding', 'bottle', 'formula', 'breast', 'breastfeeding', 'nursing', 'pumped',
+              '喂奶', '奶瓶', '母乳', '配方奶'}
+DIAPER_TYPES = {'diaper', 'nappy', 'change', 'diaper_change', '换尿布', '尿布'}
+DIAPER_KINDS = {
+    'pee': 'pee', 'wet': 'pee', 'urine': 'pee', '尿': 'pee',
+    'poop': 'poop', 'poo': 'poop', 'dirty': 'poop', 'bm': 'poop', '便': 'poop',
+    'both': 'both', 'mixed': 'both', 'wet_and_dirty': 'both', 'wet+dirty': 'both', '尿+便': 'both',
+}
+# fromisoformat 解析不了时依次尝试
+DATETIME_FORMATS = ('%Y/%m/%d %H:%M:%S', '%Y/%m/%d %H:%M', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M',
+                    '%m/%d/%Y %I:%M %p', '%m/%d/%Y %I:%M:%S %p', '%d.%m.%Y %H:%M', '%Y年%m月%d日 %H:%M')
+_AMOUNT_RE = re.compile(r'^\s*([\d.]+)\s*(ml|oz|毫升)?\s*$', re.IGNORECASE)
+
+
+class RowError(ValueError):
+    """单行数据校验失败"""
+
+
+@lru_cache(maxsize=1024)
+def _key(name: str) -> str:
+    return re.sub(r'[\s\-]+', '_', name.strip().lower())
+
+
+def _column_map(header: Iterable[str]) -> Dict[str, str]:
+    """把源文件的列名映射到标准字段名"""
+    lookup = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+    mapping = {}
+    for name in header:
+        field = lookup.get(_key(name))
+        if field and field not in mapping.values():
+            mapping[name] = field
+    return mapping
+
+
+_DIRECTIVES = {'%Y': r'(?P<Y>\d{4})', '%m': r'(?P<m>\d{1,2})', '%d': r'(?P<d>\d{1,2})', '%H': r'(?P<H>\d{1,2})',
+               '%I': r'(?P<I>\d{1,2})', '%M': r'(?P<M>\d{2})', '%S': r'(?P<S>\d{2})', '%p': r'(?P<p>[AaPp][Mm])'}
+
+
+@lru_cache(maxsize=None)
+def _format_regex(fmt: str):
+    """把 strptime 格式编译成正则：逐行解析比 datetime.strptime 快数倍"""
+    pattern = re.escape(fmt)
+    for directive, group in _DIRECTIVES.items():
+        pattern = pattern.replace(re.escape(directive), group)
+    return re.compile(pattern + '$')
+
+
+def _match_format(text: str, fmt: str) -> Optional[datetime]:
+    match = _format_regex(fmt).match(text)
+    if not match:
+        return None
+    g = match.groupdict()
+    hour = int(g.get('H') or 0)
+    if g.get('I'):
+        hour = int(g['I']) % 12 + (12 if g['p'].lower() == 'pm' else 0)
+    try:
+        return datetime(int(g['Y']), int(g['m']), int(g['d']), hour, int(g.get('M') or 0), int(g.get('S') or 0))
+    except ValueError:
+        return None
+
+
+class _TimestampParser:
+    """解析各种格式的时间，不带时区的按来源时区理解，统一换算成北京时间"""
+
+    def __init__(self, source_tz):
+        self.source_tz = source_tz
+        self.preferred = None  # 同一文件的时间格式通常一致，上一行成功的格式先试，省掉失败的解析
+
+    def __call__(self, value) -> datetime:
+        if isinstance(value, (int, float)) or (isinstance(value, str) and value.strip().isdigit()):
+            seconds = float(value)
+            if seconds > 1e11:  # 毫秒时间戳
+                seconds /= 1000
+            return datetime.fromtimestamp(seconds, BEIJING_TZ)
+        if not isinstance(value, str) or not value.strip():
+            raise RowError('缺少时间')
+        text = value.strip()
+        ts = None
+        if self.preferred:
+            ts = _match_format(text, self.preferred)
+        if ts is None:
+            try:
+                ts = datetime.fromisoformat(text.replace('Z', '+00:00'))
+            except ValueError:
+                ts = self._strptime(text)
+        ts = ts.replace(tzinfo=self.source_tz) if ts.tzinfo is None else ts
+        return ts.astimezone(BEIJING_TZ)
+
+    def _strptime(self, text: str) -> datetime:
+        for fmt in DATETIME_FORMATS:
+            ts = _match_format(text, fmt)
+            if ts is not None:
+                self.preferred = fmt
+                return ts
+        raise RowError(f'无法识别的时间: {text}')
+
+
+def _parse_amount(value, unit) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    match = _AMOUNT_RE.match(str(value))
+    if not match:
+        raise RowError(f'无法识别的奶量: {value}')
+    amount = float(match.group(1))
+    if (match.group(2) or str(unit or '')).strip().lower() == 'oz':
+        amount *= OZ_TO_ML
+    return int(round(amount))
+
+
+def _normalise(record: dict, parse_ts: Callable, now: datetime) -> dict:
+    """把一行源数据转换为待插入的事件行"""
+    raw_type = _key(str(record.get('type') or ''))
+    kind = DIAPER_KINDS.get(_key(str(record.get('diaper_kind') or '')))
+    if raw_type in FEED_TYPES:
+        event_type = 'feed'
+    elif raw_type in DIAPER_TYPES or raw_type in DIAPER_KINDS:
+        event_type = 'diaper'
+        kind = kind or DIAPER_KINDS.get(raw_type)
+    else:
+        raise RowError(f'未知的事件类型: {record.get("type")}')
+
+    note = str(record.get('note') or '').strip()
+    amount_ml = None
+    if event_type == 'feed':
+        amount_ml = _parse_amount(record.get('amount'), record.get('unit'))
+        if amount_ml is None:
+            raise RowError('缺少奶量')
+        if not 1 <= amount_ml <= 2000:
+            raise RowError(f'奶量超出范围: {amount_ml}')
+    elif kind and not note.startswith('['):
+        # 与表单记录一致，把尿布类型写进备注前缀（本应用导出的备注已带前缀）
+        note = f'[{DIAPER_KIND_LABELS[kind]}] ' + note
+    if len(note) > MAX_NOTE_LENGTH:
+        raise RowError('备注过长')
+
+    ts = parse_ts(record.get('timestamp'))
+    if ts > now + MAX_CLOCK_SKEW:
+        raise RowError('时间晚于当前时间')
+    ts = ts.replace(microsecond=0)
+    digest = hashlib.sha1(f'{event_type}|{ts.isoformat()}|{amount_ml}|{note}'.encode('utf-8')).hexdigest()
+    return {'type': event_type, 'amount_ml': amount_ml, 'note': note, 'timestamp': ts,
+            'client_id': 'imp:' + digest[:32]}
+
+
+def _iter_json_array(stream: TextIO) -> Iterator[dict]:
+    """逐个解析 JSON 数组中的对象，不把整个文件读进内存"""
+    decoder = json.JSONDecoder()
+    buffer, started, eof = '', False, False
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer and not eof:
+                chunk = stream.read(JSON_READ_BYTES)
+                buffer, eof = chunk, not chunk
+                continue
+            if not buffer.startswith('['):
+                raise RowError('JSON 文件应为对象数组')
+            buffer, started = buffer[1:], True
+            continue
+        buffer = buffer.lstrip(', \t\r\n')
+        if buffer.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise RowError('JSON 格式错误')
+            chunk = stream.read(JSON_READ_BYTES)
+            buffer, eof = buffer + chunk, not chunk
+            continue
+        buffer = buffer[end:]
+        yield obj
+
+
+def _iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """按格式逐行读取，产出 (行号, 标准字段字典)"""
+    if fmt == 'csv':
+        import csv
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if not header:
+            return
+        mapping = _column_map(header)
+        if 'timestamp' not in mapping.values() or 'type' not in mapping.values():
+            raise RowError(f'CSV 缺少时间或类型列，现有列: {", ".join(header)}')
+        columns = [(i, mapping[name]) for i, name in enumerate(header) if name in mapping]
+        for line, row in enumerate(reader, start=2):
+            if row:
+                yield line, {field: row[i].strip() for i, field in columns if i < len(row)}
+        return
+
+    objects = _iter_json_array(stream) if fmt == 'json' else (
+        json.loads(line) for line in stream if line.strip())
+    mapping: Dict[str, str] = {}
+    for index, obj in enumerate(objects, start=1):
+        if not isinstance(obj, dict):
+            yield index, {}
+            continue
+        unknown = [k for k in obj if k not in mapping]
+        if unknown:
+            mapping.update(_column_map(unknown))
+        yield index, {mapping[k]: v for k, v in obj.items() if k in mapping}
+
+
+def _insert_statement():
+    """按数据库方言生成 INSERT ... ON CONFLICT DO NOTHING，冲突的行（重复导入）直接跳过"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    # 用表而不是 ORM 实体：ORM 批量插入带 RETURNING 和 ON CONFLICT 时会退化为逐行执行
+    table = Event.__table__
+    # RETURNING 只返回真正插入的行，各驱动 executemany 的 rowcount 不一定可靠
+    return insert(table).on_conflict_do_nothing(index_elements=['user_id', 'client_id']).returning(table.c.id)
+
+
+class EventImportService:
+    """事件批量导入服务类"""
+
+    @staticmethod
+    def detect_format(filename: str) -> Optional[str]:
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        return {'ndjson': 'jsonl'}.get(ext, ext) if ext in FORMATS + ('ndjson',) else None
+
+    @staticmethod
+    def open_text(binary) -> TextIO:
+        """把上传或打开的二进制流包装为文本流，兼容带 BOM 的 UTF-8（Excel 导出的 CSV）"""
+        return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+    @staticmethod
+    def run(user_id: int, stream: TextIO, fmt: str, source_tz: str = 'Asia/Shanghai',
+            batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False,
+            progress: Optional[Callable[[dict], None]] = None, baby_id: Optional[int] = None) -> dict:
+        """以 user_id 为记录人导入一个文件（记到其家庭和 baby_id 名下），返回统计报告；每写完一批调用一次 progress(report)
+
+        report: read / inserted / duplicates / invalid / errors[(行号, 原因)] / seconds / rows_per_sec
+        """
+        if fmt not in FORMATS:
+            raise RowError(f'不支持的格式: {fmt}')
+        try:
+            tz = ZoneInfo(source_tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise RowError(f'未知的时区: {source_tz}')
+        parse_ts = _TimestampParser(tz)
+        family_id = FamilyService.current_id(user_id)
+        # 绕过 ORM 的批量写入不经过补齐宝宝的监听器，未指定时记到用户当前的宝宝
+        baby_id = baby_id or BabyService.current_id(user_id)
+        now = beijing_now()
+        started = time.perf_counter()
+        report = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0, 'errors': [],
+                  'seconds': 0.0, 'rows_per_sec': 0}
+        batch: Dict[str, dict] = {}
+
+        def timing():
+            elapsed = time.perf_counter() - started
+            report['seconds'] = round(elapsed, 2)
+            report['rows_per_sec'] = int(report['read'] / elapsed) if elapsed else 0
+
+        def flush():
+            if batch:
+                inserted = 0 if dry_run else EventImportService._write_batch(user_id, family_id, list(batch.values()), baby_id)
+                report['inserted'] += inserted
+                report['duplicates'] += len(batch) - inserted
+                batch.clear()
+            timing()
+            if progress:
+                progress(report)
+
+        try:
+            for line, record in _iter_records(stream, fmt):
+                report['read'] += 1
+                try:
+                    row = _normalise(record, parse_ts, now)
+                except RowError as e:
+                    report['invalid'] += 1
+                    if len(report['errors']) < MAX_ERRORS:
+                        report['errors'].append((line, str(e)))
+                    continue
+                if row['client_id'] in batch:
+                    report['duplicates'] += 1
+                    continue
+                batch[row['client_id']] = row
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+        finally:
+            if report['inserted']:
+                # 各批已在自己的事务里登记变更日志并推进版本号，这里按新版本号预先算好统计摘要
+                AIContextService.get_feeding_summary(family_id, baby_id)
+                timing()
+        return report
+
+    @staticmethod
+    def _write_batch(user_id: int, family_id: int, rows: list, baby_id: Optional[int] = None) -> int:
+        """一个事务写入一批：跳过与已有事件重复的行后多行插入，登记变更日志，返回实际插入条数"""
+        rows = EventImportService._drop_existing(family_id, baby_id, rows)
+        if not rows:
+            return 0
+        for row in rows:
+            row['user_id'] = user_id
+            row['family_id'] = family_id
+            row['baby_id'] = baby_id
+        try:
+            connection = db.session.connection()
+            new_ids = [event_id for (event_id,) in connection.execute(_insert_statement(), rows).all()]
+            # 批量插入不触发 ORM 事件，同一事务里只登记新插入的行（同 EventSyncService._insert），
+            # 其他成员的客户端按版本号增量拉取，不需要全量重新同步
+            if new_ids:
+                ChangeLogService.record(connection, family_id, 'event', new_ids, 'upsert', replace=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(new_ids)
+
+    @staticmethod
+    def _drop_existing(family_id: int, baby_id: Optional[int], rows: list) -> list:
+        """去掉与该宝宝已记录事件重复的行：同类型、同一分钟、同奶量"""
+        def key(event_type, ts, amount_ml):
+            return event_type, ts.replace(second=0, microsecond=0, tzinfo=None), amount_ml
+
+        low = min(r['timestamp'] for r in rows).replace(second=0)
+        high = max(r['timestamp'] for r in rows).replace(second=0) + timedelta(minutes=1)
+        existing = {
+            key(*r) for r in db.session.execute(
+                select(Event.type, Event.timestamp, Event.amount_ml)
+                .where(BabyService.in_baby(Event, family_id, baby_id), Event.timestamp >= low, Event.timestamp < high))
+        }
+        if not existing:
+            return rows
+        return [r for r in rows if key(r['type'], r['timestamp'], r['amount_ml']) not in existing]
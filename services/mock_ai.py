@@ -0,0 +1,117 @@
+"""
+模拟 AI 规则引擎
+所有关键词在加载时建成一棵字典树：从问题的每个位置沿树向下走，取最长的关键词后跳过该词，
+每个位置最多走“最长关键词长度”步，扫描耗时只与问题长度有关，不随规则和关键词数量增长。
+按命中次数给各分类打分，得分接近的分类合并回答。规则从数据文件加载。
+"""
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterator, List
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'mock_ai_rules.json')
+_END = ''  # 字典树节点中标记“到此为一个完整关键词”的键，不会与单个字符冲突
+
+
+class MockRuleEngine:
+    """关键词规则引擎"""
+
+    def __init__(self, rules: List[dict], default_answer: str,
+                 max_combined: int = 2, combine_ratio: float = 0.5):
+        self.default_answer = default_answer
+        self.max_combined = max(1, int(max_combined))
+        self.combine_ratio = float(combine_ratio)
+        self.answers: Dict[str, str] = {}
+        self._order: Dict[str, int] = {}
+        self._keyword_rules: Dict[str, List[str]] = {}
+
+        for i, rule in enumerate(rules):
+            rule_id = rule['id']
+            self.answers[rule_id] = rule['answer']
+            self._order[rule_id] = i
+            for kw in rule.get('keywords', []):
+                kw = kw.strip().lower()
+                if not kw:
+                    continue
+                owners = self._keyword_rules.setdefault(kw, [])
+                if rule_id not in owners:
+                    owners.append(rule_id)
+
+        self._trie: dict = {}
+        for kw in self._keyword_rules:
+            node = self._trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[_END] = kw
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_PATH) -> 'MockRuleEngine':
+        """从 JSON 规则文件创建引擎"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(
+            data.get('rules', []),
+            data.get('default', ''),
+            max_combined=data.get('max_combined', 2),
+            combine_ratio=data.get('combine_ratio', 0.5),
+        )
+
+    def keywords_in(self, prompt: str) -> Iterator[str]:
+        """按出现顺序给出命中的关键词：同一位置取最长的（“安全感”不会被拆成“安全”），命中后跳过该词"""
+        text = prompt.lower()
+        root = self._trie
+        i, n = 0, len(text)
+        while i < n:
+            node, longest, end = root, None, i
+            for j in range(i, n):
+                node = node.get(text[j])
+                if node is None:
+                    break
+                if _END in node:
+                    longest, end = node[_END], j + 1
+            if longest is None:
+                i += 1
+            else:
+                yield longest
+                i = end
+
+    def score(self, prompt: str) -> Counter:
+        """一次扫描统计各分类的命中次数"""
+        scores = Counter()
+        if not self._trie or not prompt:
+            return scores
+        for kw in self.keywords_in(prompt):
+            for rule_id in self._keyword_rules[kw]:
+                scores[rule_id] += 1
+        return scores
+
+    def match(self, prompt: str) -> List[str]:
+        """返回应回答的分类（按得分、规则顺序排序）"""
+        scores = self.score(prompt)
+        if not scores:
+            return []
+        ranked = sorted(scores, key=lambda r: (-scores[r], self._order[r]))
+        top = scores[ranked[0]]
+        return [r for r in ranked[:self.max_combined] if scores[r] >= top * self.combine_ratio]
+
+    def answer(self, prompt: str) -> str:
+        """生成回答，多个分类时合并"""
+        matched = self.match(prompt)
+        if not matched:
+            return self.default_answer
+        return '\n\n'.join(self.answers[r] for r in matched)
+
+
+_engine = MockRuleEngine.from_file()
+
+
+def get_engine() -> MockRuleEngine:
+    """获取默认规则引擎"""
+    return _engine
+
+
+def reload_rules(path: str = DEFAULT_RULES_PATH) -> MockRuleEngine:
+    """重新加载规则文件"""
+    global _engine
+    _engine = MockRuleEngine.from_file(path)
+    return _engine
@@ -0,0 +1,73 @@
+"""
+时光流服务
+按 (timestamp, id) 游标分页查询当前宝宝的时光，并用 `_moment_card.html` 中的宏渲染卡片 HTML。
+首屏和滚动加载走同一套渲染；单张卡片按 (id, updated_at) 缓存，内容未变的卡片不再重复渲染。
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+from flask import get_template_attribute
+from markupsafe import Markup
+from sqlalchemy import tuple_
+from models import Moment
+from services.baby_service import BabyService
+from utils.cache import get_cache
+from utils.cursor import decode_cursor, encode_cursor
+
+CARD_TEMPLATE = '_moment_card.html'
+CARD_MACRO = 'moment_card'
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# 键中带 updated_at，编辑或收藏后自然换键，旧条目靠容量淘汰
+_card_cache = get_cache('moment_cards', timeout=3600, maxsize=4096)
+
+
+class MomentFeedService:
+    """时光流服务类"""
+
+    @staticmethod
+    def encode_cursor(moment: Moment) -> str:
+        """用最后一条时光的时间和 id 生成游标"""
+        return encode_cursor(moment.timestamp, moment.id)
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """解析游标，格式不对时抛出 ValueError"""
+        return decode_cursor(cursor)
+
+    @staticmethod
+    def page(family_id: int, baby_id: Optional[int], cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+             favorite_only: bool = False, query: Optional[str] = None) -> Tuple[List[Moment], Optional[str]]:
+        """取一页时光，返回 (时光列表, 下一页游标)；没有更多时游标为 None
+
+        按 (timestamp DESC, id DESC) 排序，用行值比较作键集条件，深翻页直接从索引定位，不需要 OFFSET 扫描。
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        q = BabyService.scoped(Moment, family_id, baby_id)
+        if favorite_only:
+            q = q.filter(Moment.is_favorite == True)  # noqa: E712
+        if query:
+            q = q.filter(Moment.content.like(f'%{query}%'))
+        if cursor:
+            ts, moment_id = MomentFeedService.decode_cursor(cursor)
+            q = q.filter(tuple_(Moment.timestamp, Moment.id) < (ts, moment_id))
+        rows = q.order_by(Moment.timestamp.desc(), Moment.id.desc()).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, MomentFeedService.encode_cursor(rows[-1])
+        return rows, None
+
+    @staticmethod
+    def render_card(moment: Moment) -> str:
+        """渲染单张卡片，命中缓存时直接返回"""
+        key = (moment.id, moment.updated_at)
+        html = _card_cache.get(key)
+        if html is None:
+            html = str(get_template_attribute(CARD_TEMPLATE, CARD_MACRO)(moment))
+            _card_cache.set(key, html)
+        return html
+
+    @staticmethod
+    def render_cards(moments: List[Moment]) -> Markup:
+        """渲染一组卡片"""
+        return Markup(''.join(MomentFeedService.render_card(m) for m in moments))
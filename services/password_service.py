@@ -0,0 +1,96 @@
+"""
+密码哈希服务
+scrypt / pbkdf2 每次要消耗几十到几百毫秒 CPU。哈希在每个进程固定大小的线程池中执行，
+同时运行和排队的任务数有上限：撞库洪峰时多出的登录立即失败，不会占满请求线程和 CPU，
+其他页面不受影响。哈希参数（PASSWORD_HASH_METHOD）变更后，用户下次登录时透明地重新哈希。
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from utils import metrics
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_pid: Optional[int] = None
+
+
+class HashBusy(RuntimeError):
+    """哈希线程池已满或等待超时"""
+
+
+def normalize_method(method: str) -> str:
+    """把 'scrypt'、'pbkdf2' 等简写展开为哈希串中记录的完整参数，便于和已存哈希比较"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = (args + ['32768', '8', '1'][len(args):])[:3]
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        digest, iterations = (args + ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)][len(args):])[:2]
+        return f'pbkdf2:{digest}:{iterations}'
+    return method
+
+
+def _pool():
+    """按配置惰性创建线程池；fork 出的 worker 重新创建，不使用从 master 继承的线程"""
+    global _executor, _slots, _pid
+    if _executor is None or _pid != os.getpid():
+        with _lock:
+            if _executor is None or _pid != os.getpid():
+                workers = current_app.config['PASSWORD_HASH_WORKERS']
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                _slots = threading.BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_QUEUE'])
+                _pid = os.getpid()
+    return _executor, _slots
+
+
+def _run(operation: str, fn: Callable, *args):
+    """在线程池中执行哈希；排队已满或等待超时抛出 HashBusy"""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        metrics.AUTH_REJECTED.inc(reason='hash_busy')
+        raise HashBusy('登录请求较多，请稍后再试')
+    metrics.PASSWORD_HASH_PENDING.inc()
+    started = time.perf_counter()
+
+    def done(_: Future) -> None:
+        # 超时返回后任务仍会跑完，名额在任务结束时才归还
+        slots.release()
+        metrics.PASSWORD_HASH_PENDING.dec()
+        metrics.PASSWORD_HASH_DURATION.observe(time.perf_counter() - started, operation=operation)
+
+    future = executor.submit(fn, *args)
+    future.add_done_callback(done)
+    try:
+        return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+    except FutureTimeoutError:
+        metrics.AUTH_REJECTED.inc(reason='hash_timeout')
+        raise HashBusy('登录请求较多，请稍后再试')
+
+
+class PasswordService:
+    """密码哈希服务类"""
+
+    @staticmethod
+    def method() -> str:
+        """当前配置的哈希方法（完整参数）"""
+        return normalize_method(current_app.config['PASSWORD_HASH_METHOD'])
+
+    @staticmethod
+    def hash(password: str) -> str:
+        """生成密码哈希"""
+        return _run('hash', generate_password_hash, password, PasswordService.method())
+
+    @staticmethod
+    def verify(password_hash: str, password: str) -> bool:
+        """校验密码"""
+        return _run('verify', check_password_hash, password_hash, password)
+
+    @staticmethod
+    def needs_rehash(password_hash: str) -> bool:
+        """已存哈希的方法或参数与当前配置不同"""
+        return password_hash.split('$', 1)[0] != PasswordService.method()
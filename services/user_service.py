@@ -3,7 +3,7 @@
 """
 from typing import Optional
 from models import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.password_service import PasswordService
 
 
 class UserService:
@@ -15,8 +15,7 @@ class UserService:
         if User.query.filter_by(email=email).first():
             raise ValueError('该邮箱已被注册')
         
-        user = User(email=email)
-        user.set_password(password)
+        user = User(email=email, password_hash=PasswordService.hash(password))
         db.session.add(user)
         db.session.commit()
         return user
@@ -25,7 +24,10 @@ class UserService:
     def authenticate_user(email: str, password: str) -> Optional[User]:
         """验证用户登录"""
         user = User.query.filter_by(email=email).first()
-        if user and user.check_password(password):
+        if user and PasswordService.verify(user.password_hash, password):
+            if PasswordService.needs_rehash(user.password_hash):
+                user.password_hash = PasswordService.hash(password)
+                db.session.commit()
             return user
         return None
     
@@ -41,6 +43,6 @@ class UserService:
         if not user:
             return False
         
-        user.set_password(new_password)
+        user.password_hash = PasswordService.hash(new_password)
         db.session.commit()
         return True
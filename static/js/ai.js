@@ -0,0 +1,151 @@
+// 发送问题
+async function askQuestion() {
+    const input = document.getElementById('questionInput');
+    const question = input.value.trim();
+    
+    if (!question) {
+        alert('请输入问题');
+        return;
+    }
+    
+    // 显示用户消息
+    addMessage(question, 'user');
+    input.value = '';
+    
+    // 显示加载状态
+    showLoading('chatLoading');
+    
+    try {
+        const response = await fetch('/api/ai/chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ question: question })
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            addMessage(data.answer, 'ai');
+        } else {
+            addMessage('抱歉，AI助手暂时无法回答，请稍后再试。', 'ai');
+        }
+    } catch (error) {
+        addMessage('网络错误，请检查连接后重试。', 'ai');
+    } finally {
+        hideLoading('chatLoading');
+    }
+}
+
+// 添加消息到聊天容器
+function addMessage(message, type) {
+    const container = document.getElementById('chatContainer');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `chat-message ${type}-message`;
+    
+    if (type === 'user') {
+        messageDiv.innerHTML = `<strong>您：</strong>${message}`;
+    } else {
+        messageDiv.innerHTML = `<strong>AI助手：</strong>${message}`;
+    }
+    
+    container.appendChild(messageDiv);
+    container.scrollTop = container.scrollHeight;
+}
+
+// 分析时光记录
+async function analyzeMoments() {
+    showLoading('analysisResult');
+    
+    try {
+        const response = await fetch('/api/ai/analyze', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            document.getElementById('analysisContent').innerHTML = data.analysis.replace(/\n/g, '<br>');
+            document.getElementById('analysisResult').style.display = 'block';
+        } else {
+            document.getElementById('analysisContent').innerHTML = '分析失败，请稍后再试。';
+            document.getElementById('analysisResult').style.display = 'block';
+        }
+    } catch (error) {
+        document.getElementById('analysisContent').innerHTML = '网络错误，请检查连接后重试。';
+        document.getElementById('analysisResult').style.display = 'block';
+    } finally {
+        hideLoading('analysisResult');
+    }
+}
+
+// 获取健康建议
+async function getHealthAdvice() {
+    showLoading('analysisResult');
+    
+    try {
+        const response = await fetch('/api/ai/health', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            document.getElementById('analysisContent').innerHTML = data.advice.replace(/\n/g, '<br>');
+            document.getElementById('analysisResult').style.display = 'block';
+        } else {
+            document.getElementById('analysisContent').innerHTML = '获取建议失败，请稍后再试。';
+            document.getElementById('analysisResult').style.display = 'block';
+        }
+    } catch (error) {
+        document.getElementById('analysisContent').innerHTML = '网络错误，请检查连接后重试。';
+        document.getElementById('analysisResult').style.display = 'block';
+    } finally {
+        hideLoading('analysisResult');
+    }
+}
+
+// 显示快速贴士
+function showQuickTips() {
+    const tips = [
+        "💡 宝宝哭闹时，可以尝试轻柔的抚摸和轻声安慰",
+        "🍼 喂奶后记得给宝宝拍嗝，避免吐奶",
+        "😴 建立规律的睡眠时间，有助于宝宝健康成长",
+        "🧸 多与宝宝互动，促进大脑发育",
+        "🌡️ 定期测量体温，注意宝宝的身体状况",
+        "👶 保持宝宝周围环境清洁，预防感染"
+    ];
+    
+    const randomTip = tips[Math.floor(Math.random() * tips.length)];
+    addMessage(randomTip, 'ai');
+}
+
+// 显示加载状态
+function showLoading(elementId) {
+    const element = document.getElementById(elementId);
+    if (element) {
+        element.style.display = 'block';
+    }
+}
+
+// 隐藏加载状态
+function hideLoading(elementId) {
+    const element = document.getElementById(elementId);
+    if (element) {
+        element.style.display = 'none';
+    }
+}
+
+// 回车发送消息
+document.getElementById('questionInput').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        askQuestion();
+    }
+});
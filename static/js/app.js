@@ -0,0 +1,344 @@
+// 页面数据：模板在 page_data 块中输出 JSON，各页面脚本通过 PAGE_DATA 读取
+const PAGE_DATA = JSON.parse((document.getElementById('page-data') || {}).textContent || '{}');
+
+// 注册 Service Worker：离线打开首页、后台补传离线记录（见 static/js/sw.js）
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', function() {
+    navigator.serviceWorker.register('/sw.js', { updateViaCache: 'none' }).catch(function(e) {
+      console.warn('Service Worker 注册失败:', e);
+    });
+  });
+}
+
+// 封面点击效果
+function handleCoverClick() {
+  const coverImage = document.getElementById('coverImage');
+  if (!coverImage) return;
+  
+  // 添加点击动画效果
+  coverImage.style.transform = 'scale(0.98)';
+  coverImage.style.filter = 'brightness(1.1)';
+  
+  // 创建涟漪效果
+  createRippleEffect(coverImage);
+  
+  // 显示封面大图模态框
+  showCoverModal(coverImage.src);
+  
+  // 恢复原始状态
+  setTimeout(() => {
+    coverImage.style.transform = 'scale(1)';
+    coverImage.style.filter = 'brightness(0.95)';
+  }, 150);
+}
+
+// 创建涟漪效果
+function createRippleEffect(element) {
+  const ripple = document.createElement('div');
+  ripple.style.cssText = `
+    position: absolute;
+    border-radius: 50%;
+    background: rgba(255, 255, 255, 0.6);
+    transform: scale(0);
+    animation: ripple 0.6s linear;
+    pointer-events: none;
+    z-index: 10;
+  `;
+  
+  // 设置涟漪位置和大小
+  const rect = element.getBoundingClientRect();
+  const size = Math.max(rect.width, rect.height);
+  ripple.style.width = ripple.style.height = size + 'px';
+  ripple.style.left = (rect.width / 2 - size / 2) + 'px';
+  ripple.style.top = (rect.height / 2 - size / 2) + 'px';
+  
+  // 添加CSS动画
+  const style = document.createElement('style');
+  style.textContent = `
+    @keyframes ripple {
+      to {
+        transform: scale(4);
+        opacity: 0;
+      }
+    }
+  `;
+  document.head.appendChild(style);
+  
+  element.style.position = 'relative';
+  element.appendChild(ripple);
+  
+  // 动画结束后移除元素
+  setTimeout(() => {
+    if (ripple.parentNode) {
+      ripple.parentNode.removeChild(ripple);
+    }
+    if (style.parentNode) {
+      style.parentNode.removeChild(style);
+    }
+  }, 600);
+}
+
+// 封面悬停提示
+document.addEventListener('DOMContentLoaded', function() {
+  const coverImage = document.getElementById('coverImage');
+  if (coverImage) {
+    // 添加悬停提示
+    coverImage.title = '点击更换封面图片';
+    
+    // 添加键盘支持
+    coverImage.addEventListener('keydown', function(e) {
+      if (e.key === 'Enter' || e.key === ' ') {
+        e.preventDefault();
+        handleCoverClick();
+      }
+    });
+    
+    // 设置tabindex以支持键盘导航
+    coverImage.setAttribute('tabindex', '0');
+  }
+});
+
+// 显示封面大图模态框
+function showCoverModal(imageSrc) {
+  const modal = new bootstrap.Modal(document.getElementById('coverModal'));
+  const modalImage = document.getElementById('coverModalImage');
+  
+  // 设置图片源
+  modalImage.src = imageSrc;
+  
+  // 添加加载动画
+  modalImage.style.opacity = '0';
+  modalImage.style.transform = 'scale(0.8)';
+  
+  // 显示模态框
+  modal.show();
+  
+  // 图片加载完成后显示动画
+  modalImage.onload = function() {
+    modalImage.style.transition = 'all 0.5s ease';
+    modalImage.style.opacity = '1';
+    modalImage.style.transform = 'scale(1)';
+  };
+  
+  // 模态框显示时添加爱心动画
+  document.getElementById('coverModal').addEventListener('shown.bs.modal', function() {
+    startHeartAnimation();
+  });
+}
+
+// 更换封面
+function changeCover() {
+  document.getElementById('coverInput').click();
+  bootstrap.Modal.getInstance(document.getElementById('coverModal')).hide();
+}
+
+// 添加爱心动画
+function addHeart() {
+  createFloatingHeart();
+}
+
+// 开始爱心动画循环
+function startHeartAnimation() {
+  // 每3秒自动添加一个爱心
+  const heartInterval = setInterval(() => {
+    createFloatingHeart();
+  }, 3000);
+  
+  // 模态框关闭时清除定时器
+  document.getElementById('coverModal').addEventListener('hidden.bs.modal', function() {
+    clearInterval(heartInterval);
+  });
+}
+
+// 创建浮动爱心
+function createFloatingHeart() {
+  const heartsContainer = document.getElementById('heartsContainer');
+  const heart = document.createElement('div');
+  
+  // 随机位置
+  const x = Math.random() * 100;
+  const y = Math.random() * 100;
+  
+  heart.innerHTML = '❤️';
+  heart.style.cssText = `
+    position: absolute;
+    left: ${x}%;
+    top: ${y}%;
+    font-size: ${20 + Math.random() * 20}px;
+    color: #ff6b6b;
+    pointer-events: none;
+    z-index: 20;
+    animation: floatHeart 3s ease-out forwards;
+    transform: translate(-50%, -50%);
+  `;
+  
+  // 添加CSS动画
+  if (!document.getElementById('heartAnimation')) {
+    const style = document.createElement('style');
+    style.id = 'heartAnimation';
+    style.textContent = `
+      @keyframes floatHeart {
+        0% {
+          opacity: 1;
+          transform: translate(-50%, -50%) scale(0.5);
+        }
+        50% {
+          opacity: 1;
+          transform: translate(-50%, -50%) scale(1.2);
+        }
+        100% {
+          opacity: 0;
+          transform: translate(-50%, -50%) scale(1) translateY(-100px);
+        }
+      }
+    `;
+    document.head.appendChild(style);
+  }
+  
+  heartsContainer.appendChild(heart);
+  
+  // 3秒后移除爱心元素
+  setTimeout(() => {
+    if (heart.parentNode) {
+      heart.parentNode.removeChild(heart);
+    }
+  }, 3000);
+}
+
+// 点击图片区域添加爱心
+document.addEventListener('DOMContentLoaded', function() {
+  const coverModalBody = document.getElementById('coverModalBody');
+  if (coverModalBody) {
+    coverModalBody.addEventListener('click', function(e) {
+      if (e.target.id === 'coverModalImage') {
+        createFloatingHeart();
+      }
+    });
+  }
+});
+
+// 美观的删除确认弹框
+function showDeleteConfirm(message, deleteUrl, formData = null) {
+  const modal = new bootstrap.Modal(document.getElementById('deleteConfirmModal'));
+  const messageEl = document.getElementById('deleteConfirmMessage');
+  const confirmBtn = document.getElementById('confirmDeleteBtn');
+  
+  // 设置删除消息
+  messageEl.textContent = message;
+  
+  // 清除之前的事件监听器
+  const newConfirmBtn = confirmBtn.cloneNode(true);
+  confirmBtn.parentNode.replaceChild(newConfirmBtn, confirmBtn);
+  
+  // 添加确认删除事件
+  newConfirmBtn.addEventListener('click', function() {
+    if (formData) {
+      // 如果有表单数据，创建隐藏表单提交
+      const form = document.createElement('form');
+      form.method = 'POST';
+      form.action = deleteUrl;
+      
+      // 添加CSRF token（如果需要）
+      const csrfToken = document.querySelector('meta[name="csrf-token"]');
+      if (csrfToken) {
+        const csrfInput = document.createElement('input');
+        csrfInput.type = 'hidden';
+        csrfInput.name = 'csrf_token';
+        csrfInput.value = csrfToken.getAttribute('content');
+        form.appendChild(csrfInput);
+      }
+      
+      // 添加其他表单数据
+      for (const [key, value] of Object.entries(formData)) {
+        const input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = key;
+        input.value = value;
+        form.appendChild(input);
+      }
+      
+      document.body.appendChild(form);
+      form.submit();
+    } else {
+      // 直接跳转到删除URL
+      window.location.href = deleteUrl;
+    }
+    
+    // 关闭模态框
+    modal.hide();
+  });
+  
+  // 显示模态框
+  modal.show();
+}
+
+// 替换原生confirm函数
+function confirmDelete(message, deleteUrl, formData = null) {
+  return new Promise((resolve) => {
+    const modal = new bootstrap.Modal(document.getElementById('deleteConfirmModal'));
+    const messageEl = document.getElementById('deleteConfirmMessage');
+    const confirmBtn = document.getElementById('confirmDeleteBtn');
+    const cancelBtn = document.querySelector('#deleteConfirmModal .btn-outline-secondary');
+    
+    // 设置删除消息
+    messageEl.textContent = message;
+    
+    // 清除之前的事件监听器
+    const newConfirmBtn = confirmBtn.cloneNode(true);
+    const newCancelBtn = cancelBtn.cloneNode(true);
+    confirmBtn.parentNode.replaceChild(newConfirmBtn, confirmBtn);
+    cancelBtn.parentNode.replaceChild(newCancelBtn, cancelBtn);
+    
+    // 确认删除
+    newConfirmBtn.addEventListener('click', function() {
+      modal.hide();
+      resolve(true);
+    });
+    
+    // 取消删除
+    newCancelBtn.addEventListener('click', function() {
+      modal.hide();
+      resolve(false);
+    });
+    
+    // 显示模态框
+    modal.show();
+  });
+}
+
+
+// 主题切换功能
+document.addEventListener('DOMContentLoaded', function() {
+  const themeToggle = document.getElementById('themeToggle');
+  const themeIcon = document.getElementById('themeIcon');
+  const body = document.body;
+
+  // 获取保存的主题，默认为浅色主题
+  const savedTheme = localStorage.getItem('theme') || 'light';
+
+  // 应用保存的主题
+  if (savedTheme === 'dark') {
+    body.setAttribute('data-theme', 'dark');
+    themeIcon.className = 'bi bi-moon';
+  } else {
+    body.setAttribute('data-theme', 'light');
+    themeIcon.className = 'bi bi-sun';
+  }
+
+  // 主题切换事件
+  themeToggle.addEventListener('click', function() {
+    const currentTheme = body.getAttribute('data-theme');
+
+    if (currentTheme === 'dark') {
+      // 切换到浅色主题
+      body.setAttribute('data-theme', 'light');
+      themeIcon.className = 'bi bi-sun';
+      localStorage.setItem('theme', 'light');
+    } else {
+      // 切换到深色主题
+      body.setAttribute('data-theme', 'dark');
+      themeIcon.className = 'bi bi-moon';
+      localStorage.setItem('theme', 'dark');
+    }
+  });
+});
@@ -0,0 +1,93 @@
+// 趋势图：由 index.js 在图表进入视口或切到“换尿布”页签时连同 Chart.js 一起按需加载
+// 加载最近喂奶数据并绘图
+async function loadFeedTrend() {
+  try {
+    const res = await fetch('/api/feed_series?limit=30', { cache: 'no-store' });
+    const json = await res.json();
+    const items = json.items || [];
+    if (!items.length) {
+      document.getElementById('feedChartWrap').style.display = 'none';
+      document.getElementById('feedChartEmpty').style.display = '';
+      return;
+    }
+    const labels = items.map(i => new Date(i.ts).toLocaleString());
+    const data = items.map(i => i.amount_ml || 0);
+
+    const ctx = document.getElementById('feedChart');
+    if (!ctx) return;
+    new Chart(ctx, {
+      type: 'line',
+      data: {
+        labels,
+        datasets: [{
+          label: '喂奶 (ml)',
+          data,
+          borderColor: '#0d6efd',
+          backgroundColor: 'rgba(13,110,253,0.15)',
+          tension: 0.25,
+          fill: true,
+          pointRadius: 2
+        }]
+      },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        scales: {
+          y: { beginAtZero: true, title: { display: true, text: 'ml' } },
+          x: { ticks: { maxRotation: 30, minRotation: 0 } }
+        },
+        plugins: {
+          legend: { display: false },
+          tooltip: { mode: 'index', intersect: false }
+        }
+      }
+    });
+  } catch (e) {
+    console.error(e);
+    const empty = document.getElementById('feedChartEmpty');
+    if (empty) { empty.textContent = '加载趋势失败，请刷新重试'; empty.style.display = ''; }
+  }
+}
+
+
+// 换尿布趋势：按天统计（总次数/尿/便/尿+便），在切到“换尿布”页签时加载
+async function drawDiaperTrend() {
+  try {
+    const res = await fetch('/api/diaper_series?days=14', { cache: 'no-store' });
+    const json = await res.json();
+    const items = json.items || [];
+    if (!items.length) {
+      const wrap = document.getElementById('diaperChartWrap');
+      const empty = document.getElementById('diaperChartEmpty');
+      if (wrap) wrap.style.display = 'none';
+      if (empty) empty.style.display = '';
+      return;
+    }
+    const labels = items.map(i => i.day.slice(5)); // MM-DD
+    const total = items.map(i => i.total);
+    const pee = items.map(i => i.pee);
+    const poop = items.map(i => i.poop);
+    const both = items.map(i => i.both);
+    const ctx = document.getElementById('diaperChart');
+    if (!ctx) return;
+    new Chart(ctx, {
+      type: 'bar',
+      data: {
+        labels,
+        datasets: [
+          { label: '总次数', data: total, backgroundColor: 'rgba(33,150,243,0.45)' },
+          { label: '尿', data: pee, backgroundColor: 'rgba(33,150,243,0.25)' },
+          { label: '便', data: poop, backgroundColor: 'rgba(76,175,80,0.35)' },
+          { label: '尿+便', data: both, backgroundColor: 'rgba(220,53,69,0.35)' }
+        ]
+      },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: { legend: { position: 'top' } },
+        scales: { y: { beginAtZero: true } }
+      }
+    });
+  } catch (e) { console.error(e); }
+}
+
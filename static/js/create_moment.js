@@ -0,0 +1,84 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const uploadArea = document.getElementById('uploadArea');
+    const mediaInput = document.getElementById('mediaInput');
+    const imagePreview = document.getElementById('imagePreview');
+    const previewImg = document.getElementById('previewImg');
+    const previewVideo = document.getElementById('previewVideo');
+    const removeBtn = document.getElementById('removeImage');
+
+    // 点击上传区域
+    uploadArea.addEventListener('click', () => {
+        mediaInput.click();
+    });
+
+    // 拖拽上传
+    uploadArea.addEventListener('dragover', (e) => {
+        e.preventDefault();
+        uploadArea.classList.add('dragover');
+    });
+
+    uploadArea.addEventListener('dragleave', () => {
+        uploadArea.classList.remove('dragover');
+    });
+
+    uploadArea.addEventListener('drop', (e) => {
+        e.preventDefault();
+        uploadArea.classList.remove('dragover');
+        const files = e.dataTransfer.files;
+        if (files.length > 0) {
+            handleFile(files[0]);
+        }
+    });
+
+    // 文件选择
+    mediaInput.addEventListener('change', (e) => {
+        if (e.target.files.length > 0) {
+            handleFile(e.target.files[0]);
+        }
+    });
+
+    // 移除媒体
+    removeBtn.addEventListener('click', () => {
+        mediaInput.value = '';
+        imagePreview.style.display = 'none';
+        uploadArea.style.display = 'block';
+        previewImg.src = '';
+        previewVideo.src = '';
+        previewImg.style.display = 'none';
+        previewVideo.style.display = 'none';
+    });
+
+    function handleFile(file) {
+        // 类型检查
+        const isImage = file.type.startsWith('image/');
+        const isVideo = file.type === 'video/mp4';
+        if (!isImage && !isVideo) {
+            alert('只支持图片或MP4视频');
+            return;
+        }
+
+        // 大小检查 (15MB)
+        if (file.size > 15 * 1024 * 1024) {
+            alert('文件大小不能超过 15MB');
+            return;
+        }
+
+        // 预览
+        imagePreview.style.display = 'block';
+        uploadArea.style.display = 'none';
+        previewImg.style.display = 'none';
+        previewVideo.style.display = 'none';
+        
+        const reader = new FileReader();
+        reader.onload = (e) => {
+            if (isImage) {
+                previewImg.src = e.target.result;
+                previewImg.style.display = 'block';
+            } else if (isVideo) {
+                previewVideo.src = e.target.result;
+                previewVideo.style.display = 'block';
+            }
+        };
+        reader.readAsDataURL(file);
+    }
+});
@@ -0,0 +1,569 @@
+// 实时更新：
+// 1) “距离上次”改为 时:分:秒，每秒更新
+// 2) “上次时间”在前端统一格式化为 HH:MM:SS（本地时区）
+// 最近一次记录的时间；离线记录和同步下来的记录会更新它
+const lastEventTs = { feed: PAGE_DATA.last_feed_ts, diaper: PAGE_DATA.last_diaper_ts };
+const LAST_TEXT_IDS = { feed: 'lastFeedText', diaper: 'lastDiaperText' };
+const ELAPSED_IDS = { feed: 'feedElapsed', diaper: 'diaperElapsed' };
+
+function two(n){ return String(n).padStart(2,'0'); }
+function fmtClock(d){ return `${two(d.getHours())}:${two(d.getMinutes())}:${two(d.getSeconds())}`; }
+
+function setLastEvent(type, ts) {
+  if (lastEventTs[type] && Date.parse(lastEventTs[type]) >= Date.parse(ts)) return;
+  lastEventTs[type] = ts;
+  const n = document.getElementById(LAST_TEXT_IDS[type]);
+  if (n) n.textContent = fmtClock(new Date(ts));
+}
+
+function startElapsedTicker() {
+  function fmtElapsedHMS(ms){
+    if (ms < 0 || isNaN(ms)) return '--:--:--';
+    const s = Math.floor(ms/1000);
+    const h = Math.floor(s/3600);
+    const m = Math.floor((s%3600)/60);
+    const ss = s%60;
+    return `${two(h)}:${two(m)}:${two(ss)}`;
+  }
+
+  // 首次渲染：将"上次时间"统一渲染为 HH:MM:SS（时间是北京时间 ISO 串，直接解析）
+  Object.keys(lastEventTs).forEach(type => {
+    const n = document.getElementById(LAST_TEXT_IDS[type]);
+    if (lastEventTs[type] && n) n.textContent = fmtClock(new Date(lastEventTs[type]));
+  });
+
+  function tick(){
+    const now = Date.now();
+    Object.keys(lastEventTs).forEach(type => {
+      const el = document.getElementById(ELAPSED_IDS[type]);
+      if (lastEventTs[type] && el) el.textContent = fmtElapsedHMS(now - Date.parse(lastEventTs[type]));
+    });
+  }
+  tick();
+  setInterval(tick, 1000);
+}
+document.addEventListener('DOMContentLoaded', startElapsedTicker);
+
+// 可编辑的常用毫升选项，本地存储
+function initEditablePresets(){
+  const container = document.getElementById('presetContainer');
+  const form = container ? container.closest('form') : null;
+  const key = 'feed_presets_ml_v1';
+  function getPresets(){
+    try{
+      const raw = localStorage.getItem(key);
+      const arr = raw ? JSON.parse(raw) : [30,40,50,60];
+      return (Array.isArray(arr) && arr.length) ? arr.slice(0,8) : [30,40,50,60];
+    }catch{return [30,40,50,60];}
+  }
+  function setPresets(arr){
+    const cleaned = (arr||[]).map(x=>parseInt(x,10)).filter(x=>!isNaN(x) && x>0);
+    const uniq = Array.from(new Set(cleaned)).slice(0,8);
+    localStorage.setItem(key, JSON.stringify(uniq.length?uniq:[30,40,50,60]));
+  }
+  function render(){
+    if(!container) return;
+    container.innerHTML = '';
+    const presets = getPresets();
+    presets.forEach(v => {
+      const btn = document.createElement('button');
+      btn.type = 'button';
+      btn.className = 'btn btn-outline-secondary btn-sm';
+      btn.textContent = v + ' ml';
+      btn.addEventListener('click', ()=>{ if(form){ form.amount_ml.value = v; }});
+      container.appendChild(btn);
+    });
+  }
+  render();
+
+  const editBtn = document.getElementById('editPresetsBtn');
+  const editor = document.getElementById('presetEditor');
+  const saveBtn = document.getElementById('savePresetsBtn');
+  const cancelBtn = document.getElementById('cancelPresetsBtn');
+  function fillInputs(){
+    const vals = getPresets();
+    for(let i=0;i<4;i++){
+      const el = document.getElementById('p'+i);
+      if(el) el.value = vals[i]!==undefined ? vals[i] : '';
+    }
+  }
+  if(editBtn){
+    editBtn.addEventListener('click', ()=>{
+      if(editor){ editor.classList.toggle('d-none'); if(!editor.classList.contains('d-none')) fillInputs(); }
+    });
+  }
+  if(saveBtn){
+    saveBtn.addEventListener('click', ()=>{
+      const vals = [];
+      for(let i=0;i<4;i++){
+        const el = document.getElementById('p'+i);
+        if(el && el.value) vals.push(el.value);
+      }
+      setPresets(vals);
+      render();
+      if(editor) editor.classList.add('d-none');
+    });
+  }
+  if(cancelBtn){
+    cancelBtn.addEventListener('click', ()=>{ if(editor) editor.classList.add('d-none'); });
+  }
+}
+
+document.addEventListener('DOMContentLoaded', initEditablePresets);
+
+// 撤销按钮通过 fetch 提交，避免在表单内嵌套另一个表单导致 HTML 渲染错误
+document.addEventListener('DOMContentLoaded', function(){
+  const btn = document.getElementById('undoBtn');
+  if(!btn) return;
+  btn.addEventListener('click', async function(){
+    // 刚记下还没同步出去的记录直接从发件箱删除
+    if (lastLocalRecord && Date.now() - lastLocalRecord.at < 30000 && typeof Outbox !== 'undefined') {
+      const stillPending = (await Outbox.pending()).some(r => r.client_id === lastLocalRecord.client_id);
+      if (stillPending) {
+        await Outbox.remove([lastLocalRecord.client_id]);
+        location.reload();
+        return;
+      }
+    }
+    try{
+      const resp = await fetch(PAGE_DATA.undo_url, { method: 'POST' });
+      if(resp.redirected) { window.location.href = resp.url; return; }
+      location.reload();
+    }catch(e){ location.reload(); }
+  });
+});
+
+// 离线优先记录：写入 IndexedDB 发件箱后立即更新页面，再批量同步到 /api/events/sync；
+// 不支持 IndexedDB 或未登录时仍走原来的表单提交
+const SYNC_TAG = 'outbox-sync';
+const countedClientIds = new Set();  // 已在本页计数过的本地记录，同步回来时不重复累加
+const countedEventIds = new Set();  // 已计数的服务端记录（页面同步和 Service Worker 通知可能带回同一条）
+let lastLocalRecord = null;
+
+function isToday(ts) {
+  return new Date(ts).toDateString() === new Date().toDateString();
+}
+
+function bumpCounter(id, delta) {
+  const el = document.getElementById(id);
+  if (el) el.textContent = String((parseInt(el.textContent, 10) || 0) + delta);
+}
+
+// 把一条记录计入页面上的“上次时间”和今日统计
+function applyEvent(evt) {
+  if ((evt.client_id && countedClientIds.has(evt.client_id)) || (evt.id && countedEventIds.has(evt.id))) return;
+  if (evt.client_id) countedClientIds.add(evt.client_id);
+  if (evt.id) countedEventIds.add(evt.id);
+  setLastEvent(evt.type, evt.timestamp);
+  if (!isToday(evt.timestamp)) return;
+  if (evt.type === 'feed') {
+    bumpCounter('todayFeedCount', 1);
+    bumpCounter('todayFeedTotal', parseInt(evt.amount_ml, 10) || 0);
+  } else if (evt.type === 'diaper') {
+    bumpCounter('todayDiaperCount', 1);
+  }
+}
+
+function showRecordStatus(message, level) {
+  const box = document.getElementById('recordStatus');
+  if (!box) return;
+  box.className = `small mt-2 text-${level || 'muted'}`;
+  box.textContent = message;
+}
+
+async function refreshPendingStatus() {
+  const pending = (await Outbox.pending()).filter(r => r.uid === PAGE_DATA.uid);
+  if (pending.length) showRecordStatus(`${pending.length} 条记录待同步，联网后自动上传`, 'warning');
+  return pending.length;
+}
+
+// 让 Service Worker 在网络恢复后补传（支持后台同步时即使页面关闭也会执行）
+async function scheduleBackgroundSync() {
+  if (!('serviceWorker' in navigator)) return;
+  try {
+    const reg = await navigator.serviceWorker.ready;
+    if (reg.sync) await reg.sync.register(SYNC_TAG);
+  } catch (e) { /* 后台同步不可用时依赖 online 事件重试 */ }
+}
+
+function applySyncSummary(summary) {
+  // 变更日志条目：页面渲染时已包含令牌版本之前的记录；删除只影响历史页，首页汇总不回退。
+  // 变更日志覆盖整个家庭，首页只统计当前宝宝
+  const renderedRevision = parseInt(PAGE_DATA.sync_token, 10) || 0;
+  summary.changes
+    .filter(c => c.entity === 'event' && c.op === 'upsert' && c.revision > renderedRevision)
+    .filter(c => !PAGE_DATA.baby_id || c.data.baby_id === PAGE_DATA.baby_id)
+    .forEach(c => applyEvent(c.data));
+  if (summary.rejected.length) {
+    showRecordStatus(`${summary.rejected.length} 条记录被服务器拒绝：${summary.rejected[0].error}`, 'danger');
+  }
+}
+
+async function syncOutbox() {
+  try {
+    const summary = await Outbox.flush(PAGE_DATA.uid);
+    applySyncSummary(summary);
+    if (!(await refreshPendingStatus()) && !summary.rejected.length && summary.sent) {
+      showRecordStatus('已同步', 'success');
+    }
+  } catch (e) {
+    await refreshPendingStatus();
+    scheduleBackgroundSync();
+  }
+}
+
+// 家庭其他成员（或自己的其他设备）写入后，服务端推送新的版本号，收到后立即拉取增量
+let changeStream = null;
+let streamRevision = 0;
+
+function openChangeStream() {
+  if (changeStream || typeof EventSource === 'undefined') return;
+  changeStream = new EventSource(`/api/changes/stream?since=${streamRevision}`);
+  changeStream.addEventListener('revision', event => {
+    const revision = JSON.parse(event.data).revision;
+    if (revision > streamRevision) {
+      streamRevision = revision;
+      syncOutbox();
+    }
+  });
+  // 重连时带上最新版本号；名额已满（503）等错误时浏览器不再重连，等下次切回页面
+  changeStream.addEventListener('error', () => {
+    if (changeStream.readyState === EventSource.CLOSED) changeStream = null;
+    else { closeChangeStream(); setTimeout(openChangeStream, 3000); }
+  });
+}
+
+function closeChangeStream() {
+  if (changeStream) changeStream.close();
+  changeStream = null;
+}
+
+async function recordLocally(form, evt) {
+  const button = form.querySelector('button[type=submit], button:not([type])');
+  evt.client_id = Outbox.newClientId();
+  evt.uid = PAGE_DATA.uid;
+  evt.timestamp = new Date().toISOString();
+  try {
+    await Outbox.add(evt);
+  } catch (e) {
+    form.submit();  // IndexedDB 不可用（如隐私模式）时退回表单提交
+    return;
+  }
+  lastLocalRecord = { client_id: evt.client_id, at: Date.now() };
+  applyEvent(evt);
+  form.reset();
+  if (button) button.disabled = false;
+  showRecordStatus(evt.type === 'feed' ? `已记录喂奶 ${evt.amount_ml} ml` : '已记录换尿布', 'success');
+  syncOutbox();
+}
+
+document.addEventListener('DOMContentLoaded', function(){
+  if (typeof Outbox === 'undefined' || !Outbox.supported || !PAGE_DATA.uid) return;
+
+  // 页面数据对应的同步令牌，之后只需拉取增量
+  if (PAGE_DATA.sync_token) Outbox.setToken(PAGE_DATA.uid, PAGE_DATA.sync_token).catch(() => {});
+
+  const feedForm = document.getElementById('feedForm');
+  if (feedForm) {
+    feedForm.addEventListener('submit', function(e){
+      e.preventDefault();
+      recordLocally(feedForm, { type: 'feed', amount_ml: parseInt(feedForm.amount_ml.value, 10), note: '' });
+    });
+  }
+  const diaperForm = document.getElementById('diaperForm');
+  if (diaperForm) {
+    diaperForm.addEventListener('submit', function(e){
+      e.preventDefault();
+      const kind = diaperForm.querySelector('input[name=diaper_kind]:checked');
+      recordLocally(diaperForm, { type: 'diaper', diaper_kind: kind ? kind.value : '', note: '' });
+    });
+  }
+
+  window.addEventListener('online', syncOutbox);
+  // 切回页面时拉取其他设备的新记录（没有变化时只是一次空的增量查询），页面可见期间保持推送连接
+  streamRevision = parseInt(PAGE_DATA.sync_token, 10) || 0;
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible') {
+      syncOutbox();
+      openChangeStream();
+    } else {
+      closeChangeStream();
+    }
+  });
+  if (document.visibilityState === 'visible') openChangeStream();
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.addEventListener('message', event => {
+      if (event.data && event.data.type === 'outbox-synced') {
+        applySyncSummary(event.data.summary);
+        refreshPendingStatus();
+      }
+    });
+  }
+  refreshPendingStatus().then(count => { if (count) syncOutbox(); });
+});
+
+// 图表代码和 Chart.js 按需加载，首屏不下载
+const CHART_JS_URL = 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js';
+let chartsReady = null;
+function loadScript(src) {
+  return new Promise((resolve, reject) => {
+    const s = document.createElement('script');
+    s.src = src;
+    s.onload = resolve;
+    s.onerror = reject;
+    document.head.appendChild(s);
+  });
+}
+function loadCharts() {
+  if (!chartsReady) {
+    chartsReady = Promise.all([
+      typeof Chart === 'undefined' ? loadScript(CHART_JS_URL) : Promise.resolve(),
+      loadScript(PAGE_DATA.charts_js)
+    ]);
+  }
+  return chartsReady;
+}
+
+// 喂奶趋势在滚动到可见时才加载
+document.addEventListener('DOMContentLoaded', function(){
+  const wrap = document.getElementById('feedChartWrap');
+  if (!wrap) return;
+  const draw = () => loadCharts().then(loadFeedTrend).catch(e => console.error(e));
+  if (!('IntersectionObserver' in window)) { window.addEventListener('load', draw, { once: true }); return; }
+  const observer = new IntersectionObserver(entries => {
+    if (entries.some(e => e.isIntersecting)) { observer.disconnect(); draw(); }
+  }, { rootMargin: '200px' });
+  observer.observe(wrap);
+});
+
+
+// 换尿布趋势在切到“换尿布”页签时加载
+document.addEventListener('DOMContentLoaded', function(){
+  const diaperTab = document.getElementById('diaper-tab');
+  if (!diaperTab) return;
+  // 切到换尿布时隐藏喂奶趋势
+  const feedTrend = document.getElementById('feedTrendSection');
+  const trigger = () => {
+    loadCharts().then(drawDiaperTrend).catch(e => console.error(e));
+    if (feedTrend) feedTrend.style.display = 'none';
+  };
+  // bootstrap tab 事件
+  diaperTab.addEventListener('shown.bs.tab', trigger, { once: true });
+  // fallback：若未加载到 bootstrap
+  if (!(window.bootstrap && bootstrap.Tab)) {
+    diaperTab.addEventListener('click', trigger, { once: true });
+  }
+  // 切回喂奶时显示喂奶趋势
+  const feedTab = document.getElementById('feed-tab');
+  const showFeed = () => { if (feedTrend) feedTrend.style.display = ''; };
+  if (feedTab) {
+    feedTab.addEventListener('shown.bs.tab', showFeed);
+    if (!(window.bootstrap && bootstrap.Tab)) {
+      feedTab.addEventListener('click', showFeed);
+    }
+  }
+  
+  // 切换到疫苗时隐藏喂奶趋势
+  const vaccineTab = document.getElementById('vaccine-tab');
+  const hideFeed = () => { if (feedTrend) feedTrend.style.display = 'none'; };
+  if (vaccineTab) {
+    vaccineTab.addEventListener('shown.bs.tab', hideFeed);
+    if (!(window.bootstrap && bootstrap.Tab)) {
+      vaccineTab.addEventListener('click', hideFeed);
+    }
+  }
+});
+
+// Fallback：若某些设备未正确加载 Bootstrap JS，使用原生 JS 切换标签
+document.addEventListener('DOMContentLoaded', function () {
+  if (window.bootstrap && bootstrap.Tab) return; // 已加载则跳过
+  const tabs = document.querySelectorAll('#mainTabs .nav-link');
+  const panes = document.querySelectorAll('#mainTabsContent .tab-pane');
+  tabs.forEach(link => {
+    link.addEventListener('click', function (e) {
+      e.preventDefault();
+      const targetSel = this.getAttribute('href');
+      tabs.forEach(t => t.classList.remove('active'));
+      this.classList.add('active');
+      panes.forEach(p => p.classList.remove('show', 'active'));
+      const pane = document.querySelector(targetSel);
+      if (pane) { pane.classList.add('show', 'active'); }
+    }, { passive: false });
+  });
+});
+
+// 疫苗相关功能
+function markVaccinated() {
+  alert('标记已接种功能开发中...');
+}
+
+function viewVaccineHistory() {
+  alert('查看历史功能开发中...');
+}
+
+// 疫苗倒计时功能
+async function updateVaccineCountdown() {
+  // 获取服务器时间
+  let now;
+  try {
+    const response = await fetch('/api/server_time');
+    const data = await response.json();
+    now = new Date(data.server_time);
+  } catch (error) {
+    console.warn('无法获取服务器时间，使用本地时间');
+    now = new Date();
+  }
+  
+  // 从服务器获取宝宝出生日期（北京时间）
+  const babyBirthDate = new Date(PAGE_DATA.baby_birth);
+  
+  // 计算乙肝疫苗第二针时间（出生后1个月）
+  const hepatitisDate = new Date(babyBirthDate);
+  hepatitisDate.setMonth(hepatitisDate.getMonth() + 1);
+  const hepatitisDiff = hepatitisDate - now;
+  const hepatitisDays = Math.ceil(hepatitisDiff / (1000 * 60 * 60 * 24));
+  
+  // 计算五联疫苗第一针时间（出生后2个月）
+  const pentavalentDate = new Date(babyBirthDate);
+  pentavalentDate.setMonth(pentavalentDate.getMonth() + 2);
+  const pentavalentDiff = pentavalentDate - now;
+  const pentavalentDays = Math.ceil(pentavalentDiff / (1000 * 60 * 60 * 24));
+  
+  // 使用统一的显示更新逻辑
+  updateCountdownDisplay(hepatitisDate, pentavalentDate, hepatitisDays, pentavalentDays);
+}
+
+// 页面加载时初始化倒计时
+document.addEventListener('DOMContentLoaded', function() {
+  // 处理URL锚点，激活对应的标签页（优先执行）
+  const hash = window.location.hash;
+  if (hash) {
+    const tabElement = document.querySelector(`a[href="${hash}"]`);
+    if (tabElement) {
+      // 使用Bootstrap的Tab API激活标签页
+      const tab = new bootstrap.Tab(tabElement);
+      tab.show();
+    }
+  }
+  
+  updateVaccineCountdown().catch(error => {
+    console.error('疫苗倒计时初始化失败:', error);
+    // 如果异步调用失败，使用同步版本
+    updateVaccineCountdownSync();
+  });
+  // 每小时更新一次倒计时
+  setInterval(() => {
+    updateVaccineCountdown().catch(error => {
+      console.error('疫苗倒计时更新失败:', error);
+    });
+  }, 60 * 60 * 1000);
+});
+
+// 处理URL锚点的独立函数，确保在其他事件之前执行
+function handleUrlHash() {
+  const hash = window.location.hash;
+  if (hash) {
+    const tabElement = document.querySelector(`a[href="${hash}"]`);
+    if (tabElement) {
+      // 延迟执行，确保Bootstrap已加载
+      setTimeout(() => {
+        const tab = new bootstrap.Tab(tabElement);
+        tab.show();
+      }, 100);
+    }
+  }
+}
+
+// 立即执行URL锚点处理
+handleUrlHash();
+
+// 同步版本的倒计时函数（备用）
+function updateVaccineCountdownSync() {
+  const now = new Date();
+  const babyBirthDate = new Date(PAGE_DATA.baby_birth);
+  
+  // 计算疫苗时间
+  const hepatitisDate = new Date(babyBirthDate);
+  hepatitisDate.setMonth(hepatitisDate.getMonth() + 1);
+  const hepatitisDiff = hepatitisDate - now;
+  const hepatitisDays = Math.ceil(hepatitisDiff / (1000 * 60 * 60 * 24));
+  
+  const pentavalentDate = new Date(babyBirthDate);
+  pentavalentDate.setMonth(pentavalentDate.getMonth() + 2);
+  const pentavalentDiff = pentavalentDate - now;
+  const pentavalentDays = Math.ceil(pentavalentDiff / (1000 * 60 * 60 * 24));
+  
+  // 更新显示（使用相同的逻辑）
+  updateCountdownDisplay(hepatitisDate, pentavalentDate, hepatitisDays, pentavalentDays);
+}
+
+// 提取显示更新逻辑
+function updateCountdownDisplay(hepatitisDate, pentavalentDate, hepatitisDays, pentavalentDays) {
+  // 更新日期显示
+  const nextVaccineDateEl = document.getElementById('nextVaccineDate');
+  const hepatitisDateEl = document.getElementById('hepatitisDate');
+  const pentavalentDateEl = document.getElementById('pentavalentDate');
+  
+  if (nextVaccineDateEl) {
+    nextVaccineDateEl.textContent = hepatitisDate.toLocaleDateString('zh-CN');
+  }
+  if (hepatitisDateEl) {
+    hepatitisDateEl.textContent = hepatitisDate.toLocaleDateString('zh-CN');
+  }
+  if (pentavalentDateEl) {
+    pentavalentDateEl.textContent = pentavalentDate.toLocaleDateString('zh-CN');
+  }
+  
+  // 更新倒计时显示
+  const hepatitisCountdown = document.getElementById('hepatitisCountdown');
+  const pentavalentCountdown = document.getElementById('pentavalentCountdown');
+  const vaccineCountdown = document.getElementById('vaccineCountdown');
+  
+  if (hepatitisCountdown) {
+    if (hepatitisDays > 7) {
+      hepatitisCountdown.textContent = `${hepatitisDays} 天`;
+      hepatitisCountdown.className = 'vaccine-countdown normal';
+    } else if (hepatitisDays > 0) {
+      hepatitisCountdown.textContent = `${hepatitisDays} 天`;
+      hepatitisCountdown.className = 'vaccine-countdown warning';
+    } else if (hepatitisDays === 0) {
+      hepatitisCountdown.textContent = '今天';
+      hepatitisCountdown.className = 'vaccine-countdown urgent';
+    } else {
+      hepatitisCountdown.textContent = `已逾期 ${Math.abs(hepatitisDays)} 天`;
+      hepatitisCountdown.className = 'vaccine-countdown urgent';
+    }
+  }
+  
+  if (pentavalentCountdown) {
+    if (pentavalentDays > 7) {
+      pentavalentCountdown.textContent = `${pentavalentDays} 天`;
+      pentavalentCountdown.className = 'vaccine-countdown normal';
+    } else if (pentavalentDays > 0) {
+      pentavalentCountdown.textContent = `${pentavalentDays} 天`;
+      pentavalentCountdown.className = 'vaccine-countdown warning';
+    } else if (pentavalentDays === 0) {
+      pentavalentCountdown.textContent = '今天';
+      pentavalentCountdown.className = 'vaccine-countdown urgent';
+    } else {
+      pentavalentCountdown.textContent = `已逾期 ${Math.abs(pentavalentDays)} 天`;
+      pentavalentCountdown.className = 'vaccine-countdown urgent';
+    }
+  }
+  
+  if (vaccineCountdown) {
+    if (hepatitisDays > 7) {
+      vaccineCountdown.textContent = `还有 ${hepatitisDays} 天`;
+      vaccineCountdown.className = 'vaccine-countdown normal';
+    } else if (hepatitisDays > 0) {
+      vaccineCountdown.textContent = `还有 ${hepatitisDays} 天`;
+      vaccineCountdown.className = 'vaccine-countdown warning';
+    } else if (hepatitisDays === 0) {
+      vaccineCountdown.textContent = '今天接种';
+      vaccineCountdown.className = 'vaccine-countdown urgent';
+    } else {
+      vaccineCountdown.textContent = `已逾期 ${Math.abs(hepatitisDays)} 天`;
+      vaccineCountdown.className = 'vaccine-countdown urgent';
+    }
+  }
+}
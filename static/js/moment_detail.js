@@ -0,0 +1,118 @@
+// 收藏功能
+async function toggleFavorite(momentId) {
+  try {
+    const response = await fetch(`/moments/${momentId}/favorite`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      }
+    });
+    
+    const data = await response.json();
+    if (data.success) {
+      const favoriteIcon = document.getElementById('favoriteIcon');
+      const favoriteText = document.getElementById('favoriteText');
+      const favoriteBtn = document.getElementById('favoriteBtn');
+      
+      if (data.is_favorite) {
+        favoriteIcon.className = 'bi bi-heart-fill';
+        favoriteBtn.classList.remove('btn-light');
+        favoriteBtn.classList.add('btn-danger');
+      } else {
+        favoriteIcon.className = 'bi bi-heart';
+        favoriteBtn.classList.remove('btn-danger');
+        favoriteBtn.classList.add('btn-light');
+      }
+      
+      // 显示提示
+      showToast(data.is_favorite ? '已添加到收藏' : '已取消收藏');
+    }
+  } catch (error) {
+    console.error('收藏操作失败:', error);
+    showToast('操作失败，请重试');
+  }
+}
+
+// 分享功能
+async function shareMoment(momentId) {
+  try {
+    const response = await fetch(`/moments/${momentId}/share`);
+    const data = await response.json();
+    
+    if (data.success) {
+      // 检查是否支持Web Share API
+      if (navigator.share) {
+        try {
+          await navigator.share({
+            title: data.title,
+            text: data.description,
+            url: data.share_url
+          });
+        } catch (error) {
+          // 用户取消分享或分享失败，复制链接到剪贴板
+          await copyToClipboard(data.share_url);
+        }
+      } else {
+        // 不支持Web Share API，复制链接到剪贴板
+        await copyToClipboard(data.share_url);
+      }
+    }
+  } catch (error) {
+    console.error('分享失败:', error);
+    showToast('分享失败，请重试');
+  }
+}
+
+// 复制到剪贴板
+async function copyToClipboard(text) {
+  try {
+    await navigator.clipboard.writeText(text);
+    showToast('链接已复制到剪贴板');
+  } catch (error) {
+    // 降级方案：使用传统方法
+    const textArea = document.createElement('textarea');
+    textArea.value = text;
+    document.body.appendChild(textArea);
+    textArea.select();
+    document.execCommand('copy');
+    document.body.removeChild(textArea);
+    showToast('链接已复制到剪贴板');
+  }
+}
+
+// 显示提示消息
+function showToast(message) {
+  // 创建提示元素
+  const toast = document.createElement('div');
+  toast.className = 'toast-notification';
+  toast.textContent = message;
+  toast.style.cssText = `
+    position: fixed;
+    top: 20px;
+    right: 20px;
+    background: #333;
+    color: white;
+    padding: 12px 20px;
+    border-radius: 6px;
+    z-index: 9999;
+    font-size: 14px;
+    box-shadow: 0 4px 12px rgba(0,0,0,0.3);
+    transform: translateX(100%);
+    transition: transform 0.3s ease;
+  `;
+  
+  document.body.appendChild(toast);
+  
+  // 显示动画
+  setTimeout(() => {
+    toast.style.transform = 'translateX(0)';
+  }, 100);
+  
+  // 自动隐藏
+  setTimeout(() => {
+    toast.style.transform = 'translateX(100%)';
+    setTimeout(() => {
+      document.body.removeChild(toast);
+    }, 300);
+  }, 2000);
+}
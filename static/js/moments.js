@@ -0,0 +1,248 @@
+// 时光列表排序和筛选功能
+function sortByTime(order) {
+  const momentsList = document.querySelector('.moments-list');
+  if (!momentsList) return;
+  
+  const items = Array.from(momentsList.children);
+  items.sort((a, b) => {
+    const timeA = new Date(a.dataset.timestamp);
+    const timeB = new Date(b.dataset.timestamp);
+    return order === 'desc' ? timeB - timeA : timeA - timeB;
+  });
+  
+  // 重新排列元素
+  items.forEach(item => momentsList.appendChild(item));
+  
+  // 显示排序提示
+  showToast(order === 'desc' ? '已按最新时间排序' : '已按最早时间排序');
+}
+
+function filterFavorites() {
+  const items = document.querySelectorAll('.moment-item');
+  items.forEach(item => {
+    const isFavorite = item.dataset.favorite === 'true';
+    item.style.display = isFavorite ? 'block' : 'none';
+  });
+  
+  showToast('已筛选收藏时光');
+}
+
+function showAll() {
+  const items = document.querySelectorAll('.moment-item');
+  items.forEach(item => {
+    item.style.display = 'block';
+  });
+  
+  showToast('已显示全部时光');
+}
+
+// 简单的提示功能
+function showToast(message) {
+  // 创建提示元素
+  const toast = document.createElement('div');
+  toast.className = 'toast-notification';
+  toast.textContent = message;
+  toast.style.cssText = `
+    position: fixed;
+    top: 20px;
+    right: 20px;
+    background: rgba(0,0,0,0.8);
+    color: white;
+    padding: 12px 20px;
+    border-radius: 6px;
+    font-size: 14px;
+    z-index: 9999;
+    opacity: 0;
+    transform: translateX(100%);
+    transition: all 0.3s ease;
+  `;
+  
+  document.body.appendChild(toast);
+  
+  // 显示动画
+  setTimeout(() => {
+    toast.style.opacity = '1';
+    toast.style.transform = 'translateX(0)';
+  }, 100);
+  
+  // 自动隐藏
+  setTimeout(() => {
+    toast.style.opacity = '0';
+    toast.style.transform = 'translateX(100%)';
+    setTimeout(() => {
+      document.body.removeChild(toast);
+    }, 300);
+  }, 2000);
+}
+
+// 初始化视频控制功能
+function initVideoControls(root = document) {
+  const videoContainers = root.querySelectorAll('.media-container');
+  
+  videoContainers.forEach(container => {
+    const video = container.querySelector('.media-video');
+    const controls = container.querySelector('.video-controls');
+    const playIcon = container.querySelector('.play-icon');
+    const pauseIcon = container.querySelector('.pause-icon');
+    
+    if (video && controls && playIcon && pauseIcon) {
+      // 点击控制按钮切换播放状态
+      controls.addEventListener('click', function(e) {
+        e.preventDefault();
+        e.stopPropagation();
+        
+        if (video.paused) {
+          video.play();
+          playIcon.style.display = 'none';
+          pauseIcon.style.display = 'block';
+        } else {
+          video.pause();
+          playIcon.style.display = 'block';
+          pauseIcon.style.display = 'none';
+        }
+      });
+      
+      // 视频播放状态变化时更新图标
+      video.addEventListener('play', function() {
+        playIcon.style.display = 'none';
+        pauseIcon.style.display = 'block';
+      });
+      
+      video.addEventListener('pause', function() {
+        playIcon.style.display = 'block';
+        pauseIcon.style.display = 'none';
+      });
+      
+      // 鼠标悬停时显示控制按钮
+      container.addEventListener('mouseenter', function() {
+        controls.style.opacity = '1';
+      });
+      
+      container.addEventListener('mouseleave', function() {
+        if (!video.paused) {
+          controls.style.opacity = '0';
+        }
+      });
+    }
+  });
+}
+
+// 滚动加载状态：游标由服务端给出，卡片 HTML 与首屏同一个模板宏
+let nextCursor = PAGE_DATA.next_cursor;
+let isLoading = false;
+let searchQuery = '';
+
+// 请求一页卡片片段
+async function fetchFragment(cursor) {
+  const params = new URLSearchParams({ per_page: PAGE_DATA.per_page, favorite: PAGE_DATA.favorite });
+  if (cursor) params.set('cursor', cursor);
+  if (searchQuery) params.set('q', searchQuery);
+  const response = await fetch(`${PAGE_DATA.fragment_url}?${params}`, { credentials: 'same-origin' });
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  return response.json();
+}
+
+// 把片段插入列表，并为新卡片绑定视频控制
+function appendCards(list, html) {
+  const marker = list.lastElementChild;
+  list.insertAdjacentHTML('beforeend', html);
+  let node = marker ? marker.nextElementSibling : list.firstElementChild;
+  while (node) {
+    initVideoControls(node);
+    node = node.nextElementSibling;
+  }
+}
+
+// 更新“加载更多”链接（无脚本时它是普通分页链接，有脚本时作为滚动哨兵）
+function updateLoadMore() {
+  const link = document.getElementById('load-more');
+  if (!link) return;
+  link.parentElement.style.display = nextCursor ? '' : 'none';
+}
+
+// 加载更多时光
+async function loadMoreMoments() {
+  const list = document.querySelector('.moments-list');
+  if (isLoading || !nextCursor || !list) return;
+
+  isLoading = true;
+  try {
+    const data = await fetchFragment(nextCursor);
+    appendCards(list, data.html);
+    nextCursor = data.next_cursor;
+    updateLoadMore();
+  } catch (error) {
+    console.error('加载更多时光失败:', error);
+  } finally {
+    isLoading = false;
+  }
+}
+
+// 滚动加载更多
+function initScrollLoading() {
+  const link = document.getElementById('load-more');
+  if (!link) return;
+
+  link.addEventListener('click', function(e) {
+    e.preventDefault();
+    loadMoreMoments();
+  });
+
+  if (!('IntersectionObserver' in window)) return;
+  const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+      if (entry.isIntersecting) {
+        loadMoreMoments();
+      }
+    });
+  }, { rootMargin: '400px 0px' });
+  observer.observe(link);
+}
+
+// 搜索：用同一个片段接口替换列表内容
+async function searchMoments(query) {
+  const list = document.querySelector('.moments-list');
+  if (!list) return;
+
+  searchQuery = query;
+  isLoading = true;
+  try {
+    const data = await fetchFragment(null);
+    list.innerHTML = '';
+    if (data.count === 0) {
+      list.innerHTML = '<div class="text-center p-4"><p>没有找到相关时光记录</p></div>';
+    } else {
+      appendCards(list, data.html);
+    }
+    nextCursor = data.next_cursor;
+    updateLoadMore();
+  } catch (error) {
+    console.error('搜索失败:', error);
+  } finally {
+    isLoading = false;
+  }
+}
+
+// 搜索输入处理
+function initSearch() {
+  const searchInput = document.getElementById('searchInput');
+  if (searchInput) {
+    let searchTimeout;
+    searchInput.addEventListener('input', function() {
+      clearTimeout(searchTimeout);
+      searchTimeout = setTimeout(() => {
+        const query = this.value.trim();
+        if (query.length >= 2 || (query.length === 0 && searchQuery)) {
+          searchMoments(query);
+        }
+      }, 500); // 防抖，500ms后执行搜索
+    });
+  }
+}
+
+// 页面加载完成后初始化
+document.addEventListener('DOMContentLoaded', function() {
+  initVideoControls();
+  initScrollLoading();
+  initSearch();
+});
@@ -0,0 +1,138 @@
+// 离线发件箱：记录先写入 IndexedDB，再成批提交到 /api/events/sync
+// 页面和 Service Worker 共用（Service Worker 通过 importScripts 引入），同一条记录的 client_id 保证重复提交无副作用
+const Outbox = (() => {
+  const DB_NAME = 'baby-outbox';
+  const DB_VERSION = 1;
+  const SYNC_URL = '/api/events/sync';
+  const BATCH_SIZE = 200;
+  const MAX_DELTA_ROUNDS = 5;
+  const supported = typeof indexedDB !== 'undefined';
+  let dbPromise = null;
+  let flushing = null;
+
+  function open() {
+    if (!dbPromise) {
+      dbPromise = new Promise((resolve, reject) => {
+        const req = indexedDB.open(DB_NAME, DB_VERSION);
+        req.onupgradeneeded = () => {
+          const db = req.result;
+          if (!db.objectStoreNames.contains('events')) db.createObjectStore('events', { keyPath: 'client_id' });
+          if (!db.objectStoreNames.contains('meta')) db.createObjectStore('meta', { keyPath: 'key' });
+        };
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+      });
+    }
+    return dbPromise;
+  }
+
+  // 在一个事务中执行 fn(store...)，事务完成后返回 fn 的结果
+  async function tx(stores, mode, fn) {
+    const db = await open();
+    return new Promise((resolve, reject) => {
+      const t = db.transaction(stores, mode);
+      let result;
+      t.oncomplete = () => resolve(result);
+      t.onerror = () => reject(t.error);
+      t.onabort = () => reject(t.error);
+      result = fn(...[].concat(stores).map(name => t.objectStore(name)));
+    });
+  }
+
+  function request(req) {
+    return new Promise((resolve, reject) => {
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+  }
+
+  function newClientId() {
+    if (self.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+  }
+
+  function add(record) {
+    return tx('events', 'readwrite', store => { store.put(record); });
+  }
+
+  function remove(clientIds) {
+    return tx('events', 'readwrite', store => { clientIds.forEach(id => store.delete(id)); });
+  }
+
+  async function pending() {
+    const db = await open();
+    const items = await request(db.transaction('events').objectStore('events').getAll());
+    return items.sort((a, b) => (a.timestamp < b.timestamp ? -1 : 1));
+  }
+
+  async function getToken(uid) {
+    const db = await open();
+    const row = await request(db.transaction('meta').objectStore('meta').get('token:' + uid));
+    return row ? row.value : null;
+  }
+
+  function setToken(uid, token) {
+    return tx('meta', 'readwrite', store => { store.put({ key: 'token:' + uid, value: token }); });
+  }
+
+  async function post(body) {
+    const resp = await fetch(SYNC_URL, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(body),
+    });
+    if (resp.status === 401 || resp.status === 409) return null; // 未登录或已换账号：保留记录，等原用户回来
+    if (!resp.ok) throw new Error(`同步失败: HTTP ${resp.status}`);
+    return resp.json();
+  }
+
+  // 提交某个用户的全部待同步记录，并追上服务端变更
+  async function flushUser(uid, records, summary) {
+    let since = await getToken(uid);
+    let rounds = 0;
+    for (let i = 0; i === 0 || i < records.length; i += BATCH_SIZE) {
+      const batch = records.slice(i, i + BATCH_SIZE);
+      const events = batch.map(({ uid: _uid, ...event }) => event);
+      let data = await post({ user_id: uid, since, events });
+      if (!data) return;
+      await remove(data.results.map(r => r.client_id).filter(Boolean));
+      data.results.forEach(r => { if (r.status === 'invalid') summary.rejected.push(r); });
+      summary.sent += data.results.length;
+      summary.changes.push(...data.changes);
+      since = data.sync_token;
+      // 服务端变更较多时继续拉取，不再附带事件
+      while (data.has_more && ++rounds < MAX_DELTA_ROUNDS) {
+        data = await post({ user_id: uid, since, events: [] });
+        if (!data) break;
+        summary.changes.push(...data.changes);
+        since = data.sync_token;
+      }
+      await setToken(uid, since);
+    }
+  }
+
+  async function doFlush(uid) {
+    const summary = { sent: 0, changes: [], rejected: [] };
+    const byUser = new Map();
+    if (uid) byUser.set(uid, []); // 当前用户即使没有待发记录也拉取一次服务端变更
+    (await pending()).forEach(r => {
+      if (!byUser.has(r.uid)) byUser.set(r.uid, []);
+      byUser.get(r.uid).push(r);
+    });
+    for (const [uid, records] of byUser) {
+      await flushUser(uid, records, summary);
+    }
+    return summary;
+  }
+
+  // 同一上下文内的并发调用共用一次提交
+  function flush(uid) {
+    if (!flushing) {
+      flushing = doFlush(uid).finally(() => { flushing = null; });
+    }
+    return flushing;
+  }
+
+  return { supported, newClientId, add, remove, pending, setToken, flush };
+})();
@@ -0,0 +1,51 @@
+(function(){
+  const fileInput = document.getElementById('coverFile');
+  const startBtn = document.getElementById('startCropBtn');
+  const uploadBtn = document.getElementById('uploadCroppedBtn');
+  const preview = document.getElementById('coverPreview');
+  let cropper = null;
+  let chosenBlobUrl = null;
+
+  fileInput.addEventListener('change', function(){
+    const f = this.files && this.files[0];
+    if (!f) return;
+    if (chosenBlobUrl) URL.revokeObjectURL(chosenBlobUrl);
+    chosenBlobUrl = URL.createObjectURL(f);
+    preview.src = chosenBlobUrl;
+    startBtn.disabled = false;
+  });
+
+  startBtn.addEventListener('click', function(){
+    if (cropper) { cropper.destroy(); cropper = null; }
+    cropper = new Cropper(preview, {
+      aspectRatio: 16/9,
+      viewMode: 1,
+      autoCropArea: 1,
+      movable: false,
+      zoomable: true,
+      background: false
+    });
+    uploadBtn.disabled = false;
+  });
+
+  uploadBtn.addEventListener('click', async function(){
+    if (!cropper) return;
+    // 导出裁剪结果，最大宽度 1920
+    const data = cropper.getCroppedCanvas({
+      maxWidth: 1920,
+      imageSmoothingEnabled: true,
+      imageSmoothingQuality: 'high'
+    });
+    if (!data) return;
+    data.toBlob(async (blob)=>{
+      const fd = new FormData();
+      fd.append('cover', blob, 'cover.jpg');
+      try {
+        const resp = await fetch(PAGE_DATA.cover_upload_url, { method: 'POST', body: fd });
+        if (resp.redirected) { window.location.href = resp.url; return; }
+        if (resp.ok) { location.reload(); }
+        else { alert('上传失败'); }
+      } catch (e) { alert('网络错误'); }
+    }, 'image/jpeg', 0.9);
+  });
+})();
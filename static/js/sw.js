@@ -0,0 +1,81 @@
+// Service Worker：缓存首页和静态资源供离线打开，并在网络恢复后后台提交离线发件箱
+importScripts('/static/js/outbox.js');
+
+const CACHE_NAME = 'baby-shell-v1';
+const SHELL_PAGES = ['/'];
+const SYNC_TAG = 'outbox-sync';
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => cache.addAll(SHELL_PAGES))
+      .catch(() => {})  // 首次安装时离线也不影响注册
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k !== CACHE_NAME).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+// 页面：网络优先，离线时用缓存的首页
+async function networkFirst(request) {
+  const cache = await caches.open(CACHE_NAME);
+  try {
+    const response = await fetch(request);
+    const path = new URL(request.url).pathname;
+    if (response.ok && !response.redirected && SHELL_PAGES.includes(path)) {
+      cache.put(path, response.clone());
+    }
+    return response;
+  } catch (error) {
+    const cached = await cache.match(request, { ignoreSearch: true }) || await cache.match('/');
+    if (cached) return cached;
+    throw error;
+  }
+}
+
+// 静态资源：缓存优先（dist/ 下的文件名带哈希，内容不会变），未命中时取网络并写入缓存
+async function cacheFirst(request) {
+  const cache = await caches.open(CACHE_NAME);
+  const cached = await cache.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) cache.put(request, response.clone());
+  return response;
+}
+
+self.addEventListener('fetch', event => {
+  const { request } = event;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (request.method !== 'GET') {
+    // 退出登录时清掉缓存的个人页面
+    if (url.pathname === '/logout') event.waitUntil(caches.delete(CACHE_NAME));
+    return;
+  }
+  if (request.mode === 'navigate') {
+    event.respondWith(networkFirst(request));
+  } else if (url.pathname.startsWith('/static/dist/')) {
+    event.respondWith(cacheFirst(request));
+  }
+});
+
+async function notifyClients(message) {
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach(client => client.postMessage(message));
+}
+
+// 后台同步：页面关闭后网络恢复时由浏览器触发
+self.addEventListener('sync', event => {
+  if (event.tag !== SYNC_TAG) return;
+  event.waitUntil(
+    Outbox.flush().then(summary => notifyClients({ type: 'outbox-synced', summary }))
+  );
+});
+
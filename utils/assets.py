@@ -0,0 +1,291 @@
+"""
+静态资源构建与查找模块
+`flask assets-build` 把 static/ 下的源文件复制为带内容哈希的文件名（static/dist/），
+可压缩类型同时生成 .br / .gz 预压缩版本，并写出 manifest.json；超大的 JPG/PNG 原图转为缩放后的 WebP，
+已有同名 WebP 的原图直接指向 WebP，原图本身不再对外提供。
+运行时只读清单做 URL 查找（按间隔检查清单是否被上传更新），请求 /static/dist/ 时按 Accept-Encoding
+直接返回预压缩文件，不再逐请求压缩，也不再每次渲染都 stat 文件。
+"""
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import threading
+import time
+from typing import Iterable, Optional
+from flask import redirect, request, send_from_directory, url_for
+from utils.lazy_imports import PIL_Image as Image
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# 不参与构建的目录：用户上传的时光媒体和构建产物本身
+SKIP_DIRS = {'moments', DIST_DIR}
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.svg', '.json', '.txt', '.html', '.map', '.xml'}
+RASTER = {'.jpg', '.jpeg', '.png'}
+# 按优先级排列：客户端同时接受时优先 br
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _hashed_name(logical: str, data: bytes, ext: Optional[str] = None) -> str:
+    stem, orig_ext = os.path.splitext(logical)
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    return f'{DIST_DIR}/{stem}.{digest}{ext or orig_ext}'
+
+
+def _compress(data: bytes) -> dict:
+    """生成预压缩版本，只保留比原文件小的"""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {enc: blob for enc, blob in variants.items() if len(blob) < len(data)}
+
+
+def _to_webp(path: str, max_width: int, quality: int) -> bytes:
+    with Image.open(path) as img:
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        if img.width > max_width:
+            img = img.resize((max_width, int(img.height * max_width / img.width)), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format='WEBP', quality=quality)
+        return buf.getvalue()
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read_manifest(static_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(static_dir: str, manifest: dict) -> None:
+    data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    _write(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), data)
+
+
+def _emit(static_dir: str, logical: str, manifest: dict, options: dict) -> None:
+    """把单个源文件写入 dist 并登记到清单"""
+    source = os.path.join(static_dir, logical)
+    ext = os.path.splitext(logical)[1].lower()
+    if ext in RASTER and os.path.getsize(source) > options['image_max_bytes']:
+        data = _to_webp(source, options['image_max_width'], options['image_quality'])
+        hashed = _hashed_name(logical, data, '.webp')
+        manifest['excluded'][logical] = True
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+        hashed = _hashed_name(logical, data)
+        manifest['excluded'].pop(logical, None)
+
+    _write(os.path.join(static_dir, hashed), data)
+    manifest['files'][logical] = hashed
+    manifest['encodings'].pop(hashed, None)
+    if ext in COMPRESSIBLE:
+        variants = _compress(data)
+        for enc, suffix in ENCODINGS:
+            if enc in variants:
+                _write(os.path.join(static_dir, hashed + suffix), variants[enc])
+        if variants:
+            manifest['encodings'][hashed] = [enc for enc, _ in ENCODINGS if enc in variants]
+
+
+def _prune(static_dir: str, manifest: dict) -> int:
+    """删除清单不再引用的构建产物"""
+    keep = {MANIFEST_NAME}
+    for hashed in manifest['files'].values():
+        keep.add(os.path.relpath(hashed, DIST_DIR))
+        for enc, suffix in ENCODINGS:
+            if enc in manifest['encodings'].get(hashed, []):
+                keep.add(os.path.relpath(hashed + suffix, DIST_DIR))
+    removed = 0
+    dist = os.path.join(static_dir, DIST_DIR)
+    for root, _, names in os.walk(dist):
+        for name in names:
+            rel = os.path.relpath(os.path.join(root, name), dist).replace(os.sep, '/')
+            if rel not in keep:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return removed
+
+
+def _options(config) -> dict:
+    return {
+        'image_max_width': config.get('ASSET_IMAGE_MAX_WIDTH', 1920),
+        'image_quality': config.get('ASSET_IMAGE_QUALITY', 85),
+        'image_max_bytes': config.get('ASSET_IMAGE_MAX_KB', 200) * 1024,
+    }
+
+
+def build(app) -> dict:
+    """构建全部静态资源，返回统计信息"""
+    static_dir = app.static_folder
+    sources = []
+    for root, dirs, names in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in names:
+            if not name.startswith('.'):
+                sources.append(os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/'))
+    sources.sort()
+
+    manifest = {'files': {}, 'aliases': {}, 'encodings': {}, 'excluded': {}}
+    options = _options(app.config)
+    for logical in sources:
+        stem, ext = os.path.splitext(logical)
+        # 已有同名 WebP（例如上传封面时压缩生成的 cover.webp）的原图只作别名，不复制
+        if ext.lower() in RASTER and f'{stem}.webp' in sources:
+            manifest['aliases'][logical] = f'{stem}.webp'
+            manifest['excluded'][logical] = True
+            continue
+        _emit(static_dir, logical, manifest, options)
+
+    _write_manifest(static_dir, manifest)
+    removed = _prune(static_dir, manifest)
+    source_bytes = sum(os.path.getsize(os.path.join(static_dir, s)) for s in sources)
+    served_bytes = sum(os.path.getsize(os.path.join(static_dir, h)) for h in manifest['files'].values())
+    return {'files': len(manifest['files']), 'aliases': len(manifest['aliases']),
+            'precompressed': len(manifest['encodings']), 'removed': removed,
+            'source_bytes': source_bytes, 'served_bytes': served_bytes}
+
+
+def publish(app, logical: str) -> Optional[str]:
+    """运行时更新单个资源（头像、封面上传后调用）；未构建过清单时不做任何事"""
+    static_dir = app.static_folder
+    manifest = _read_manifest(static_dir)
+    if manifest is None:
+        return None
+    previous = manifest['files'].get(logical)
+    _emit(static_dir, logical, manifest, _options(app.config))
+    manifest['aliases'].pop(logical, None)
+    _write_manifest(static_dir, manifest)
+    if previous and previous != manifest['files'][logical]:
+        _prune(static_dir, manifest)
+    _holder(app).refresh()
+    return manifest['files'][logical]
+
+
+class AssetManifest:
+    """进程内的清单副本；每隔 check_interval 秒检查一次文件是否被其他 worker 更新"""
+
+    def __init__(self, static_dir: str, check_interval: float):
+        self.path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+        self.static_dir = static_dir
+        self.check_interval = check_interval
+        self.data = None
+        self._mtime = None
+        self._checked = float('-inf')
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._checked = float('-inf')
+
+    def current(self) -> Optional[dict]:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self.data
+        with self._lock:
+            if now - self._checked >= self.check_interval:
+                try:
+                    mtime = os.stat(self.path).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if mtime != self._mtime:
+                    self.data = _read_manifest(self.static_dir) if mtime else None
+                    self._mtime = mtime
+                self._checked = now
+        return self.data
+
+    def lookup(self, logical: str) -> Optional[str]:
+        data = self.current()
+        if not data:
+            return None
+        logical = data['aliases'].get(logical, logical)
+        return data['files'].get(logical)
+
+
+def _holder(app) -> AssetManifest:
+    return app.extensions['assets']
+
+
+def asset_url(filename: str) -> str:
+    """模板中使用：有构建产物时返回带哈希的 URL，否则回退到源文件"""
+    from flask import current_app
+    hashed = _holder(current_app).lookup(filename)
+    return url_for('static', filename=hashed or filename)
+
+
+def first_available_url(app, candidates: Iterable[str]) -> Optional[str]:
+    """按顺序返回第一个存在的资源 URL
+
+    有清单时只查清单；未构建（开发环境）时退回检查磁盘，并用 mtime 作缓存版本号。
+    """
+    holder = _holder(app)
+    if holder.current() is not None:
+        for name in candidates:
+            hashed = holder.lookup(name)
+            if hashed:
+                return url_for('static', filename=hashed)
+        return None
+    for name in candidates:
+        try:
+            v = int(os.path.getmtime(os.path.join(app.static_folder, name)))
+        except OSError:
+            continue
+        return url_for('static', filename=name) + f'?v={v}'
+    return None
+
+
+def init_app(app) -> None:
+    """加载清单、注册模板函数，并接管 static 视图以返回预压缩文件"""
+    holder = AssetManifest(app.static_folder, app.config.get('ASSET_MANIFEST_CHECK_SECONDS', 5))
+    app.extensions['assets'] = holder
+    holder.current()
+    app.add_template_global(asset_url)
+
+    static_view = app.view_functions.get('static')
+    if static_view is None:
+        return
+
+    def serve_static(filename):
+        manifest = holder.current()
+        if not manifest:
+            return static_view(filename=filename)
+
+        # 被排除的原图永久重定向到构建产物，旧链接仍可用但不再传输原始大文件
+        if filename in manifest['excluded']:
+            hashed = holder.lookup(filename)
+            if hashed:
+                return redirect(url_for('static', filename=hashed), 301)
+
+        encodings = manifest['encodings'].get(filename)
+        if not encodings:
+            return static_view(filename=filename)
+        for enc, suffix in ENCODINGS:
+            if enc in encodings and request.accept_encodings[enc]:
+                response = send_from_directory(app.static_folder, filename + suffix,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = enc
+                break
+        else:
+            response = static_view(filename=filename)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = serve_static
@@ -0,0 +1,76 @@
+"""
+进程内缓存工具模块
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """带过期时间和命中统计的线程安全内存缓存"""
+
+    def __init__(self, name: str, timeout: float = 300, maxsize: int = 1024):
+        self.name = name
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，过期或不存在时返回 default"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and time.monotonic() < item[1]:
+                self.hits += 1
+                return item[0]
+            if item is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, timeout: Optional[float] = None) -> None:
+        """写入缓存"""
+        expires = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # 超出容量时淘汰最早写入的条目
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (value, expires)
+
+    def delete(self, key: Hashable) -> None:
+        """删除单个键"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """命中统计"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, timeout: float = 300, maxsize: int = 1024) -> TTLCache:
+    """按名称获取（或创建）缓存实例，同名缓存全局共享"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = TTLCache(name, timeout=timeout, maxsize=maxsize)
+        return cache
+
+
+def all_caches() -> Dict[str, TTLCache]:
+    """返回所有已注册的缓存"""
+    with _caches_lock:
+        return dict(_caches)
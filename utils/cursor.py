@@ -0,0 +1,23 @@
+"""
+键集分页游标工具
+游标为最后一行 (timestamp, id) 的 base64url 编码，时光流和历史记录共用。
+"""
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """用最后一行的时间和 id 生成游标"""
+    raw = f'{timestamp.isoformat()}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，格式不对时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii').split('|')
+        return datetime.fromisoformat(ts), int(row_id)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f'无效的游标: {cursor}') from e
@@ -0,0 +1,38 @@
+"""
+数据库引擎调优模块
+SQLite 连接建立时设置 WAL、同步级别、忙等待和内存映射；
+PostgreSQL 的连接池参数由 config.py 中的 SQLALCHEMY_ENGINE_OPTIONS 提供。
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db
+
+
+def sqlite_pragmas(config) -> dict:
+    """根据配置生成每个 SQLite 连接要执行的 PRAGMA"""
+    return {
+        'journal_mode': config.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE', 0),
+    }
+
+
+def _install_sqlite_pragmas(engine: Engine, pragmas: dict) -> None:
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def configure_engines(app) -> None:
+    """为应用的所有数据库引擎安装连接事件，需在 db.init_app 之后调用"""
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                _install_sqlite_pragmas(engine, pragmas)
@@ -0,0 +1,43 @@
+"""
+读写分离模块
+配置 DATABASE_READ_URL 后，标记为 `@read_replica` 的视图中的查询发往只读副本（bind 'replica'），
+其余查询和所有写入仍走主库。写入后的一段时间内（READ_YOUR_WRITES_SECONDS），
+同一浏览器会话的读取也固定在主库，保证刚提交的数据立即可见。
+"""
+import time
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+_PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+
+def replica_allowed() -> bool:
+    """当前请求是否允许读副本"""
+    if not has_request_context() or not g.get('db_use_replica'):
+        return False
+    return flask_session.get(_PRIMARY_UNTIL_KEY, 0) <= time.time()
+
+
+class RoutingSession(Session):
+    """按请求选择主库或只读副本的会话"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and REPLICA_BIND in self._db.engines:
+            if self._flushing or isinstance(clause, sa.UpdateBase):
+                self.info['db_wrote'] = True
+            elif (isinstance(clause, sa.Select) and not self.info.get('db_wrote')
+                    and replica_allowed()):
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_primary_after_write(session):
+    if not session.info.pop('db_wrote', False) or not has_request_context():
+        return
+    window = current_app.config.get('READ_YOUR_WRITES_SECONDS', 0)
+    if window:
+        flask_session[_PRIMARY_UNTIL_KEY] = time.time() + window
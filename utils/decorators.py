@@ -4,7 +4,7 @@
 import hashlib
 import time
 from functools import wraps
-from flask import session, flash, redirect, url_for, request, jsonify
+from flask import g, session, flash, redirect, url_for, request, jsonify
 
 
 def login_required(view_func):
@@ -37,6 +37,15 @@ def premium_required(view_func):
     return wrapper
 
 
+def read_replica(view_func):
+    """只读视图装饰器：配置了只读副本时，视图中的查询发往副本"""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        g.db_use_replica = True
+        return view_func(*args, **kwargs)
+    return wrapper
+
+
 def cache_response(timeout: int = 300):
     """缓存响应装饰器"""
     def decorator(f):
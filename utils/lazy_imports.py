@@ -0,0 +1,70 @@
+"""
+延迟导入工具模块
+重量级依赖（requests / openai / Pillow / cv2）通过模块级代理在首次使用时才导入，
+worker 启动时不加载；可在 gunicorn master 中预加载以便 fork 后共享内存。
+"""
+import importlib
+import threading
+from types import ModuleType
+from typing import Iterable, List
+
+
+class LazyModule(ModuleType):
+    """模块代理：首次访问属性时才真正导入"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+    def available(self) -> bool:
+        """依赖是否已安装（未安装时返回 False 而不是抛出 ImportError）"""
+        try:
+            self._load()
+            return True
+        except ImportError:
+            return False
+
+
+requests = LazyModule('requests')
+openai = LazyModule('openai')
+PIL_Image = LazyModule('PIL.Image')
+cv2 = LazyModule('cv2')
+
+HEAVY_MODULES = {
+    'requests': requests,
+    'openai': openai,
+    'PIL.Image': PIL_Image,
+    'cv2': cv2,
+}
+
+
+def preload(names: Iterable[str]) -> List[str]:
+    """预加载指定的重量级依赖，返回成功加载的模块名；未安装的依赖跳过"""
+    loaded = []
+    for name in names:
+        name = name.strip()
+        module = HEAVY_MODULES.get(name) or (LazyModule(name) if name else None)
+        if module is not None and module.available():
+            loaded.append(name)
+    return loaded
@@ -0,0 +1,366 @@
+"""
+Prometheus 指标模块
+进程内记录计数器、仪表和直方图，`/metrics` 以 Prometheus 文本格式输出。
+设置 METRICS_DIR 后每个 worker 定期把自己的指标写入该目录下的 JSON 文件，
+抓取时合并所有 worker 的文件（gunicorn 多进程）；worker 退出后其计数器和直方图并入归档文件，仪表丢弃。
+"""
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ARCHIVE_FILE = 'archive.json'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metric:
+    """单个指标（所有标签组合的值）"""
+
+    def __init__(self, registry: 'Registry', name: str, kind: str, help_text: str, buckets=None):
+        self.registry = registry
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS) if kind == 'histogram' else None
+        self.values: Dict[LabelKey, object] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self.registry.lock:
+            self.values[_label_key(labels)] = value
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                # [各桶计数（非累计）..., sum, count]
+                state = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文：退出时把耗时（秒）记入直方图"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+class Registry:
+    """指标注册表；directory 为 None 时只在本进程内统计"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+        self.lock = threading.RLock()
+        self._last_flush = 0.0
+        self._flusher_pid = None
+
+    def _register(self, name: str, kind: str, help_text: str, buckets=None) -> Metric:
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = Metric(self, name, kind, help_text, buckets)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Metric:
+        return self._register(name, 'counter', help_text)
+
+    def gauge(self, name: str, help_text: str) -> Metric:
+        return self._register(name, 'gauge', help_text)
+
+    def histogram(self, name: str, help_text: str, buckets=None) -> Metric:
+        return self._register(name, 'histogram', help_text, buckets)
+
+    def register_collector(self, fn: Callable[[], None]) -> None:
+        """注册采集函数：在写文件或输出前调用，用于把进程状态（连接池、缓存等）同步到仪表"""
+        self.collectors.append(fn)
+
+    def _collect(self) -> None:
+        for fn in self.collectors:
+            try:
+                fn()
+            except Exception:
+                pass
+
+    def snapshot(self) -> dict:
+        self._collect()
+        with self.lock:
+            return {
+                name: {
+                    'kind': m.kind,
+                    'help': m.help,
+                    'buckets': m.buckets,
+                    'values': [[list(map(list, key)), value if not isinstance(value, list) else list(value)]
+                               for key, value in m.values.items()],
+                }
+                for name, m in self.metrics.items()
+            }
+
+    def flush(self, force: bool = False) -> None:
+        """把本进程的指标写入 METRICS_DIR（按间隔限流，被跳过的更新由后台线程补写）"""
+        if not self.directory:
+            return
+        self._ensure_flusher()
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        _write_json(os.path.join(self.directory, f'metrics_{os.getpid()}.json'), self.snapshot())
+
+    def _ensure_flusher(self) -> None:
+        # fork 后线程不会被继承，按 pid 判断本进程是否已启动
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush(force=True)
+                except OSError:
+                    pass
+
+        threading.Thread(target=run, name='metrics-flusher', daemon=True).start()
+
+    def render(self) -> str:
+        """合并所有进程的指标并输出 Prometheus 文本格式"""
+        if self.directory:
+            self.flush(force=True)
+            snapshots = []
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        else:
+            snapshots = [self.snapshot()]
+        return render_text(merge_snapshots(snapshots))
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def merge_snapshots(snapshots: List[dict], include_gauges: bool = True) -> dict:
+    """合并多个进程的快照：计数器、仪表和直方图都按标签求和"""
+    merged: dict = {}
+    for snap in snapshots:
+        for name, data in snap.items():
+            if data['kind'] == 'gauge' and not include_gauges:
+                continue
+            target = merged.setdefault(name, {'kind': data['kind'], 'help': data['help'],
+                                              'buckets': data['buckets'], 'values': {}})
+            for key, value in data['values']:
+                key = tuple(tuple(pair) for pair in key)
+                if isinstance(value, list):
+                    current = target['values'].get(key)
+                    target['values'][key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    target['values'][key] = target['values'].get(key, 0) + value
+    return merged
+
+
+def _as_snapshot(merged: dict) -> dict:
+    return {
+        name: {**{k: v for k, v in data.items() if k != 'values'},
+               'values': [[list(map(list, key)), value] for key, value in data['values'].items()]}
+        for name, data in merged.items()
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(key, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_text(merged: dict) -> str:
+    lines = []
+    for name in sorted(merged):
+        data = merged[name]
+        lines.append(f'# HELP {name} {data["help"]}')
+        lines.append(f'# TYPE {name} {data["kind"]}')
+        for key in sorted(data['values']):
+            value = data['values'][key]
+            if data['kind'] != 'histogram':
+                lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(data['buckets'], value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(key, (("le", _format_value(float(bound))),))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(key, (("le", "+Inf"),))} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(key)} {_format_value(float(value[-2]))}')
+            lines.append(f'{name}_count{_format_labels(key)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def mark_process_dead(pid: int, directory: Optional[str] = None) -> None:
+    """worker 退出后把它的计数器和直方图并入归档文件，丢弃仪表（在 gunicorn child_exit 中调用）"""
+    directory = directory or os.environ.get('METRICS_DIR')
+    if not directory:
+        return
+    path = os.path.join(directory, f'metrics_{pid}.json')
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    snapshots = []
+    for p in (archive_path, path):
+        try:
+            with open(p, 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    if not snapshots:
+        return
+    _write_json(archive_path, _as_snapshot(merge_snapshots(snapshots, include_gauges=False)))
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def reset_directory(directory: Optional[str] = None) -> None:
+    """清空指标目录（在 gunicorn master 启动时调用）"""
+    directory = directory or os.environ.get('METRICS_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
+
+
+REGISTRY = Registry(os.environ.get('METRICS_DIR') or None)
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds', 'HTTP 请求耗时（到响应头返回）')
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge('http_requests_in_flight', '正在处理的 HTTP 请求数')
+DB_POOL_CONNECTIONS = REGISTRY.gauge('db_pool_connections', '数据库连接池连接数（state=checked_out/idle/overflow）')
+CACHE_REQUESTS = REGISTRY.counter('cache_requests_total', '进程内缓存查询次数（result=hit/miss）')
+CACHE_ENTRIES = REGISTRY.gauge('cache_entries', '进程内缓存条目数')
+AI_REQUEST_DURATION = REGISTRY.histogram(
+    'ai_request_duration_seconds', 'AI 后端调用耗时', buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30, 60))
+AI_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    'ai_first_token_seconds', 'AI 流式响应首包时间', buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15))
+AI_FALLBACKS = REGISTRY.counter('ai_fallback_total', 'AI 主后端失败后降级到备用后端的次数')
+AI_IN_FLIGHT = REGISTRY.gauge('ai_requests_in_flight', '正在进行的 AI 后端调用数')
+AI_DIGEST_QUEUE = REGISTRY.gauge('ai_digest_pending', '等待后台刷新的时光分析摘要数')
+CHANGE_STREAMS = REGISTRY.gauge('change_streams_open', '打开中的家庭实时推送连接数')
+PASSWORD_HASH_DURATION = REGISTRY.histogram(
+    'password_hash_seconds', '密码哈希耗时，含线程池排队（operation=hash/verify）',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+PASSWORD_HASH_PENDING = REGISTRY.gauge('password_hash_pending', '正在执行和排队的密码哈希任务数')
+AUTH_REJECTED = REGISTRY.counter(
+    'auth_rejected_total', '登录注册被拒绝次数（reason=login_ip/login_account/register_ip/hash_busy/hash_timeout）')
+MEDIA_PROCESSING_DURATION = REGISTRY.histogram(
+    'media_processing_seconds', '上传媒体处理耗时（kind=image/video/avatar/cover）',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+
+
+def init_app(app) -> None:
+    """注册请求计时、进程状态采集和 /metrics 接口；METRICS_ENABLED=false 时跳过"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    from flask import Response, abort, g, request
+    from models import db
+    from utils.cache import all_caches
+    from services.ai_digest_service import AIDigestService
+    from services.change_stream_service import ChangeStreamService
+
+    with app.app_context():
+        engines = dict(db.engines)
+
+    def collect_pools():
+        for key, engine in engines.items():
+            pool = engine.pool
+            if not hasattr(pool, 'checkedout'):
+                continue
+            bind = key or 'default'
+            DB_POOL_CONNECTIONS.set(pool.checkedout(), bind=bind, state='checked_out')
+            DB_POOL_CONNECTIONS.set(pool.checkedin(), bind=bind, state='idle')
+            DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), bind=bind, state='overflow')
+
+    def collect_caches():
+        for name, cache in all_caches().items():
+            stats = cache.stats()
+            CACHE_REQUESTS.set(stats['hits'], cache=name, result='hit')
+            CACHE_REQUESTS.set(stats['misses'], cache=name, result='miss')
+            CACHE_ENTRIES.set(stats['size'], cache=name)
+
+    REGISTRY.register_collector(collect_pools)
+    REGISTRY.register_collector(collect_caches)
+    REGISTRY.register_collector(lambda: AI_DIGEST_QUEUE.set(AIDigestService.pending_refreshes()))
+    REGISTRY.register_collector(lambda: CHANGE_STREAMS.set(ChangeStreamService.open_streams()))
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get('metrics_started')
+        if started is not None and request.endpoint != 'metrics':
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=request.method,
+                                          endpoint=request.endpoint or 'unmatched',
+                                          status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if g.pop('metrics_started', None) is not None:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+        REGISTRY.flush()
+
+    token = app.config.get('METRICS_TOKEN')
+
+    @app.route('/metrics', endpoint='metrics')
+    def metrics_endpoint():
+        # 生产环境必须配置令牌才开放，避免把路由、缓存和队列情况暴露给任何人；本地调试时可匿名抓取
+        if not token:
+            if not app.debug:
+                abort(404)
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,134 @@
+"""
+令牌桶限流模块
+每个 (范围, 键) 一个桶：容量 burst，每分钟补充 per_minute 个令牌，每次请求取一个。
+桶状态默认存在进程内；RATE_LIMIT_STORE=sqlite:////dev/shm/xxx.db 时存在 SQLite 文件中，
+同一台机器上的所有 gunicorn worker 共享，限额不会随 worker 数放大。
+按 IP 计数依赖 PROXY_FIX_HOPS 还原客户端地址；未配置时始终按 remote_addr 计数，
+X-Forwarded-For 由客户端任意填写，只用来提示部署可能漏配了代理层数，不会改变限流。
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Tuple
+
+# 超过该时长未访问的桶早已补满，清理时直接删除
+IDLE_SECONDS = 24 * 3600
+PRUNE_EVERY = 1000
+
+_proxy_warned = False
+
+
+class MemoryBucketStore:
+    """进程内令牌桶（线程安全）"""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, now: float = None) -> float:
+        """取一个令牌；放行返回 0，否则返回还需等待的秒数。rate 为每秒补充的令牌数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / rate
+            if key not in self._buckets and len(self._buckets) >= self.maxsize:
+                self._prune(now)
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+    def _prune(self, now: float) -> None:
+        stale = [k for k, (_, updated) in self._buckets.items() if now - updated > IDLE_SECONDS]
+        for k in stale:
+            del self._buckets[k]
+        if len(self._buckets) >= self.maxsize:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """SQLite 文件中的令牌桶，多进程共享；每次取令牌是一条带 RETURNING 的 UPSERT，天然原子"""
+
+    # 桶已存在时只在令牌足够时更新；没有返回行即为被限流
+    TAKE_SQL = (
+        'INSERT INTO bucket (key, tokens, updated) VALUES (:key, :capacity - 1, :now) '
+        'ON CONFLICT (key) DO UPDATE SET tokens = MIN(:capacity, tokens + (:now - updated) * :rate) - 1, updated = :now '
+        'WHERE MIN(:capacity, tokens + (:now - updated) * :rate) >= 1 '
+        'RETURNING tokens'
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # 连接不跨线程、不跨 fork 复用
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS bucket '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key: str, capacity: float, rate: float, now: float = None) -> float:
+        """取一个令牌；放行返回 0，否则返回还需等待的秒数。rate 为每秒补充的令牌数"""
+        now = time.time() if now is None else now
+        conn = self._connection()
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        if conn.execute(self.TAKE_SQL, params).fetchone() is not None:
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM bucket WHERE updated < ?', (now - IDLE_SECONDS,))
+            return 0.0
+        tokens, updated = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+        return (1 - min(capacity, tokens + (now - updated) * rate)) / rate
+
+
+def create_store(url: str):
+    """memory 或 sqlite:///相对路径 / sqlite:////绝对路径"""
+    if not url or url == 'memory':
+        return MemoryBucketStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteBucketStore(url[len('sqlite:///'):])
+    raise ValueError(f'不支持的 RATE_LIMIT_STORE: {url}')
+
+
+def init_app(app) -> None:
+    """按配置创建桶存储；RATE_LIMIT_ENABLED=false 时 hit 总是放行"""
+    app.extensions['rate_limit'] = create_store(app.config.get('RATE_LIMIT_STORE', 'memory'))
+
+
+def hit(scope: str, key: str) -> float:
+    """在 scope 范围内为 key 取一个令牌，返回需等待的秒数（0 为放行）
+
+    限额读取配置项 `<SCOPE>_LIMIT`，值为 (burst, per_minute)。
+    """
+    from flask import current_app
+
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return 0.0
+    burst, per_minute = current_app.config[f'{scope.upper()}_LIMIT']
+    wait = current_app.extensions['rate_limit'].take(f'{scope}:{key}', burst, per_minute / 60.0)
+    if wait:
+        from utils import metrics
+        metrics.AUTH_REJECTED.inc(reason=scope)
+    return wait
+
+
+def hit_ip(scope: str) -> float:
+    """按客户端 IP（remote_addr）取令牌；带 X-Forwarded-For 而未配置 PROXY_FIX_HOPS 时只记录一次警告"""
+    global _proxy_warned
+    from flask import current_app, request
+
+    if not _proxy_warned and not current_app.config.get('PROXY_FIX_HOPS') and 'X-Forwarded-For' in request.headers:
+        _proxy_warned = True
+        current_app.logger.warning('请求带有 X-Forwarded-For 但未设置 PROXY_FIX_HOPS，按 IP 的限流以 remote_addr 计数；'
+                                   '部署在反向代理后时请设置代理层数')
+    return hit(scope, request.remote_addr or '-')
@@ -0,0 +1,112 @@
+"""
+数据库结构管理工具模块
+结构只通过 Alembic 迁移或一次性的 `flask db-bootstrap` 命令变更；
+worker 启动时只读取 alembic_version 与迁移脚本的 head 比对。
+"""
+import glob
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+from flask import current_app
+from sqlalchemy import inspect, text
+from models import db
+
+_REVISION_RE = re.compile(r"^revision\s*=\s*['\"](\w+)['\"]", re.M)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\s*=\s*(.+)$", re.M)
+# 引入迁移前 create_all 建出的表结构（user.uid 之后、ai_digest 之前）
+LEGACY_BASELINE_REVISION = '78a99fddf6e7'
+
+
+def migrations_dir() -> str:
+    """迁移脚本目录"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> Optional[str]:
+    """迁移脚本的最新版本号
+
+    直接解析脚本中的 revision / down_revision，避免 worker 启动时导入 alembic。
+    """
+    revisions, parents = set(), set()
+    for path in glob.glob(os.path.join(migrations_dir(), 'versions', '*.py')):
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        rev = _REVISION_RE.search(source)
+        if not rev:
+            continue
+        revisions.add(rev.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down:
+            parents.update(re.findall(r"['\"](\w+)['\"]", down.group(1)))
+    heads = sorted(revisions - parents)
+    return heads[0] if len(heads) == 1 else None
+
+
+def init_migrate(app) -> None:
+    """注册 Flask-Migrate（会导入 alembic，只在命令行或初始化时调用）"""
+    if 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=migrations_dir())
+
+
+def current_revision() -> Optional[str]:
+    """数据库当前记录的迁移版本，未初始化时返回 None"""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+    except Exception:
+        return None
+
+
+def check_schema_version(app) -> bool:
+    """校验数据库版本是否为最新迁移；SCHEMA_CHECK=strict 时不一致直接报错"""
+    mode = app.config.get('SCHEMA_CHECK', 'warn')
+    if mode == 'off':
+        return True
+    with app.app_context():
+        current, head = current_revision(), head_revision()
+    if current == head:
+        return True
+    message = f'数据库结构版本 {current or "未初始化"} 与迁移 head {head} 不一致，请运行 `flask db-bootstrap`'
+    if mode == 'strict':
+        raise RuntimeError(message)
+    app.logger.warning(message)
+    return False
+
+
+def auto_create_schema() -> Optional[str]:
+    """开发环境启动时的自动建表（SCHEMA_AUTO_CREATE），需在应用上下文中调用
+
+    只处理空库：建表并标记为最新迁移版本，与 `flask db-bootstrap` 的结果一致。已有表的库
+    （含没有迁移版本的旧库）不在这里 create_all，否则新表先被建出来、旧表却缺新列，
+    之后的迁移会因表已存在而失败；这些库交给 `flask db-bootstrap` 升级。
+    """
+    if set(inspect(db.engine).get_table_names()) - {'alembic_version'}:
+        return None
+    return bootstrap_schema()
+
+
+def bootstrap_schema() -> str:
+    """一次性初始化或升级数据库结构，需在应用上下文中调用
+
+    空库：按模型建表并标记为最新迁移版本；没有迁移版本的旧库：标记为基线版本后升级；
+    已有库：执行 Alembic 升级到 head。
+    """
+    from flask_migrate import stamp, upgrade
+
+    init_migrate(current_app)
+    tables = set(inspect(db.engine).get_table_names())
+    if not tables - {'alembic_version'}:
+        db.create_all()
+        stamp(directory=migrations_dir(), revision='head')
+        return 'created'
+    if current_revision() is None:
+        # 旧版本由 create_all 建表、从未记录迁移版本：表结构对应引入迁移前的基线，
+        # 标记为基线后按迁移补齐后续的列、索引和数据
+        stamp(directory=migrations_dir(), revision=LEGACY_BASELINE_REVISION)
+        upgrade(directory=migrations_dir())
+        return 'stamped'
+    upgrade(directory=migrations_dir())
+    return 'upgraded'
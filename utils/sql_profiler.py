@@ -0,0 +1,115 @@
+"""
+请求级 SQL 剖析模块
+通过 SQLAlchemy 的 before/after_cursor_execute 事件统计每个请求的查询次数、数据库耗时和最慢语句，
+写入 Server-Timing 响应头和一行 JSON 日志；可选检测同一请求内重复执行的相同语句（N+1）。
+"""
+import json
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+
+class RequestSQLStats:
+    """单个请求的 SQL 统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = ''
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.statements[statement] += 1
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> list:
+        """执行次数达到阈值的语句，按次数降序"""
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+
+def current_stats():
+    """当前请求的 SQL 统计，不在请求中或未启用时返回 None"""
+    if not has_request_context():
+        return None
+    return g.get('sql_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_sql_profiler_started', None)
+    stats = current_stats()
+    if started is not None and stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _short(statement: str, limit: int = 200) -> str:
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def init_app(app) -> None:
+    """注册 SQL 剖析；SQL_PROFILING=false 时不挂任何钩子"""
+    if not app.config.get('SQL_PROFILING', True):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    slow_ms = app.config.get('SQL_SLOW_QUERY_MS', 100)
+    nplus1_mode = app.config.get('SQL_NPLUS1_DETECT', 'off')
+    nplus1_threshold = app.config.get('SQL_NPLUS1_THRESHOLD', 5)
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = RequestSQLStats()
+
+    @app.after_request
+    def report_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None or request.path.startswith('/static/'):
+            return response
+
+        db_ms = stats.total * 1000
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{stats.count} queries"')
+
+        record = {
+            'event': 'sql_profile',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(db_ms, 2),
+            'slowest_ms': round(stats.slowest * 1000, 2),
+        }
+        slow = stats.slowest * 1000 >= slow_ms
+        if slow:
+            record['slowest'] = _short(stats.slowest_statement)
+
+        repeated = stats.repeated(nplus1_threshold) if nplus1_mode != 'off' else []
+        if repeated:
+            record['repeated'] = [{'count': n, 'statement': _short(stmt)} for stmt, n in repeated]
+            if nplus1_mode == 'raise':
+                raise RuntimeError(f'疑似 N+1 查询：{request.endpoint} 重复执行 {repeated[0][1]} 次 '
+                                   f'{_short(repeated[0][0])}')
+
+        line = json.dumps(record, ensure_ascii=False)
+        if slow or repeated:
+            app.logger.warning(line)
+        else:
+            app.logger.info(line)
+        return response
@@ -4,84 +4,53 @@
 import os
 from datetime import date
 from flask import url_for
+from utils.assets import first_available_url
 from utils.time_utils import calc_age_months, add_months
 
 
-def get_avatar_url(app) -> str:
-    """获取头像URL"""
+AVATAR_CANDIDATES = ('avatar.jpg', 'avatar.png', 'avatar.jpeg', 'avatar-default.svg')
+# 上传封面时生成的 cover.webp 优先，手工放置的大尺寸原图次之
+COVER_CANDIDATES = ('cover.webp', 'cover.jpg', 'cover.png', 'cover.jpeg', 'cover-default.jpg')
+
+
+def get_avatar_url(app, baby=None) -> str:
+    """获取头像URL：宝宝自己的头像优先，其次站点默认头像"""
+    if baby is not None and baby.avatar_path:
+        return url_for('static', filename=baby.avatar_path)
     # 优先使用环境变量 AVATAR_URL（可为绝对 URL）
     env_url = os.environ.get('AVATAR_URL')
     if env_url:
         return env_url
-    
-    # 其次检测 static 下是否有用户自定义头像
-    static_dir = app.static_folder or 'static'
-    for fname in ['avatar.jpg', 'avatar.png', 'avatar.jpeg']:
-        candidate = os.path.join(static_dir, fname)
-        if os.path.exists(candidate):
-            try:
-                v = int(os.path.getmtime(candidate))
-            except Exception:
-                v = 0
-            return url_for('static', filename=fname) + f'?v={v}'
-    
-    # 默认占位图
-    try:
-        v = int(os.path.getmtime(os.path.join(static_dir, 'avatar-default.svg')))
-    except Exception:
-        v = 0
-    return url_for('static', filename='avatar-default.svg') + f'?v={v}'
+    return first_available_url(app, AVATAR_CANDIDATES) or url_for('static', filename='avatar-default.svg')
 
 
-def get_cover_url(app) -> str:
-    """获取封面URL"""
+def get_cover_url(app, baby=None) -> str:
+    """获取封面URL：宝宝自己的封面优先，其次站点默认封面"""
+    if baby is not None and baby.cover_path:
+        return url_for('static', filename=baby.cover_path)
     cover_env = os.environ.get('COVER_URL')
     if cover_env:
         return cover_env
-    
-    static_dir = app.static_folder or 'static'
-    for fname in ['cover.jpg', 'cover.png', 'cover.jpeg']:
-        candidate = os.path.join(static_dir, fname)
-        if os.path.exists(candidate):
-            try:
-                v = int(os.path.getmtime(candidate))
-            except Exception:
-                v = 0
-            return url_for('static', filename=fname) + f'?v={v}'
-    
-    # 默认封面
-    try:
-        v = int(os.path.getmtime(os.path.join(static_dir, 'cover-default.jpg')))
-    except Exception:
-        v = 0
-    cover_url = url_for('static', filename='cover-default.jpg') + f'?v={v}'
-    
-    # 若存在压缩后的 cover.webp 优先使用
-    try:
-        v_webp = int(os.path.getmtime(os.path.join(static_dir, 'cover.webp')))
-        cover_url = url_for('static', filename='cover.webp') + f'?v={v_webp}'
-    except Exception:
-        pass
-    
-    return cover_url
+    return first_available_url(app, COVER_CANDIDATES) or url_for('static', filename='cover-default.jpg')
 
 
 def get_profile_context(app) -> dict:
-    """获取用户资料上下文"""
-    from blueprints.profile import load_profile
-    
-    prof = load_profile()
-    cover_url = get_cover_url(app)
-    
-    name = prof.get('name') or ''
-    birth_str = prof.get('birth') or ''  # YYYY-MM-DD
+    """获取当前宝宝的资料上下文；同一请求内渲染多个模板时只计算一次"""
+    from flask import g
+    from services.baby_service import BabyService
+
+    if 'profile_context' in g:
+        return g.profile_context
+
+    baby = BabyService.current()
+    name = baby.name if baby else ''
+    b = baby.birth_date if baby else None
+    birth_str = b.isoformat() if b else ''  # YYYY-MM-DD
     age_months = 0
     age_text = ''
     
-    if birth_str:
+    if b:
         try:
-            y, m, d = [int(x) for x in birth_str.split('-')]
-            b = date(y, m, d)
             age_months = calc_age_months(b)
             years = age_months // 12
             months = age_months % 12
@@ -102,10 +71,14 @@ def get_profile_context(app) -> dict:
         except Exception:
             pass
     
-    return {
+    g.profile_context = {
+        'baby': baby,
+        'babies': g.get('babies', {}).get(baby.family_id, []) if baby else [],
         'baby_name': name,
         'baby_birth': birth_str,
         'baby_age_months': age_months,
         'baby_age_text': age_text,
-        'cover_url': cover_url,
+        'avatar_url': get_avatar_url(app, baby),
+        'cover_url': get_cover_url(app, baby),
     }
+    return g.profile_context